@@ -52,6 +52,11 @@ class InvoiceIn(BaseModel):
     next_run_date: str | None = None
 
 
+class InvoiceBulkIn(BaseModel):
+    invoices: list[dict] = Field(default_factory=list)
+    chunk_size: int = Field(default=500, ge=1, le=5000)
+
+
 class PaymentIn(BaseModel):
     invoice_id: int
     amount: float
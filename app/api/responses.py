@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: pip install bizhaven[fast]
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    # Returned directly from handlers, so FastAPI skips response-model validation and jsonable_encoder.
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=str)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str).encode("utf-8")
@@ -1,132 +1,405 @@
+import asyncio
+import os
+import sqlite3
+from datetime import date
 from pathlib import Path
 
-from fastapi import FastAPI
-
-from app.api.models import AgentTaskIn, ClientIn, ExpenseIn, InvoiceIn, PaymentIn, ProjectIn
-from app.core.config import APP_NAME, APP_VERSION
-from app.core.database import init_db
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from app.api.models import AgentTaskIn, ClientIn, ExpenseIn, InvoiceBulkIn, InvoiceIn, PaymentIn, ProjectIn
+from app.api.responses import FastJSONResponse
+from app.core.cache import cache_stats, data_etag
+from app.core.config import AGENT_WORKERS, APP_NAME, APP_VERSION, HTTP_CACHE_MAX_AGE, METRICS_ENABLED, PAGE_SIZE, PAGE_SIZE_MAX, SCHEDULER_ENABLED, SEARCH_LIMIT, SEARCH_LIMIT_MAX, UPLOAD_FORM_OVERHEAD, UPLOAD_MAX_BYTES
+from app.core.database import close_pool, init_db
+from app.core.executor import Lane, LaneBusy, SingleFlight, lane_stats, read_lane, report_flight, report_lane, shutdown_lanes, write_lane
+from app.core.leader import LeaderLock
+from app.core.metrics import MetricsMiddleware, metric_lines, render, slow_queries
+from app.core.write_behind import write_behind
 from app.services.repository import (
     add_invoice_with_items,
-    backup_database,
+    add_invoices_bulk,
+    audit,
+    audit_events,
     dashboard_summary,
+    delete_payment,
     ensure_client_portal_token,
     estimate_tax,
     execute,
     expense_category_breakdown,
     export_tax_summary,
     fetch_all,
+    list_page,
     memoria_autosave,
     profit_loss,
-    run_recurring_invoices,
-    update_invoice_payment_status,
+    record_payment,
 )
+from app.services.agents import AgentWorkerPool, enqueue_agent_task
+from app.services.backup import create_backup, list_backups
+from app.services.exports import EXPORTS, FORMATS, export_filename, stream_export
+from app.services.files import UploadTooLarge, blob_path, check_entity, commit_upload, content_disposition, file_info, list_files, stage_upload
+from app.services.memoria import search_memories
+from app.services.scheduler import JobBusy, build_scheduler
+from app.services.search import search
 
 app = FastAPI(title=APP_NAME, version=APP_VERSION)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+scheduler = build_scheduler()
+agent_pool = AgentWorkerPool()
+leader = LeaderLock()
+
+
+def _start_background() -> None:
+    scheduler.start()
+    if AGENT_WORKERS:
+        agent_pool.start()
 
 
 @app.on_event("startup")
 def startup() -> None:
     init_db()
+    if SCHEDULER_ENABLED:
+        # With several API workers only the lock holder runs the scheduler and agent pool.
+        leader.start(_start_background)
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    leader.cancel()
+    scheduler.stop()
+    agent_pool.stop()
+    # Handed over only once our jobs have stopped, so two schedulers never overlap.
+    leader.release()
+    shutdown_lanes()
+    # Lane jobs may have queued write-behind items right up to the end; commit them before the pool closes.
+    write_behind.close()
+    close_pool()
+
+
+@app.exception_handler(LaneBusy)
+async def lane_busy(request: Request, exc: LaneBusy) -> JSONResponse:
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(sqlite3.OperationalError)
+async def database_locked(request: Request, exc: sqlite3.OperationalError) -> JSONResponse:
+    # Another worker process held the write lock past the busy timeout; the client can simply retry.
+    if "locked" not in str(exc):
+        raise exc
+    return JSONResponse({"detail": "Database is busy, retry shortly"}, status_code=503, headers={"Retry-After": "1"})
 
 
 @app.get("/health")
-def health() -> dict[str, str]:
+async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/stats")
+async def stats() -> dict:
+    return {"worker": {"pid": os.getpid(), "background_leader": leader.is_leader}, "db_lanes": lane_stats(), "agents": await read_lane.run(agent_pool.stats), "query_cache": cache_stats(), "report_flight": report_flight.stats(), "write_behind": write_behind.stats(), "slow_queries": list(slow_queries)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    lanes = lane_stats()
+    cache = cache_stats()
+    extra = []
+    for field, kind in (("active", "gauge"), ("queued", "gauge"), ("completed", "counter"), ("failed", "counter"), ("rejected", "counter")):
+        name = f"bizhaven_db_lane_{field}" + ("_total" if kind == "counter" else "")
+        extra += metric_lines(name, kind, f"Database lane {field} jobs.", (({"lane": lane}, stats[field]) for lane, stats in lanes.items()))
+    for field in ("hits", "misses", "evictions"):
+        extra += metric_lines(f"bizhaven_query_cache_{field}_total", "counter", f"Query cache {field}.", [({}, cache[field])])
+    extra += metric_lines("bizhaven_query_cache_entries", "gauge", "Entries held in the query cache.", [({}, cache["size"])])
+    flight = report_flight.stats()
+    extra += metric_lines(
+        "bizhaven_report_requests_total", "counter", "Report requests by how they were answered.", (({"outcome": outcome}, flight[outcome]) for outcome in ("computed", "coalesced", "reused"))
+    )
+    queued = write_behind.stats()
+    extra += metric_lines("bizhaven_write_behind_queue_depth", "gauge", "Write-behind items waiting to commit.", [({}, queued["depth"])])
+    extra += metric_lines("bizhaven_write_behind_items_total", "counter", "Write-behind items by outcome.", (({"outcome": outcome}, queued[outcome]) for outcome in ("written", "failed")))
+    extra += metric_lines("bizhaven_write_behind_batches_total", "counter", "Write-behind batch commits.", [({}, queued["batches"])])
+    extra += metric_lines("bizhaven_write_behind_flush_seconds_total", "counter", "Time spent committing write-behind batches.", [({}, round(write_behind.flush_ms_total / 1000, 6))])
+    return PlainTextResponse(render(extra), media_type="text/plain; version=0.0.4")
+
+
+async def _run_job(name: str) -> dict:
+    # Jobs commit their own short transactions, so they run on the report lane and never hold the single writer.
+    try:
+        result = await report_lane.run(scheduler.run_job, name, False)
+    except JobBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    if not result["ok"]:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
+
+
 @app.post("/automation/run-recurring")
-def run_recurring() -> dict:
-    return {"created": run_recurring_invoices()}
+async def run_recurring() -> dict:
+    return {"created": (await _run_job("recurring_invoices"))["result"]}
+
+
+@app.post("/automation/send-reminders")
+async def send_reminders() -> dict:
+    return (await _run_job("reminders"))["result"]
+
+
+CACHE_CONTROL = f"private, max-age={HTTP_CACHE_MAX_AGE}, must-revalidate" if HTTP_CACHE_MAX_AGE else "private, no-cache"
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # Weak comparison, as If-None-Match requires.
+    return header.strip() == "*" or etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+async def _conditional(request: Request, tables: tuple[str, ...], lane: Lane, fn, *args, key: tuple = (), flight: SingleFlight | None = None) -> Response:
+    parts = (APP_VERSION, request.url.path, request.url.query, *key)
+    etag = await read_lane.run(data_etag, tables, *parts)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    if flight is None:
+        body = await lane.run(fn, *args)
+    else:
+        # Keyed on the fresh tag, so only requests against the same data version share a result. The tag is read
+        # before the payload: a write landing in between can only make it older than the body (one extra refetch).
+        body = await flight.run((*parts, etag), lambda: lane.run(fn, *args))
+    return FastJSONResponse(body, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
 
 @app.get("/dashboard")
-def dashboard() -> dict:
-    return dashboard_summary()
+async def dashboard(request: Request) -> Response:
+    # Upcoming-invoice counts roll over with the date, so the day is part of the stamp.
+    return await _conditional(request, ("invoices", "payments", "expenses", "projects"), read_lane, dashboard_summary, key=(date.today(),), flight=report_flight)
 
 
 @app.get("/reports/profit-loss")
-def report_profit_loss(period: str = "monthly") -> list[dict]:
-    return profit_loss(period)
+async def report_profit_loss(request: Request, period: str = "monthly", start: date | None = None, end: date | None = None) -> Response:
+    return await _conditional(request, ("payments", "expenses"), report_lane, profit_loss, period, start, end, flight=report_flight)
 
 
 @app.get("/reports/expense-categories")
-def report_expense_categories() -> list[dict]:
-    return expense_category_breakdown()
+async def report_expense_categories(request: Request, start: date | None = None, end: date | None = None) -> Response:
+    return await _conditional(request, ("expenses",), report_lane, expense_category_breakdown, start, end, flight=report_flight)
 
 
 @app.get("/reports/tax-summary/{year}")
-def report_tax_summary(year: str) -> dict:
-    out = export_tax_summary(Path("data/exports") / f"tax_summary_{year}.csv", year)
+async def report_tax_summary(year: str, start: date | None = None, end: date | None = None) -> dict:
+    try:
+        out = await report_lane.run(export_tax_summary, Path("data/exports") / f"tax_summary_{year}.csv", year, start, end)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     return {"path": str(out)}
 
 
+@app.get("/exports/{dataset}")
+async def export_dataset(
+    dataset: str,
+    fmt: str = Query("csv", alias="format"),
+    gzip: bool = False,
+    start: date | None = None,
+    end: date | None = None,
+) -> StreamingResponse:
+    if dataset not in EXPORTS or fmt not in FORMATS:
+        raise HTTPException(status_code=404, detail=f"Unknown export {dataset}.{fmt}")
+    filename = export_filename(dataset, fmt, gzip)
+    return StreamingResponse(
+        report_lane.iterate(stream_export(dataset, fmt, start, end, gzip)),
+        media_type="application/gzip" if gzip else FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @app.post("/backup")
-def backup() -> dict:
-    out = backup_database(Path("data/exports/backup_snapshot.json"))
-    return {"path": str(out)}
+async def backup() -> dict:
+    return await report_lane.run(create_backup)
+
+
+def _backup_listing() -> list[dict]:
+    listing = []
+    for path in list_backups():
+        try:
+            listing.append({"path": str(path), "size_bytes": path.stat().st_size})
+        except FileNotFoundError:  # rotated away since the glob
+            continue
+    return listing
+
+
+@app.get("/backups")
+async def backups() -> list[dict]:
+    return await report_lane.run(_backup_listing)
+
+
+async def _limited_body(request: Request, limit: int):
+    # Counts bytes as they arrive, so an oversized upload is cut off at the limit instead of being spooled whole first.
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > limit:
+            raise UploadTooLarge(f"Upload exceeds the {UPLOAD_MAX_BYTES // (1024 * 1024)} MB limit")
+        yield chunk
+
+
+@app.post("/files")
+async def upload_file(request: Request) -> dict:
+    # Parsed here rather than through File()/Form() parameters, which would read the whole body before the handler runs.
+    limit = UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > limit:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds the {UPLOAD_MAX_BYTES // (1024 * 1024)} MB limit")
+    try:
+        form = await MultiPartParser(request.headers, _limited_body(request, limit), max_files=1, max_fields=10).parse()
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except MultiPartException as exc:
+        raise HTTPException(status_code=400, detail=exc.message) from exc
+    try:
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=400, detail="A multipart 'file' field is required")
+        entity = str(form.get("entity") or "document")
+        raw_id = str(form.get("entity_id") or "")
+        try:
+            if raw_id and not raw_id.isdigit():
+                raise ValueError("entity_id must be an integer")
+            entity_id = int(raw_id) if raw_id else None
+            check_entity(entity, entity_id)
+            # Hashing and copying happen off the event loop and off the DB lanes; only the final insert takes the writer.
+            staged, sha256, size = await asyncio.to_thread(stage_upload, file.file)
+        except UploadTooLarge as exc:
+            raise HTTPException(status_code=413, detail=str(exc)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        try:
+            return await write_lane.run(commit_upload, staged, sha256, size, file.filename, file.content_type, entity, entity_id)
+        except LookupError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        finally:
+            staged.unlink(missing_ok=True)
+    finally:
+        await form.close()
+
+
+@app.get("/files")
+async def files(entity: str | None = None, entity_id: int | None = None, limit: int = Query(100, ge=1, le=PAGE_SIZE_MAX)) -> list[dict]:
+    try:
+        return await read_lane.run(list_files, entity, entity_id, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.get("/files/{sha256}")
+async def download_file(request: Request, sha256: str, name: str | None = None) -> Response:
+    info = await read_lane.run(file_info, sha256)
+    if info is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    # The address is the content hash, so the body behind it can never change.
+    headers = {"ETag": f'"{sha256}"', "Cache-Control": "private, max-age=31536000, immutable", "X-Content-Type-Options": "nosniff"}
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    # The content type is whatever the uploader claimed, so only known-safe types are shown inline.
+    disposition = content_disposition(info["content_type"])
+    return FileResponse(blob_path(sha256), media_type=info["content_type"], filename=name or info["filename"], content_disposition_type=disposition, headers=headers)
+
+
+async def _page(name: str, limit: int, cursor: str | None, **filters) -> FastJSONResponse:
+    try:
+        return FastJSONResponse(await read_lane.run(list_page, name, limit, cursor, **filters))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @app.get("/clients")
-def clients() -> list[dict]:
-    return fetch_all("SELECT * FROM clients ORDER BY created_at DESC")
+async def clients(limit: int = Query(PAGE_SIZE, ge=1, le=PAGE_SIZE_MAX), cursor: str | None = None) -> FastJSONResponse:
+    return await _page("clients", limit, cursor)
 
 
-@app.post("/clients")
-def add_client(payload: ClientIn) -> dict:
+def _create_client(payload: ClientIn) -> dict:
     cid = execute(
         "INSERT INTO clients (name, email, phone, notes) VALUES (?,?,?,?)",
         (payload.name, payload.email, payload.phone, payload.notes),
     )
     token = ensure_client_portal_token(cid)
     memoria_autosave(cid, f"New client added: {payload.name}", priority=2)
+    audit("client.created", "client", cid)
     return {"id": cid, "portal_token": token}
 
 
+@app.post("/clients")
+async def add_client(payload: ClientIn) -> dict:
+    return await write_lane.run(_create_client, payload)
+
+
 @app.get("/projects")
-def projects() -> list[dict]:
-    return fetch_all(
-        "SELECT p.*, c.name AS client_name FROM projects p LEFT JOIN clients c ON c.id=p.client_id ORDER BY p.created_at DESC"
-    )
+async def projects(
+    limit: int = Query(PAGE_SIZE, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = None,
+    client_id: int | None = None,
+    status: str | None = None,
+) -> FastJSONResponse:
+    return await _page("projects", limit, cursor, client_id=client_id, status=status)
 
 
-@app.post("/projects")
-def add_project(payload: ProjectIn) -> dict:
+def _create_project(payload: ProjectIn) -> dict:
     pid = execute(
         "INSERT INTO projects (client_id,name,description,status,start_date,end_date,budget) VALUES (?,?,?,?,?,?,?)",
         (payload.client_id, payload.name, payload.description, payload.status, payload.start_date, payload.end_date, payload.budget),
     )
     memoria_autosave(payload.client_id, f"Project created: {payload.name}", priority=3)
+    audit("project.created", "project", pid, client_id=payload.client_id)
     return {"id": pid}
 
 
-@app.get("/expenses")
-def expenses() -> list[dict]:
-    return fetch_all("SELECT * FROM expenses ORDER BY expense_date DESC")
+@app.post("/projects")
+async def add_project(payload: ProjectIn) -> dict:
+    return await write_lane.run(_create_project, payload)
 
 
-@app.post("/expenses")
-def add_expense(payload: ExpenseIn) -> dict:
+@app.get("/expenses")
+async def expenses(
+    limit: int = Query(PAGE_SIZE, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = None,
+    category: str | None = None,
+    project_id: int | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> FastJSONResponse:
+    return await _page("expenses", limit, cursor, category=category, project_id=project_id, start=start, end=end)
+
+
+def _create_expense(payload: ExpenseIn) -> dict:
     eid = execute(
         "INSERT INTO expenses (project_id,category,vendor,amount,expense_date,receipt_path,notes) VALUES (?,?,?,?,?,?,?)",
         (payload.project_id, payload.category, payload.vendor, payload.amount, payload.expense_date, payload.receipt_path, payload.notes),
     )
+    audit("expense.created", "expense", eid, amount=payload.amount, category=payload.category)
     return {"id": eid}
 
 
-@app.get("/invoices")
-def invoices() -> list[dict]:
-    return fetch_all(
-        """
-        SELECT i.*, c.name as client_name,
-        COALESCE((SELECT SUM(amount) FROM payments p WHERE p.invoice_id=i.id),0) AS paid
-        FROM invoices i LEFT JOIN clients c ON c.id=i.client_id
-        ORDER BY i.created_at DESC
-        """
-    )
+@app.post("/expenses")
+async def add_expense(payload: ExpenseIn) -> dict:
+    return await write_lane.run(_create_expense, payload)
 
 
-@app.get("/portal/{token}")
-def portal_preview(token: str) -> dict:
+@app.get("/invoices")
+async def invoices(
+    limit: int = Query(PAGE_SIZE, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = None,
+    status: str | None = None,
+    client_id: int | None = None,
+    project_id: int | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> FastJSONResponse:
+    return await _page("invoices", limit, cursor, status=status, client_id=client_id, project_id=project_id, start=start, end=end)
+
+
+def _portal(token: str) -> dict:
     client = fetch_all("SELECT * FROM clients WHERE portal_token=?", (token,))
     if not client:
         return {"error": "Invalid token"}
@@ -135,31 +408,100 @@ def portal_preview(token: str) -> dict:
     return {"client": client[0]["name"], "invoices": invoices}
 
 
+@app.get("/portal/{token}")
+async def portal_preview(request: Request, token: str) -> Response:
+    return await _conditional(request, ("clients", "invoices"), read_lane, _portal, token)
+
+
 @app.post("/invoices")
-def add_invoice(payload: InvoiceIn) -> dict:
-    iid = add_invoice_with_items(payload.model_dump())
+async def add_invoice(payload: InvoiceIn) -> dict:
+    iid = await write_lane.run(add_invoice_with_items, payload.model_dump())
     return {"id": iid}
 
 
+@app.post("/invoices/bulk")
+async def add_invoices(payload: InvoiceBulkIn) -> dict:
+    valid: list[tuple[int, dict]] = []
+    errors: list[dict] = []
+    for index, row in enumerate(payload.invoices):
+        try:
+            valid.append((index, InvoiceIn.model_validate(row).model_dump()))
+        except ValidationError as exc:
+            errors.append({"index": index, "invoice_number": row.get("invoice_number"), "error": str(exc)})
+    result = await write_lane.run(add_invoices_bulk, [row for _, row in valid], chunk_size=payload.chunk_size)
+    for error in result["errors"]:
+        error["index"] = valid[error["index"]][0]
+    errors = sorted(errors + result["errors"], key=lambda e: e["index"])
+    return {
+        "total": len(payload.invoices),
+        "created": result["created"],
+        "failed": len(errors),
+        "ids": result["ids"],
+        "errors": errors,
+    }
+
+
 @app.post("/payments")
-def add_payment(payload: PaymentIn) -> dict:
-    pid = execute(
-        "INSERT INTO payments (invoice_id,amount,method,paid_on,notes) VALUES (?,?,?,?,?)",
-        (payload.invoice_id, payload.amount, payload.method, payload.paid_on, payload.notes),
-    )
-    update_invoice_payment_status(payload.invoice_id)
+async def add_payment(payload: PaymentIn) -> dict:
+    pid = await write_lane.run(record_payment, payload.invoice_id, payload.amount, payload.method, payload.paid_on, payload.notes)
     return {"id": pid}
 
 
+@app.delete("/payments/{payment_id}")
+async def remove_payment(payment_id: int) -> dict:
+    if not await write_lane.run(delete_payment, payment_id):
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return {"deleted": payment_id}
+
+
 @app.post("/agentora/tasks")
-def queue_agent_task(payload: AgentTaskIn) -> dict:
-    tid = execute(
-        "INSERT INTO agent_tasks (client_id,task_type,payload,status) VALUES (?,?,?,?)",
-        (payload.client_id, payload.task_type, payload.payload, "queued"),
-    )
-    return {"id": tid}
+async def queue_agent_task(payload: AgentTaskIn) -> dict:
+    # Enqueueing on the write lane keeps a full queue or a disabled write-behind off the event loop. The id arrives
+    # with the next group commit, which this request shares with whatever else is queued at that moment.
+    pending = await write_lane.run(enqueue_agent_task, payload.client_id, payload.task_type, payload.payload, urgent=True)
+    return {"id": await asyncio.wrap_future(pending)}
+
+
+@app.post("/agentora/run")
+async def run_agent_tasks() -> dict:
+    return {"processed": await report_lane.run(agent_pool.drain)}
+
+
+@app.get("/agentora/stats")
+async def agent_stats() -> dict:
+    return await read_lane.run(agent_pool.stats)
+
+
+@app.get("/audit")
+async def audit_log(entity: str | None = None, entity_id: int | None = None, limit: int = Query(100, ge=1, le=PAGE_SIZE_MAX)) -> list[dict]:
+    return await read_lane.run(audit_events, entity, entity_id, limit)
+
+
+@app.get("/search")
+async def global_search(
+    q: str = "",
+    kind: str | None = None,
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=SEARCH_LIMIT_MAX),
+) -> list[dict]:
+    try:
+        return await read_lane.run(search, q, kind, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.get("/memories/search")
+async def memories_search(q: str, client_id: int | None = None, limit: int = Query(5, ge=1, le=50)) -> list[dict]:
+    return await read_lane.run(search_memories, q, client_id, limit)
+
+
+@app.get("/tax-estimate")
+async def tax_range(start: date | None = None, end: date | None = None, tax_rate: float = 0.22) -> dict:
+    return await report_lane.run(estimate_tax, None, tax_rate, start, end)
 
 
 @app.get("/tax-estimate/{month}")
-def tax(month: str) -> dict:
-    return estimate_tax(month)
+async def tax(month: str, tax_rate: float = 0.22) -> dict:
+    try:
+        return await report_lane.run(estimate_tax, month, tax_rate)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
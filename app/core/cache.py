@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from app.core.config import QUERY_CACHE_ENABLED, QUERY_CACHE_SIZE
+from app.core.database import get_conn
+
+F = TypeVar("F", bound=Callable[..., Any])
+_MISSING = object()
+VERSIONS_SQL = "SELECT name, version FROM table_versions"
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[Any, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+query_cache = LRUCache()
+
+
+def table_versions() -> dict[str, int]:
+    with get_conn() as conn:
+        return {row["name"]: row["version"] for row in conn.execute(VERSIONS_SQL)}
+
+
+def data_etag(tables: tuple[str, ...], *parts: Any) -> str:
+    # Weak: the stamp identifies the data, not the exact bytes (orjson and json encode floats differently).
+    versions = table_versions()
+    stamp = "|".join([*(f"{name}={versions.get(name, 0)}" for name in tables), *map(str, parts)])
+    return 'W/"' + hashlib.blake2b(stamp.encode(), digest_size=12).hexdigest() + '"'
+
+
+def cached(tables: tuple[str, ...] | Callable[..., tuple[str, ...]]) -> Callable[[F], F]:
+    # Results are keyed on the call and the trigger-maintained versions of the tables they read, so any
+    # committed write to those tables (from any process) retires the entry. Cached values are shared: treat them as read-only.
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not QUERY_CACHE_ENABLED:
+                return fn(*args, **kwargs)
+            names = tables(*args, **kwargs) if callable(tables) else tables
+            with get_conn() as conn:
+                if conn.in_transaction:
+                    # Uncommitted versions could be rolled back and reused by a different write.
+                    return fn(*args, **kwargs)
+                versions = {row["name"]: row["version"] for row in conn.execute(VERSIONS_SQL)}
+            key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())), tuple(versions.get(name, 0) for name in names))
+            try:
+                result = query_cache.get(key, _MISSING)
+            except TypeError:
+                return fn(*args, **kwargs)
+            if result is _MISSING:
+                result = fn(*args, **kwargs)
+                query_cache.put(key, result)
+            return result
+
+        wrapper.uncached = fn  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def cache_stats() -> dict[str, int]:
+    return query_cache.stats()
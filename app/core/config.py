@@ -1,8 +1,77 @@
+import os
 from pathlib import Path
 
 APP_NAME = "BizHaven"
 APP_VERSION = "0.2.0"
-DATA_DIR = Path("data")
+DATA_DIR = Path(os.getenv("BIZHAVEN_DATA_DIR", "data"))
 DB_PATH = DATA_DIR / "bizhaven.db"
 DOCS_DIR = DATA_DIR / "documents"
 RECEIPTS_DIR = DATA_DIR / "receipts"
+BACKUP_DIR = DATA_DIR / "backups"
+FILES_DIR = DATA_DIR / "files"
+LEADER_LOCK_PATH = DATA_DIR / "background.lock"
+
+DB_POOL_SIZE = 8
+DB_POOL_TIMEOUT = 30.0
+DB_BUSY_TIMEOUT_MS = int(os.getenv("BIZHAVEN_DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KIB = 16384
+DB_MMAP_SIZE = 128 * 1024 * 1024
+
+API_HOST = os.getenv("BIZHAVEN_API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("BIZHAVEN_API_PORT", "8090"))
+API_WORKERS = int(os.getenv("BIZHAVEN_API_WORKERS", "1"))
+API_GRACEFUL_SHUTDOWN_SECONDS = float(os.getenv("BIZHAVEN_API_GRACEFUL_SHUTDOWN", "10"))
+API_LOG_LEVEL = os.getenv("BIZHAVEN_API_LOG_LEVEL", "warning")
+LEADER_RETRY_SECONDS = 15.0
+
+SCHEDULER_ENABLED = os.getenv("BIZHAVEN_SCHEDULER", "1") != "0"
+SCHEDULER_INTERVAL_SECONDS = float(os.getenv("BIZHAVEN_SCHEDULER_INTERVAL", "300"))
+RECURRING_BATCH_SIZE = 100
+PAGE_SIZE = 50
+PAGE_SIZE_MAX = 500
+EXPORT_CHUNK_SIZE = 2000
+BACKUP_RETENTION = 7
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+DB_READ_WORKERS = int(os.getenv("BIZHAVEN_DB_READ_WORKERS", "4"))
+DB_WRITE_WORKERS = int(os.getenv("BIZHAVEN_DB_WRITE_WORKERS", "1"))
+DB_REPORT_WORKERS = int(os.getenv("BIZHAVEN_DB_REPORT_WORKERS", "2"))
+DB_LANE_QUEUE_DEPTH = int(os.getenv("BIZHAVEN_DB_QUEUE_DEPTH", "64"))
+OUTBOX_DIR = DATA_DIR / "outbox"
+AGENT_WORKERS = int(os.getenv("BIZHAVEN_AGENT_WORKERS", "4"))
+AGENT_EXECUTOR = os.getenv("BIZHAVEN_AGENT_EXECUTOR", "thread")
+AGENT_BATCH_SIZE = 20
+AGENT_LEASE_SECONDS = 60
+AGENT_MAX_ATTEMPTS = 5
+AGENT_RETRY_BACKOFF_SECONDS = 30
+AGENT_RETRY_BACKOFF_MAX_SECONDS = 3600
+AGENT_POLL_SECONDS = float(os.getenv("BIZHAVEN_AGENT_POLL_INTERVAL", "5"))
+DELIVERY_CHANNEL = os.getenv("BIZHAVEN_DELIVERY_CHANNEL", "outbox")
+SMTP_HOST = os.getenv("BIZHAVEN_SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("BIZHAVEN_SMTP_PORT", "25"))
+SMTP_SENDER = os.getenv("BIZHAVEN_SMTP_SENDER", "bizhaven@localhost")
+REMINDER_BATCH_SIZE = 200
+REMINDER_SEND_WORKERS = 8
+REMINDER_MAX_ATTEMPTS = 5
+REMINDER_CLAIM_SECONDS = 600
+MEMORY_CONTEXT_LIMIT = 5
+MEMORY_PRIORITY_WEIGHT = 0.25
+MEMORY_RECENCY_HALF_LIFE_DAYS = 90.0
+SEARCH_LIMIT = 10
+SEARCH_LIMIT_MAX = 50
+QUERY_CACHE_ENABLED = os.getenv("BIZHAVEN_QUERY_CACHE", "1") != "0"
+QUERY_CACHE_SIZE = int(os.getenv("BIZHAVEN_QUERY_CACHE_SIZE", "512"))
+HTTP_CACHE_MAX_AGE = int(os.getenv("BIZHAVEN_HTTP_CACHE_MAX_AGE", "0"))
+REPORT_COALESCE_TTL = float(os.getenv("BIZHAVEN_REPORT_COALESCE_TTL", "1.0"))
+REPORT_COALESCE_MAX_ENTRIES = 256
+METRICS_ENABLED = os.getenv("BIZHAVEN_METRICS", "1") != "0"
+SLOW_QUERY_MS = float(os.getenv("BIZHAVEN_SLOW_QUERY_MS", "250"))
+SLOW_QUERY_LOG_SIZE = 100
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_MAX_BYTES = int(os.getenv("BIZHAVEN_UPLOAD_MAX_MB", "100")) * 1024 * 1024
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+WRITE_BEHIND_ENABLED = os.getenv("BIZHAVEN_WRITE_BEHIND", "1") != "0"
+WRITE_BEHIND_DELAY_MS = float(os.getenv("BIZHAVEN_WRITE_BEHIND_DELAY_MS", "5"))
+WRITE_BEHIND_BATCH_SIZE = 500
+WRITE_BEHIND_QUEUE_DEPTH = 10000
@@ -1,7 +1,30 @@
+import os
+import queue
 import sqlite3
+import threading
+from collections.abc import Iterator
 from contextlib import contextmanager
-
-from app.core.config import DB_PATH, DOCS_DIR, RECEIPTS_DIR
+from pathlib import Path
+
+from app.core.config import (
+    DB_BUSY_TIMEOUT_MS,
+    DB_CACHE_SIZE_KIB,
+    DB_MMAP_SIZE,
+    DB_PATH,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DOCS_DIR,
+    FILES_DIR,
+    RECEIPTS_DIR,
+)
+from app.core.metrics import connection_factory
+from app.core.migrations import apply_migrations, latest_version, schema_version
+
+_storage_ready = False
+_pool: "ConnectionPool | None" = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+_columns: dict[str, tuple[str, ...]] = {}
 
 
 def _dict_factory(cursor, row):
@@ -9,182 +32,155 @@ def _dict_factory(cursor, row):
 
 
 def ensure_storage() -> None:
+    global _storage_ready
+    if _storage_ready:
+        return
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     DOCS_DIR.mkdir(parents=True, exist_ok=True)
     RECEIPTS_DIR.mkdir(parents=True, exist_ok=True)
+    FILES_DIR.mkdir(parents=True, exist_ok=True)
+    _storage_ready = True
 
 
-def _add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, col_type: str) -> None:
-    cols = [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
-    if column not in cols:
-        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
+def connect(path: Path = DB_PATH) -> sqlite3.Connection:
+    ensure_storage()
+    conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT_MS / 1000, check_same_thread=False, factory=connection_factory)
+    conn.row_factory = _dict_factory
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+class ConnectionPool:
+    def __init__(self, path: Path = DB_PATH, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT) -> None:
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self) -> sqlite3.Connection:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No database connection available within {self.timeout}s (pool size {self.size})")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return connect(self.path)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pool_lock:
+        # A forked worker must never reuse the parent's sqlite handles.
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ConnectionPool()
+        return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close()
+        _pool = None
 
 
 def init_db() -> None:
     ensure_storage()
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.executescript(
-            """
-            CREATE TABLE IF NOT EXISTS clients (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT,
-                phone TEXT,
-                notes TEXT,
-                portal_token TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS projects (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                client_id INTEGER,
-                name TEXT NOT NULL,
-                description TEXT,
-                status TEXT DEFAULT 'active',
-                start_date TEXT,
-                end_date TEXT,
-                budget REAL DEFAULT 0,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(client_id) REFERENCES clients(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS jobs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                client_id INTEGER,
-                project_id INTEGER,
-                title TEXT NOT NULL,
-                description TEXT,
-                status TEXT DEFAULT 'open',
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(client_id) REFERENCES clients(id),
-                FOREIGN KEY(project_id) REFERENCES projects(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS invoices (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                client_id INTEGER,
-                project_id INTEGER,
-                job_id INTEGER,
-                invoice_number TEXT UNIQUE,
-                issue_date TEXT,
-                due_date TEXT,
-                status TEXT DEFAULT 'draft',
-                discount REAL DEFAULT 0,
-                custom_fields TEXT DEFAULT '{}',
-                subtotal REAL DEFAULT 0,
-                tax REAL DEFAULT 0,
-                total REAL DEFAULT 0,
-                notes TEXT,
-                reminder_days INTEGER DEFAULT 3,
-                recurring_rule TEXT DEFAULT 'none',
-                next_run_date TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(client_id) REFERENCES clients(id),
-                FOREIGN KEY(project_id) REFERENCES projects(id),
-                FOREIGN KEY(job_id) REFERENCES jobs(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS invoice_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                invoice_id INTEGER,
-                description TEXT,
-                quantity REAL,
-                rate REAL,
-                amount REAL,
-                taxable INTEGER DEFAULT 1,
-                FOREIGN KEY(invoice_id) REFERENCES invoices(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS payments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                invoice_id INTEGER,
-                amount REAL,
-                method TEXT,
-                paid_on TEXT,
-                notes TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(invoice_id) REFERENCES invoices(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                project_id INTEGER,
-                category TEXT,
-                vendor TEXT,
-                amount REAL,
-                expense_date TEXT,
-                receipt_path TEXT,
-                notes TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(project_id) REFERENCES projects(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS contracts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                client_id INTEGER,
-                project_id INTEGER,
-                title TEXT,
-                body TEXT,
-                signed INTEGER DEFAULT 0,
-                file_path TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(client_id) REFERENCES clients(id),
-                FOREIGN KEY(project_id) REFERENCES projects(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS memories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                client_id INTEGER,
-                memory TEXT,
-                source TEXT DEFAULT 'memoria',
-                priority INTEGER DEFAULT 1,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(client_id) REFERENCES clients(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS reminders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                invoice_id INTEGER,
-                reminder_date TEXT,
-                channel TEXT DEFAULT 'email',
-                sent INTEGER DEFAULT 0,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(invoice_id) REFERENCES invoices(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS agent_tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                client_id INTEGER,
-                task_type TEXT,
-                payload TEXT,
-                status TEXT DEFAULT 'queued',
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(client_id) REFERENCES clients(id)
-            );
-            """
-        )
-
-        _add_column_if_missing(conn, "clients", "portal_token", "TEXT")
-        _add_column_if_missing(conn, "jobs", "project_id", "INTEGER")
-        _add_column_if_missing(conn, "invoices", "project_id", "INTEGER")
-        _add_column_if_missing(conn, "invoices", "discount", "REAL DEFAULT 0")
-        _add_column_if_missing(conn, "invoices", "custom_fields", "TEXT DEFAULT '{}' ")
-        _add_column_if_missing(conn, "invoices", "reminder_days", "INTEGER DEFAULT 3")
-        _add_column_if_missing(conn, "invoices", "recurring_rule", "TEXT DEFAULT 'none'")
-        _add_column_if_missing(conn, "invoices", "next_run_date", "TEXT")
-        _add_column_if_missing(conn, "invoice_items", "taxable", "INTEGER DEFAULT 1")
-        _add_column_if_missing(conn, "expenses", "project_id", "INTEGER")
-        _add_column_if_missing(conn, "contracts", "project_id", "INTEGER")
-        _add_column_if_missing(conn, "memories", "priority", "INTEGER DEFAULT 1")
+    with get_conn() as conn:
+        if schema_version(conn) >= latest_version():
+            return
+        apply_migrations(conn)
 
 
 @contextmanager
 def get_conn():
-    ensure_storage()
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = _dict_factory
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        # Nested calls join the connection (and any open transaction) of the outermost caller.
+        yield conn
+        return
+    pool = get_pool()
+    conn = pool.acquire()
+    _local.conn = conn
     try:
         yield conn
-        conn.commit()
+        if conn.in_transaction:
+            conn.commit()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        _local.conn = None
+        pool.release(conn)
+
+
+def in_transaction() -> bool:
+    conn = getattr(_local, "conn", None)
+    return conn is not None and conn.in_transaction
+
+
+@contextmanager
+def transaction():
+    with get_conn() as conn:
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn
+
+
+def fetch_rows(query: str, params: tuple = ()) -> tuple[tuple[str, ...], list[tuple]]:
+    # Tuple rows plus a column map cached per statement, for hot paths that would otherwise pay the dict factory per row.
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute(query, params)
+        columns = _columns.get(query)
+        if columns is None:
+            columns = _columns[query] = tuple(col[0] for col in cur.description)
+        return columns, cur.fetchall()
+
+
+def stream_query(query: str, params: tuple = (), chunk_size: int = 1000) -> Iterator[tuple[list[str], list[tuple]]]:
+    # A dedicated tuple-row connection, so long exports neither hold a pool slot nor build per-row dicts.
+    conn = connect()
+    conn.row_factory = None
+    try:
+        cur = conn.execute(query, params)
+        columns = [col[0] for col in cur.description]
+        rows = cur.fetchmany(chunk_size)
+        yield columns, rows
+        while rows := cur.fetchmany(chunk_size):
+            yield columns, rows
     finally:
         conn.close()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from app.core.config import (
+    DB_LANE_QUEUE_DEPTH,
+    DB_READ_WORKERS,
+    DB_REPORT_WORKERS,
+    DB_WRITE_WORKERS,
+    REPORT_COALESCE_MAX_ENTRIES,
+    REPORT_COALESCE_TTL,
+)
+
+T = TypeVar("T")
+_DONE = object()
+
+
+class LaneBusy(RuntimeError):
+    def __init__(self, lane: str) -> None:
+        super().__init__(f"Database lane '{lane}' is saturated, retry shortly")
+        self.lane = lane
+
+
+class Lane:
+    # A fixed-size thread pool for blocking sqlite work, with a bounded backlog so overload fails fast instead of piling up.
+    def __init__(self, name: str, workers: int, queue_depth: int = DB_LANE_QUEUE_DEPTH) -> None:
+        self.name = name
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._pid = os.getpid()
+        self.pending = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_ms_total = 0.0
+        self.run_ms_total = 0.0
+        self.max_pending = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix=f"bizhaven-db-{self.name}")
+            self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> Future[T]:
+        submitted = time.perf_counter()
+
+        def call() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                self.active += 1
+                self.wait_ms_total += (started - submitted) * 1000
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.run_ms_total += (time.perf_counter() - started) * 1000
+
+        def done(future: Future) -> None:
+            # Runs for cancelled futures too, so a dropped request never leaks a backlog slot.
+            with self._lock:
+                self.pending -= 1
+                if future.cancelled() or future.exception() is not None:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+
+        with self._lock:
+            if self.pending >= self.workers + self.queue_depth:
+                self.rejected += 1
+                raise LaneBusy(self.name)
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+            executor = self._get_executor()
+        future = executor.submit(call)
+        future.add_done_callback(done)
+        return future
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    async def iterate(self, iterator: Iterator[T]) -> AsyncIterator[T]:
+        # Pulls each chunk of a blocking generator through the lane; the generator's connection is check_same_thread=False.
+        try:
+            while (item := await self.run(next, iterator, _DONE)) is not _DONE:
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                try:
+                    await self.run(close)
+                except LaneBusy:
+                    close()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "active": self.active,
+                "queued": self.pending - self.active,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.wait_ms_total / finished, 3) if finished else 0.0,
+                "avg_run_ms": round(self.run_ms_total / finished, 3) if finished else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=True)
+
+
+# Writes go through one lane because SQLite has a single writer; reports get their own so they cannot starve reads.
+read_lane = Lane("read", DB_READ_WORKERS)
+write_lane = Lane("write", DB_WRITE_WORKERS)
+report_lane = Lane("report", DB_REPORT_WORKERS)
+LANES = {lane.name: lane for lane in (read_lane, write_lane, report_lane)}
+
+
+def lane_stats() -> dict[str, dict[str, Any]]:
+    return {name: lane.stats() for name, lane in LANES.items()}
+
+
+def shutdown_lanes() -> None:
+    for lane in LANES.values():
+        lane.shutdown()
+
+
+class SingleFlight:
+    # Identical concurrent requests await one shared computation instead of each taking a lane worker, and a finished
+    # result answers repeats for `ttl` seconds. Event-loop confined, so no locking.
+    def __init__(self, ttl: float = REPORT_COALESCE_TTL, max_entries: int = REPORT_COALESCE_MAX_ENTRIES) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight: dict[Any, asyncio.Future] = {}
+        self._recent: dict[Any, tuple[float, Any]] = {}
+        self.computed = 0
+        self.coalesced = 0
+        self.reused = 0
+
+    async def run(self, key: Any, factory: Callable[[], Awaitable[T]]) -> T:
+        recent = self._recent.get(key)
+        if recent is not None and recent[0] > time.monotonic():
+            self.reused += 1
+            return recent[1]
+        task = self._inflight.get(key)
+        if task is None:
+            self.computed += 1
+            task = self._inflight[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        # Shielded: a caller that disconnects must not cancel the computation the others are waiting on.
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Any, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or self.ttl <= 0:
+            return
+        now = time.monotonic()
+        if len(self._recent) >= self.max_entries:
+            self._recent = {k: entry for k, entry in self._recent.items() if entry[0] > now}
+        if len(self._recent) < self.max_entries:
+            self._recent[key] = (now + self.ttl, task.result())
+
+    def stats(self) -> dict[str, Any]:
+        return {"ttl_s": self.ttl, "in_flight": len(self._inflight), "computed": self.computed, "coalesced": self.coalesced, "reused": self.reused}
+
+
+report_flight = SingleFlight()
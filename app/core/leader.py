@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+from app.core.config import LEADER_LOCK_PATH, LEADER_RETRY_SECONDS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+class LeaderLock:
+    # One process per data directory runs background jobs. The OS drops the lock when its holder exits,
+    # however it exits, and the other workers poll so one of them takes over.
+    def __init__(self, path: Path = LEADER_LOCK_PATH, retry_seconds: float = LEADER_RETRY_SECONDS) -> None:
+        self.path = path
+        self.retry_seconds = retry_seconds
+        self._fd: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not _try_lock(fd):
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        logger.info("process %s holds %s", os.getpid(), self.path)
+        return True
+
+    def start(self, on_elected: Callable[[], None]) -> None:
+        self._stop.clear()
+        if self.try_acquire():
+            on_elected()
+            return
+
+        def _wait() -> None:
+            while not self._stop.wait(self.retry_seconds):
+                if self.try_acquire():
+                    on_elected()
+                    return
+
+        self._thread = threading.Thread(target=_wait, name="bizhaven-leader", daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def release(self) -> None:
+        if self._fd is not None:
+            # Closing the descriptor releases the lock; the file stays so the next holder reuses it.
+            os.close(self._fd)
+            self._fd = None
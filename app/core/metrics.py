@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import functools
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.config import HTTP_LATENCY_BUCKETS, METRICS_ENABLED, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_MS
+
+logger = logging.getLogger("bizhaven.slow_sql")
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+_lock = threading.Lock()
+# normalized statement -> [calls, seconds, rows]
+_statements: dict[str, list[float]] = {}
+# (method, route, status) -> per-bucket counts followed by sum and count
+_requests: dict[tuple[str, str, str], list[float]] = {}
+slow_queries: deque[dict[str, Any]] = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+_slow_total = 0
+
+
+@functools.lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    # Literals and IN-lists collapse to placeholders so each distinct statement shape gets one series.
+    sql = _LITERALS.sub("?", _SPACES.sub(" ", sql).strip())
+    return _IN_LISTS.sub("(?, ...)", sql)
+
+
+def _query_plan(conn: sqlite3.Connection, sql: str, params: Any) -> list[str]:
+    try:
+        rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    except (sqlite3.Error, ValueError) as exc:
+        return [f"unavailable: {exc}"]
+    return [row["detail"] if isinstance(row, dict) else row[-1] for row in rows]
+
+
+def _record(statement: str, seconds: float, rows: int, calls: int) -> None:
+    with _lock:
+        stats = _statements.get(statement)
+        if stats is None:
+            stats = _statements[statement] = [0, 0.0, 0]
+        stats[0] += calls
+        stats[1] += seconds
+        stats[2] += rows
+
+
+def _log_slow(conn: sqlite3.Connection, sql: str, params: Any, seconds: float) -> None:
+    global _slow_total
+    entry = {
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "ms": round(seconds * 1000, 3),
+        "statement": normalize_sql(sql),
+        "plan": _query_plan(conn, sql, params) if params is not None else [],
+    }
+    with _lock:
+        _slow_total += 1
+        slow_queries.append(entry)
+    logger.warning("slow query (%.1f ms): %s | plan: %s", entry["ms"], entry["statement"], "; ".join(entry["plan"]))
+
+
+class TracedCursor(sqlite3.Cursor):
+    # Execution and every fetch are timed against the cursor's current statement, so lazily stepped SELECTs are fully counted.
+    _sql = ""
+    _params: Any = None
+    _elapsed = 0.0
+    _slow_logged = False
+
+    def _begin(self, sql: str, params: Any, seconds: float, rows: int) -> None:
+        self._sql, self._params, self._elapsed, self._slow_logged = sql, params, 0.0, False
+        self._account(seconds, rows, calls=1)
+
+    def _account(self, seconds: float, rows: int, calls: int = 0) -> None:
+        _record(normalize_sql(self._sql), seconds, rows, calls)
+        self._elapsed += seconds
+        if not self._slow_logged and self._elapsed * 1000 >= SLOW_QUERY_MS:
+            self._slow_logged = True
+            _log_slow(self.connection, self._sql, self._params, self._elapsed)
+
+    def execute(self, sql: str, parameters: Any = ()) -> TracedCursor:
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._begin(sql, parameters, time.perf_counter() - started, 0 if self.description else max(self.rowcount, 0))
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> TracedCursor:
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._begin(sql, None, time.perf_counter() - started, max(self.rowcount, 0))
+        return self
+
+    def fetchone(self) -> Any:
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._account(time.perf_counter() - started, row is not None)
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._account(time.perf_counter() - started, len(rows))
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._account(time.perf_counter() - started, len(rows))
+        return rows
+
+    def __next__(self) -> Any:
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._account(time.perf_counter() - started, 0)
+            raise
+        self._account(time.perf_counter() - started, 1)
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    # Connection.execute does not go through cursor(), so the shortcuts are rerouted to a traced cursor.
+    def cursor(self, factory: type[sqlite3.Cursor] = TracedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        cursor = super().executescript(sql_script)
+        _record(normalize_sql(sql_script), time.perf_counter() - started, 0, 1)
+        return cursor
+
+
+# The plain connection class when disabled, so an untraced build pays nothing per statement.
+connection_factory: type[sqlite3.Connection] = TracedConnection if METRICS_ENABLED else sqlite3.Connection
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    key = (method, route, str(status))
+    with _lock:
+        series = _requests.get(key)
+        if series is None:
+            series = _requests[key] = [0] * (len(HTTP_LATENCY_BUCKETS) + 2)
+        for index, bound in enumerate(HTTP_LATENCY_BUCKETS):
+            if seconds <= bound:
+                series[index] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware: cheaper, and streamed responses are timed until their last chunk.
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route on the scope; label by its template to keep cardinality bounded.
+            route = scope.get("route")
+            observe_request(scope["method"], getattr(route, "path", "unmatched"), status, time.perf_counter() - started)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, Any]) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}" if labels else ""
+
+
+def metric_lines(name: str, kind: str, help_text: str, samples: Iterable[tuple[dict[str, Any], float]]) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+
+def render(extra: Iterable[str] = ()) -> str:
+    with _lock:
+        statements = {sql: list(stats) for sql, stats in _statements.items()}
+        requests = {key: list(series) for key, series in _requests.items()}
+        slow_total = _slow_total
+    lines = metric_lines("bizhaven_sql_statement_calls_total", "counter", "Executions per normalized SQL statement.", (({"statement": sql}, s[0]) for sql, s in statements.items()))
+    lines += metric_lines("bizhaven_sql_statement_seconds_total", "counter", "Time spent executing and fetching per statement.", (({"statement": sql}, round(s[1], 6)) for sql, s in statements.items()))
+    lines += metric_lines("bizhaven_sql_statement_rows_total", "counter", "Rows returned or changed per statement.", (({"statement": sql}, s[2]) for sql, s in statements.items()))
+    lines += metric_lines("bizhaven_sql_slow_statements_total", "counter", f"Statements slower than {SLOW_QUERY_MS} ms.", [({}, slow_total)])
+
+    name = "bizhaven_http_request_duration_seconds"
+    lines += [f"# HELP {name} HTTP request latency by route template.", f"# TYPE {name} histogram"]
+    for (method, route, status), series in sorted(requests.items()):
+        labels = {"method": method, "route": route, "status": status}
+        for bound, count in zip(HTTP_LATENCY_BUCKETS, series):
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {series[-1]}")
+        lines.append(f"{name}_sum{_labels(labels)} {round(series[-2], 6)}")
+        lines.append(f"{name}_count{_labels(labels)} {series[-1]}")
+    lines.extend(extra)
+    return "\n".join(lines) + "\n"
+
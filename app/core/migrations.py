@@ -0,0 +1,680 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+Migration = Callable[[sqlite3.Connection], None]
+
+MIGRATIONS: dict[int, tuple[str, Migration]] = {}
+
+
+def migration(version: int, name: str) -> Callable[[Migration], Migration]:
+    def register(fn: Migration) -> Migration:
+        if version in MIGRATIONS:
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS[version] = (name, fn)
+        return fn
+
+    return register
+
+
+def latest_version() -> int:
+    return max(MIGRATIONS, default=0)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()["user_version"]
+
+
+def run_script(conn: sqlite3.Connection, script: str) -> None:
+    # executescript() would COMMIT the surrounding migration transaction, so statements run one by one.
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
+
+
+def add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, col_type: str) -> None:
+    cols = [row["name"] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+    if column not in cols:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
+
+
+def backfill(conn: sqlite3.Connection, table: str, assignments: str, where: str = "1", chunk_size: int = 5000) -> int:
+    bounds = conn.execute(f"SELECT MIN(rowid) AS lo, MAX(rowid) AS hi FROM {table}").fetchone()
+    if bounds["lo"] is None:
+        return 0
+    updated = 0
+    start = bounds["lo"] - 1
+    while start < bounds["hi"]:
+        end = start + chunk_size
+        cur = conn.execute(f"UPDATE {table} SET {assignments} WHERE rowid > ? AND rowid <= ? AND ({where})", (start, end))
+        updated += cur.rowcount
+        start = end
+        logger.info("backfill %s: %s rows updated through rowid %s", table, updated, min(end, bounds["hi"]))
+    return updated
+
+
+def apply_migrations(conn: sqlite3.Connection) -> list[int]:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read under the write lock: another process may have migrated while we waited.
+        current = schema_version(conn)
+        applied = []
+        for version in sorted(v for v in MIGRATIONS if v > current):
+            name, fn = MIGRATIONS[version]
+            logger.info("applying migration %s: %s", version, name)
+            fn(conn)
+            applied.append(version)
+        if applied:
+            conn.execute(f"PRAGMA user_version={applied[-1]}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return applied
+
+
+@migration(1, "baseline schema")
+def _baseline(conn: sqlite3.Connection) -> None:
+    run_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS clients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT,
+            phone TEXT,
+            notes TEXT,
+            portal_token TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER,
+            name TEXT NOT NULL,
+            description TEXT,
+            status TEXT DEFAULT 'active',
+            start_date TEXT,
+            end_date TEXT,
+            budget REAL DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(client_id) REFERENCES clients(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER,
+            project_id INTEGER,
+            title TEXT NOT NULL,
+            description TEXT,
+            status TEXT DEFAULT 'open',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(client_id) REFERENCES clients(id),
+            FOREIGN KEY(project_id) REFERENCES projects(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS invoices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER,
+            project_id INTEGER,
+            job_id INTEGER,
+            invoice_number TEXT UNIQUE,
+            issue_date TEXT,
+            due_date TEXT,
+            status TEXT DEFAULT 'draft',
+            discount REAL DEFAULT 0,
+            custom_fields TEXT DEFAULT '{}',
+            subtotal REAL DEFAULT 0,
+            tax REAL DEFAULT 0,
+            total REAL DEFAULT 0,
+            notes TEXT,
+            reminder_days INTEGER DEFAULT 3,
+            recurring_rule TEXT DEFAULT 'none',
+            next_run_date TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(client_id) REFERENCES clients(id),
+            FOREIGN KEY(project_id) REFERENCES projects(id),
+            FOREIGN KEY(job_id) REFERENCES jobs(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS invoice_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_id INTEGER,
+            description TEXT,
+            quantity REAL,
+            rate REAL,
+            amount REAL,
+            taxable INTEGER DEFAULT 1,
+            FOREIGN KEY(invoice_id) REFERENCES invoices(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_id INTEGER,
+            amount REAL,
+            method TEXT,
+            paid_on TEXT,
+            notes TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(invoice_id) REFERENCES invoices(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER,
+            category TEXT,
+            vendor TEXT,
+            amount REAL,
+            expense_date TEXT,
+            receipt_path TEXT,
+            notes TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(project_id) REFERENCES projects(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS contracts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER,
+            project_id INTEGER,
+            title TEXT,
+            body TEXT,
+            signed INTEGER DEFAULT 0,
+            file_path TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(client_id) REFERENCES clients(id),
+            FOREIGN KEY(project_id) REFERENCES projects(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS memories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER,
+            memory TEXT,
+            source TEXT DEFAULT 'memoria',
+            priority INTEGER DEFAULT 1,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(client_id) REFERENCES clients(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_id INTEGER,
+            reminder_date TEXT,
+            channel TEXT DEFAULT 'email',
+            sent INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(invoice_id) REFERENCES invoices(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS agent_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER,
+            task_type TEXT,
+            payload TEXT,
+            status TEXT DEFAULT 'queued',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(client_id) REFERENCES clients(id)
+        );
+        """,
+    )
+
+    add_column_if_missing(conn, "clients", "portal_token", "TEXT")
+    add_column_if_missing(conn, "jobs", "project_id", "INTEGER")
+    add_column_if_missing(conn, "invoices", "project_id", "INTEGER")
+    add_column_if_missing(conn, "invoices", "discount", "REAL DEFAULT 0")
+    add_column_if_missing(conn, "invoices", "custom_fields", "TEXT DEFAULT '{}' ")
+    add_column_if_missing(conn, "invoices", "reminder_days", "INTEGER DEFAULT 3")
+    add_column_if_missing(conn, "invoices", "recurring_rule", "TEXT DEFAULT 'none'")
+    add_column_if_missing(conn, "invoices", "next_run_date", "TEXT")
+    add_column_if_missing(conn, "invoice_items", "taxable", "INTEGER DEFAULT 1")
+    add_column_if_missing(conn, "expenses", "project_id", "INTEGER")
+    add_column_if_missing(conn, "contracts", "project_id", "INTEGER")
+    add_column_if_missing(conn, "memories", "priority", "INTEGER DEFAULT 1")
+
+
+@migration(2, "hot path indexes")
+def _hot_path_indexes(conn: sqlite3.Connection) -> None:
+    run_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_clients_portal_token ON clients(portal_token);
+        CREATE INDEX IF NOT EXISTS idx_projects_status ON projects(status);
+        CREATE INDEX IF NOT EXISTS idx_invoices_status_due ON invoices(status, due_date);
+        CREATE INDEX IF NOT EXISTS idx_invoices_client_due ON invoices(client_id, due_date);
+        CREATE INDEX IF NOT EXISTS idx_invoice_items_invoice ON invoice_items(invoice_id);
+        CREATE INDEX IF NOT EXISTS idx_payments_invoice ON payments(invoice_id, amount);
+        CREATE INDEX IF NOT EXISTS idx_reminders_sent_date ON reminders(sent, reminder_date);
+        """,
+    )
+
+
+@migration(3, "reserved (no-op)")
+def _reserved_3(conn: sqlite3.Connection) -> None:
+    # Kept so databases already at version 3+ stay in sequence. The old invoice INSERT never wrote a row (15
+    # placeholders for 16 values), so there is no swapped due_date/status data to repair.
+    pass
+
+
+@migration(4, "recurring schedule index")
+def _recurring_schedule_index(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoices_next_run ON invoices(next_run_date)")
+
+
+DASHBOARD_TOTALS_SQL = """
+SELECT
+    (SELECT COALESCE(SUM(amount),0) FROM payments) AS earnings,
+    (SELECT COALESCE(SUM(amount),0) FROM expenses) AS expenses,
+    (SELECT COALESCE(SUM(balance_due),0) FROM invoices WHERE status IN ('sent','partial')) AS outstanding,
+    (SELECT COUNT(*) FROM projects WHERE status='active') AS active_projects
+"""
+
+OPEN_DUE_COUNTS_SQL = """
+SELECT COALESCE(due_date,'') AS due_date, COUNT(*) AS count
+FROM invoices WHERE status IN ('sent','partial') GROUP BY 1
+"""
+
+
+def refresh_dashboard_totals(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM dashboard_totals")
+    conn.execute(f"INSERT INTO dashboard_totals (id,earnings,expenses,outstanding,active_projects) SELECT 1, * FROM ({DASHBOARD_TOTALS_SQL})")
+    conn.execute("DELETE FROM open_invoice_due_counts")
+    conn.execute(f"INSERT INTO open_invoice_due_counts (due_date,count) {OPEN_DUE_COUNTS_SQL}")
+
+
+@migration(5, "incremental dashboard totals")
+def _dashboard_totals(conn: sqlite3.Connection) -> None:
+    run_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS dashboard_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            earnings REAL NOT NULL DEFAULT 0,
+            expenses REAL NOT NULL DEFAULT 0,
+            outstanding REAL NOT NULL DEFAULT 0,
+            active_projects INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS open_invoice_due_counts (
+            due_date TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_dash_payments_ins AFTER INSERT ON payments BEGIN
+            UPDATE dashboard_totals SET earnings = earnings + COALESCE(NEW.amount,0) WHERE id=1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_dash_payments_del AFTER DELETE ON payments BEGIN
+            UPDATE dashboard_totals SET earnings = earnings - COALESCE(OLD.amount,0) WHERE id=1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_dash_payments_upd AFTER UPDATE OF amount ON payments BEGIN
+            UPDATE dashboard_totals SET earnings = earnings - COALESCE(OLD.amount,0) + COALESCE(NEW.amount,0) WHERE id=1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_dash_expenses_ins AFTER INSERT ON expenses BEGIN
+            UPDATE dashboard_totals SET expenses = expenses + COALESCE(NEW.amount,0) WHERE id=1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_dash_expenses_del AFTER DELETE ON expenses BEGIN
+            UPDATE dashboard_totals SET expenses = expenses - COALESCE(OLD.amount,0) WHERE id=1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_dash_expenses_upd AFTER UPDATE OF amount ON expenses BEGIN
+            UPDATE dashboard_totals SET expenses = expenses - COALESCE(OLD.amount,0) + COALESCE(NEW.amount,0) WHERE id=1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_dash_projects_ins AFTER INSERT ON projects BEGIN
+            UPDATE dashboard_totals SET active_projects = active_projects + (COALESCE(NEW.status,'')='active') WHERE id=1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_dash_projects_del AFTER DELETE ON projects BEGIN
+            UPDATE dashboard_totals SET active_projects = active_projects - (COALESCE(OLD.status,'')='active') WHERE id=1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_dash_projects_upd AFTER UPDATE OF status ON projects BEGIN
+            UPDATE dashboard_totals
+            SET active_projects = active_projects - (COALESCE(OLD.status,'')='active') + (COALESCE(NEW.status,'')='active')
+            WHERE id=1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_dash_invoices_ins AFTER INSERT ON invoices WHEN NEW.status IN ('sent','partial') BEGIN
+            UPDATE dashboard_totals SET outstanding = outstanding + COALESCE(NEW.total,0) WHERE id=1;
+            INSERT INTO open_invoice_due_counts (due_date,count) VALUES (COALESCE(NEW.due_date,''),1)
+                ON CONFLICT(due_date) DO UPDATE SET count = count + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_dash_invoices_del AFTER DELETE ON invoices WHEN OLD.status IN ('sent','partial') BEGIN
+            UPDATE dashboard_totals SET outstanding = outstanding - COALESCE(OLD.total,0) WHERE id=1;
+            UPDATE open_invoice_due_counts SET count = count - 1 WHERE due_date=COALESCE(OLD.due_date,'');
+            DELETE FROM open_invoice_due_counts WHERE due_date=COALESCE(OLD.due_date,'') AND count <= 0;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_dash_invoices_upd_old AFTER UPDATE OF status, due_date, total ON invoices
+        WHEN OLD.status IN ('sent','partial') BEGIN
+            UPDATE dashboard_totals SET outstanding = outstanding - COALESCE(OLD.total,0) WHERE id=1;
+            UPDATE open_invoice_due_counts SET count = count - 1 WHERE due_date=COALESCE(OLD.due_date,'');
+            DELETE FROM open_invoice_due_counts WHERE due_date=COALESCE(OLD.due_date,'') AND count <= 0;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_dash_invoices_upd_new AFTER UPDATE OF status, due_date, total ON invoices
+        WHEN NEW.status IN ('sent','partial') BEGIN
+            UPDATE dashboard_totals SET outstanding = outstanding + COALESCE(NEW.total,0) WHERE id=1;
+            INSERT INTO open_invoice_due_counts (due_date,count) VALUES (COALESCE(NEW.due_date,''),1)
+                ON CONFLICT(due_date) DO UPDATE SET count = count + 1;
+        END;
+        """,
+    )
+    conn.execute(
+        """
+        INSERT INTO dashboard_totals (id,earnings,expenses,outstanding,active_projects) SELECT 1,
+            (SELECT COALESCE(SUM(amount),0) FROM payments),
+            (SELECT COALESCE(SUM(amount),0) FROM expenses),
+            (SELECT COALESCE(SUM(total),0) FROM invoices WHERE status IN ('sent','partial')),
+            (SELECT COUNT(*) FROM projects WHERE status='active')
+        """
+    )
+    conn.execute(f"INSERT INTO open_invoice_due_counts (due_date,count) {OPEN_DUE_COUNTS_SQL}")
+
+
+@migration(6, "report date range indexes")
+def _report_date_indexes(conn: sqlite3.Connection) -> None:
+    run_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_payments_paid_on ON payments(paid_on, amount);
+        CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(expense_date, category, amount);
+        """,
+    )
+
+
+@migration(7, "keyset pagination indexes")
+def _keyset_indexes(conn: sqlite3.Connection) -> None:
+    run_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_projects_client ON projects(client_id);
+        CREATE INDEX IF NOT EXISTS idx_invoices_status ON invoices(status);
+        CREATE INDEX IF NOT EXISTS idx_invoices_client ON invoices(client_id);
+        CREATE INDEX IF NOT EXISTS idx_invoices_project ON invoices(project_id);
+        CREATE INDEX IF NOT EXISTS idx_expenses_date_id ON expenses(expense_date);
+        CREATE INDEX IF NOT EXISTS idx_expenses_category_date ON expenses(category, expense_date);
+        CREATE INDEX IF NOT EXISTS idx_expenses_project_date ON expenses(project_id, expense_date);
+        """,
+    )
+
+
+@migration(8, "denormalized invoice paid_total and balance_due")
+def _invoice_balances(conn: sqlite3.Connection) -> None:
+    add_column_if_missing(conn, "invoices", "paid_total", "REAL NOT NULL DEFAULT 0")
+    add_column_if_missing(conn, "invoices", "balance_due", "REAL NOT NULL DEFAULT 0")
+    backfill(conn, "invoices", "paid_total = (SELECT COALESCE(SUM(amount),0) FROM payments WHERE invoice_id=invoices.id)")
+    backfill(conn, "invoices", "balance_due = COALESCE(total,0) - paid_total")
+    run_script(
+        conn,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_balance_payments_ins AFTER INSERT ON payments BEGIN
+            UPDATE invoices
+            SET paid_total = paid_total + COALESCE(NEW.amount,0), balance_due = balance_due - COALESCE(NEW.amount,0)
+            WHERE id=NEW.invoice_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_balance_payments_del AFTER DELETE ON payments BEGIN
+            UPDATE invoices
+            SET paid_total = paid_total - COALESCE(OLD.amount,0), balance_due = balance_due + COALESCE(OLD.amount,0)
+            WHERE id=OLD.invoice_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_balance_payments_upd AFTER UPDATE OF amount, invoice_id ON payments BEGIN
+            UPDATE invoices
+            SET paid_total = paid_total - COALESCE(OLD.amount,0), balance_due = balance_due + COALESCE(OLD.amount,0)
+            WHERE id=OLD.invoice_id;
+            UPDATE invoices
+            SET paid_total = paid_total + COALESCE(NEW.amount,0), balance_due = balance_due - COALESCE(NEW.amount,0)
+            WHERE id=NEW.invoice_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_balance_invoices_ins AFTER INSERT ON invoices
+        WHEN NEW.balance_due != COALESCE(NEW.total,0) - NEW.paid_total BEGIN
+            UPDATE invoices SET balance_due = COALESCE(NEW.total,0) - NEW.paid_total WHERE id=NEW.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_balance_invoices_total AFTER UPDATE OF total ON invoices BEGIN
+            UPDATE invoices SET balance_due = COALESCE(NEW.total,0) - NEW.paid_total WHERE id=NEW.id;
+        END;
+
+        DROP TRIGGER IF EXISTS trg_dash_invoices_ins;
+        DROP TRIGGER IF EXISTS trg_dash_invoices_del;
+        DROP TRIGGER IF EXISTS trg_dash_invoices_upd_old;
+        DROP TRIGGER IF EXISTS trg_dash_invoices_upd_new;
+
+        CREATE TRIGGER trg_dash_invoices_ins AFTER INSERT ON invoices WHEN NEW.status IN ('sent','partial') BEGIN
+            UPDATE dashboard_totals SET outstanding = outstanding + NEW.balance_due WHERE id=1;
+            INSERT INTO open_invoice_due_counts (due_date,count) VALUES (COALESCE(NEW.due_date,''),1)
+                ON CONFLICT(due_date) DO UPDATE SET count = count + 1;
+        END;
+        CREATE TRIGGER trg_dash_invoices_del AFTER DELETE ON invoices WHEN OLD.status IN ('sent','partial') BEGIN
+            UPDATE dashboard_totals SET outstanding = outstanding - OLD.balance_due WHERE id=1;
+            UPDATE open_invoice_due_counts SET count = count - 1 WHERE due_date=COALESCE(OLD.due_date,'');
+            DELETE FROM open_invoice_due_counts WHERE due_date=COALESCE(OLD.due_date,'') AND count <= 0;
+        END;
+        CREATE TRIGGER trg_dash_invoices_upd_old AFTER UPDATE OF status, due_date, balance_due ON invoices
+        WHEN OLD.status IN ('sent','partial') BEGIN
+            UPDATE dashboard_totals SET outstanding = outstanding - OLD.balance_due WHERE id=1;
+            UPDATE open_invoice_due_counts SET count = count - 1 WHERE due_date=COALESCE(OLD.due_date,'');
+            DELETE FROM open_invoice_due_counts WHERE due_date=COALESCE(OLD.due_date,'') AND count <= 0;
+        END;
+        CREATE TRIGGER trg_dash_invoices_upd_new AFTER UPDATE OF status, due_date, balance_due ON invoices
+        WHEN NEW.status IN ('sent','partial') BEGIN
+            UPDATE dashboard_totals SET outstanding = outstanding + NEW.balance_due WHERE id=1;
+            INSERT INTO open_invoice_due_counts (due_date,count) VALUES (COALESCE(NEW.due_date,''),1)
+                ON CONFLICT(due_date) DO UPDATE SET count = count + 1;
+        END;
+        """,
+    )
+    refresh_dashboard_totals(conn)
+
+
+@migration(9, "invoice issue date index for exports")
+def _invoice_issue_date_index(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoices_issue_date ON invoices(issue_date)")
+
+
+@migration(10, "agent task leases and retries")
+def _agent_task_leases(conn: sqlite3.Connection) -> None:
+    add_column_if_missing(conn, "agent_tasks", "attempts", "INTEGER NOT NULL DEFAULT 0")
+    add_column_if_missing(conn, "agent_tasks", "available_at", "TEXT NOT NULL DEFAULT ''")
+    add_column_if_missing(conn, "agent_tasks", "lease_owner", "TEXT")
+    add_column_if_missing(conn, "agent_tasks", "lease_expires_at", "TEXT")
+    add_column_if_missing(conn, "agent_tasks", "last_error", "TEXT")
+    add_column_if_missing(conn, "agent_tasks", "result", "TEXT")
+    add_column_if_missing(conn, "agent_tasks", "finished_at", "TEXT")
+    run_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_agent_tasks_available ON agent_tasks(status, available_at);
+        CREATE INDEX IF NOT EXISTS idx_agent_tasks_lease ON agent_tasks(status, lease_expires_at);
+        """,
+    )
+
+
+@migration(11, "reminder delivery tracking")
+def _reminder_delivery(conn: sqlite3.Connection) -> None:
+    add_column_if_missing(conn, "reminders", "attempts", "INTEGER NOT NULL DEFAULT 0")
+    add_column_if_missing(conn, "reminders", "claimed_at", "TEXT")
+    add_column_if_missing(conn, "reminders", "sent_at", "TEXT")
+    add_column_if_missing(conn, "reminders", "last_error", "TEXT")
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    return bool(conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5') AS fts5").fetchone()["fts5"])
+
+
+@migration(12, "memories full-text index")
+def _memories_fts(conn: sqlite3.Connection) -> None:
+    run_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_memories_priority ON memories(priority, created_at);
+        CREATE INDEX IF NOT EXISTS idx_memories_client_priority ON memories(client_id, priority, created_at);
+        """,
+    )
+    if not fts5_available(conn):
+        logger.warning("SQLite was built without FTS5; memory search falls back to LIKE matching")
+        return
+    run_script(
+        conn,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+            memory, content='memories', content_rowid='id', tokenize='porter unicode61'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_memories_fts_insert AFTER INSERT ON memories BEGIN
+            INSERT INTO memories_fts(rowid, memory) VALUES (NEW.id, NEW.memory);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_memories_fts_delete AFTER DELETE ON memories BEGIN
+            INSERT INTO memories_fts(memories_fts, rowid, memory) VALUES ('delete', OLD.id, OLD.memory);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_memories_fts_update AFTER UPDATE OF memory ON memories BEGIN
+            INSERT INTO memories_fts(memories_fts, rowid, memory) VALUES ('delete', OLD.id, OLD.memory);
+            INSERT INTO memories_fts(rowid, memory) VALUES (NEW.id, NEW.memory);
+        END;
+
+        INSERT INTO memories_fts(memories_fts) VALUES ('rebuild');
+        """,
+    )
+
+
+@migration(13, "global search index")
+def _search_index(conn: sqlite3.Connection) -> None:
+    if not fts5_available(conn):
+        logger.warning("SQLite was built without FTS5; global search falls back to LIKE prefix matching")
+        return
+    # rowid = id * 4 + kind code (1 client, 2 project, 3 invoice), so each source row maps to exactly one entry.
+    run_script(
+        conn,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            kind UNINDEXED, title, body, prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_search_clients_insert AFTER INSERT ON clients BEGIN
+            INSERT INTO search_index(rowid, kind, title, body) VALUES (NEW.id * 4 + 1, 'client', NEW.name, COALESCE(NEW.email, '') || ' ' || COALESCE(NEW.notes, ''));
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_search_clients_update AFTER UPDATE OF name, email, notes ON clients BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 1;
+            INSERT INTO search_index(rowid, kind, title, body) VALUES (NEW.id * 4 + 1, 'client', NEW.name, COALESCE(NEW.email, '') || ' ' || COALESCE(NEW.notes, ''));
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_search_clients_delete AFTER DELETE ON clients BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_search_projects_insert AFTER INSERT ON projects BEGIN
+            INSERT INTO search_index(rowid, kind, title, body) VALUES (NEW.id * 4 + 2, 'project', NEW.name, NEW.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_search_projects_update AFTER UPDATE OF name, description ON projects BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 2;
+            INSERT INTO search_index(rowid, kind, title, body) VALUES (NEW.id * 4 + 2, 'project', NEW.name, NEW.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_search_projects_delete AFTER DELETE ON projects BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 2;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_search_invoices_insert AFTER INSERT ON invoices BEGIN
+            INSERT INTO search_index(rowid, kind, title, body) VALUES (NEW.id * 4 + 3, 'invoice', NEW.invoice_number, NEW.notes);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_search_invoices_update AFTER UPDATE OF invoice_number, notes ON invoices BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 3;
+            INSERT INTO search_index(rowid, kind, title, body) VALUES (NEW.id * 4 + 3, 'invoice', NEW.invoice_number, NEW.notes);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_search_invoices_delete AFTER DELETE ON invoices BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 4 + 3;
+        END;
+
+        INSERT INTO search_index(rowid, kind, title, body) SELECT id * 4 + 1, 'client', name, COALESCE(email, '') || ' ' || COALESCE(notes, '') FROM clients;
+        INSERT INTO search_index(rowid, kind, title, body) SELECT id * 4 + 2, 'project', name, description FROM projects;
+        INSERT INTO search_index(rowid, kind, title, body) SELECT id * 4 + 3, 'invoice', invoice_number, notes FROM invoices;
+        """,
+    )
+
+
+@migration(14, "per-table data versions")
+def _table_versions(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID")
+    for table in ("clients", "projects", "invoices", "invoice_items", "payments", "expenses", "memories", "agent_tasks", "reminders"):
+        conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_version_{table}_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                END
+                """
+            )
+
+
+@migration(15, "content-addressed file store")
+def _file_store(conn: sqlite3.Connection) -> None:
+    # One row per distinct blob; file_links records every upload of it and what it belongs to.
+    run_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS files (
+            sha256 TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            content_type TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS file_links (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sha256 TEXT NOT NULL REFERENCES files(sha256),
+            filename TEXT NOT NULL,
+            entity TEXT NOT NULL CHECK (entity IN ('expense', 'contract', 'client', 'document')),
+            entity_id INTEGER,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_file_links_entity ON file_links(entity, entity_id);
+        CREATE INDEX IF NOT EXISTS idx_file_links_sha256 ON file_links(sha256);
+        """,
+    )
+
+
+@migration(16, "audit events")
+def _audit_events(conn: sqlite3.Connection) -> None:
+    run_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS audit_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            action TEXT NOT NULL,
+            entity TEXT,
+            entity_id INTEGER,
+            detail TEXT
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_audit_events_entity ON audit_events(entity, entity_id);
+        """,
+    )
+
+
+@migration(17, "recurring anchor day")
+def _recurring_anchor_day(conn: sqlite3.Connection) -> None:
+    # Monthly schedules keep the day they started on; without it a run clamped to the 28th stays on the 28th.
+    add_column_if_missing(conn, "invoices", "recurring_day", "INTEGER")
+    backfill(
+        conn,
+        "invoices",
+        "recurring_day=CAST(strftime('%d', next_run_date) AS INTEGER)",
+        "recurring_rule IN ('monthly','quarterly') AND next_run_date IS NOT NULL AND recurring_day IS NULL",
+    )
+
+
+@migration(18, "agent task list indexes")
+def _agent_task_list_indexes(conn: sqlite3.Connection) -> None:
+    # Rowid order within each key, so filtered keyset pages of the queue walk an index instead of sorting.
+    run_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_agent_tasks_status ON agent_tasks(status);
+        CREATE INDEX IF NOT EXISTS idx_agent_tasks_client ON agent_tasks(client_id);
+        """,
+    )
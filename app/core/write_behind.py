@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any
+
+from app.core.config import WRITE_BEHIND_BATCH_SIZE, WRITE_BEHIND_DELAY_MS, WRITE_BEHIND_ENABLED, WRITE_BEHIND_QUEUE_DEPTH
+from app.core.database import get_conn, in_transaction, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    # Low-priority single-statement writes (log-like inserts) are queued and committed in groups: one transaction (one
+    # write-lock hold and WAL append) per batch of up to `batch_size` items, collected for at most `delay_ms` after the first one arrives.
+    # Anything still queued when the process dies without shutting down is lost, so nothing the caller must keep goes here.
+    def __init__(
+        self,
+        enabled: bool = WRITE_BEHIND_ENABLED,
+        delay_ms: float = WRITE_BEHIND_DELAY_MS,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        queue_depth: int = WRITE_BEHIND_QUEUE_DEPTH,
+    ) -> None:
+        self.enabled = enabled
+        self.delay = delay_ms / 1000
+        self.batch_size = batch_size
+        self.queue_depth = queue_depth
+        self._queue: queue.Queue = queue.Queue(queue_depth)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid = os.getpid()
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.flush_ms_total = 0.0
+        self.flush_ms_max = 0.0
+        self.last_batch_size = 0
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                # A forked child must not inherit the parent's backlog or think its thread is running.
+                self._queue = queue.Queue(self.queue_depth)
+                self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="bizhaven-write-behind", daemon=True)
+            self._thread.start()
+
+    def submit(self, query: str, params: tuple = (), urgent: bool = False) -> Future[int]:
+        # The future resolves to the row's lastrowid once its batch commits; fire-and-forget callers can ignore it.
+        # Callers that wait on it pass urgent=True: the batch then commits with whatever is already queued instead of
+        # holding out for the rest of the delay window. A full queue blocks the caller until the writer catches up.
+        future: Future[int] = Future()
+        if not self.enabled or in_transaction():
+            # Inside a transaction the write joins it, so it commits or rolls back with the caller's work.
+            with get_conn() as conn:
+                future.set_result(conn.execute(query, params).lastrowid)
+            return future
+        self._ensure_worker()
+        self._queue.put((query, params, future, urgent))
+        with self._lock:
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+        return future
+
+    def _collect(self, first: Any) -> tuple[list[tuple[str, tuple, Future, bool]], list[Future | None]]:
+        batch, waiters = [], []
+        item = first
+        deadline = time.monotonic() + self.delay
+        while True:
+            if isinstance(item, tuple):
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                if item[3]:
+                    deadline = 0.0
+            else:
+                # Flush waiters and the stop sentinel close the batch: everything queued before them is in it.
+                waiters.append(item)
+                break
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+        return batch, waiters
+
+    def _write(self, batch: list[tuple[str, tuple, Future, bool]]) -> None:
+        started = time.perf_counter()
+        results: list[int | Exception]
+        try:
+            with transaction() as conn:
+                results = [conn.execute(query, params).lastrowid for query, params, *_ in batch]
+        except Exception:
+            logger.exception("write-behind batch of %s failed; retrying items one by one", len(batch))
+            # One bad row must not take the rest of the batch with it.
+            results = []
+            for query, params, *_ in batch:
+                try:
+                    with transaction() as conn:
+                        results.append(conn.execute(query, params).lastrowid)
+                except Exception as exc:
+                    logger.warning("write-behind dropped %s: %s", query.split("(")[0].strip(), exc)
+                    results.append(exc)
+        elapsed = (time.perf_counter() - started) * 1000
+        failed = 0
+        for (_, _, future, _), result in zip(batch, results):
+            if isinstance(result, Exception):
+                failed += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        with self._lock:
+            self.batches += 1
+            self.written += len(batch) - failed
+            self.failed += failed
+            self.flush_ms_total += elapsed
+            self.flush_ms_max = max(self.flush_ms_max, elapsed)
+            self.last_batch_size = len(batch)
+
+    def _run(self) -> None:
+        while True:
+            batch, waiters = self._collect(self._queue.get())
+            if batch:
+                self._write(batch)
+            for waiter in waiters:
+                if waiter is None:
+                    return
+                waiter.set_result(None)
+
+    def flush(self, timeout: float | None = None) -> None:
+        # Waits until everything submitted before this call has committed.
+        if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+            return
+        done: Future[None] = Future()
+        self._queue.put(done)
+        done.result(timeout)
+
+    def close(self, timeout: float | None = 30.0) -> None:
+        # Drains the queue and stops the worker; a later submit starts a new one.
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        with self._lock:
+            self._thread = None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "last_batch_size": self.last_batch_size,
+                "avg_batch_size": round(self.written / self.batches, 2) if self.batches else 0.0,
+                "avg_flush_ms": round(self.flush_ms_total / self.batches, 3) if self.batches else 0.0,
+                "max_flush_ms": round(self.flush_ms_max, 3),
+            }
+
+
+write_behind = WriteBehindQueue()
+# Streamlit and CLI processes have no shutdown hook; still commit whatever is queued on a normal exit.
+atexit.register(write_behind.close)
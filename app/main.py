@@ -1,15 +1,66 @@
+import argparse
+import socket
 import threading
 
 import uvicorn
+from uvicorn.supervisors import Multiprocess
 
-from app.api.server import app as fastapi_app
+from app.core.config import API_GRACEFUL_SHUTDOWN_SECONDS, API_HOST, API_LOG_LEVEL, API_PORT, API_WORKERS
 
 
-def run_api() -> None:
-    uvicorn.run(fastapi_app, host="127.0.0.1", port=8090, log_level="warning")
+def run_api(host: str = API_HOST, port: int = API_PORT) -> None:
+    from app.api.server import app as fastapi_app
+
+    uvicorn.run(fastapi_app, host=host, port=port, log_level=API_LOG_LEVEL)
 
 
 def start_embedded_api() -> threading.Thread:
     thread = threading.Thread(target=run_api, daemon=True)
     thread.start()
     return thread
+
+
+class _SharedSocketConfig(uvicorn.Config):
+    def bind_socket(self) -> socket.socket:
+        sock = super().bind_socket()
+        # uvicorn opens the shared socket with protocol 0, so asyncio never sets TCP_NODELAY on the
+        # connections workers accept and every split response waits ~40 ms on a delayed ACK.
+        # Accepted sockets inherit the option from the listener.
+        if sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+
+def serve(host: str = API_HOST, port: int = API_PORT, workers: int = API_WORKERS, graceful_shutdown: float = API_GRACEFUL_SHUTDOWN_SECONDS) -> None:
+    # Worker processes import the app themselves, so uvicorn gets the import path rather than the object.
+    # On SIGTERM/SIGINT each worker stops accepting, drains in-flight requests for up to
+    # `graceful_shutdown` seconds, then runs the app's shutdown hook.
+    config = _SharedSocketConfig(
+        "app.api.server:app",
+        host=host,
+        port=port,
+        workers=workers,
+        timeout_graceful_shutdown=graceful_shutdown,
+        log_level=API_LOG_LEVEL,
+    )
+    try:
+        if config.workers > 1:
+            Multiprocess(config, sockets=[config.bind_socket()]).run()
+        else:
+            uvicorn.Server(config).run()
+    except KeyboardInterrupt:
+        pass
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Serve the BizHaven API as a standalone process.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="worker processes sharing the database")
+    parser.add_argument("--graceful-shutdown", type=float, default=API_GRACEFUL_SHUTDOWN_SECONDS, help="seconds to drain requests on shutdown")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.graceful_shutdown)
+
+
+if __name__ == "__main__":
+    run()
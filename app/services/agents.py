@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import uuid4
+
+from app.core.config import (
+    AGENT_BATCH_SIZE,
+    AGENT_EXECUTOR,
+    AGENT_LEASE_SECONDS,
+    AGENT_MAX_ATTEMPTS,
+    AGENT_POLL_SECONDS,
+    AGENT_RETRY_BACKOFF_MAX_SECONDS,
+    AGENT_RETRY_BACKOFF_SECONDS,
+    AGENT_WORKERS,
+)
+from app.core.database import get_conn, init_db
+from app.core.write_behind import write_behind
+from app.services.assistant import generate_follow_up_email
+from app.services.channels import Channel, default_channel
+from app.services.repository import audit, fetch_all, fetch_one
+
+logger = logging.getLogger(__name__)
+
+# One statement claims a batch: due queued tasks plus running tasks whose lease expired (their worker died).
+CLAIM_SQL = """
+UPDATE agent_tasks
+SET status='running', lease_owner=?, lease_expires_at=?, attempts=attempts+1
+WHERE id IN (
+    SELECT id FROM agent_tasks WHERE status='queued' AND available_at <= ?
+    UNION ALL
+    SELECT id FROM agent_tasks WHERE status='running' AND lease_expires_at < ?
+    LIMIT ?
+)
+RETURNING id, client_id, task_type, payload, attempts
+"""
+OPEN_INVOICES_SQL = """
+SELECT invoice_number, due_date, balance_due FROM invoices
+WHERE client_id=? AND status IN ('sent','partial')
+ORDER BY due_date
+"""
+
+
+class PermanentTaskError(Exception):
+    pass
+
+
+def enqueue_agent_task(client_id: int, task_type: str, payload: str, urgent: bool = False) -> Future[int]:
+    # Queued through the write-behind so a burst of enqueues shares one commit; the future carries the task id.
+    future = write_behind.submit(
+        "INSERT INTO agent_tasks (client_id,task_type,payload,status) VALUES (?,?,?,?)", (client_id, task_type, payload, "queued"), urgent=urgent
+    )
+    audit("agent_task.queued", "client", client_id, task_type=task_type)
+    return future
+
+
+def _timestamp(moment: datetime) -> str:
+    # Same shape as CURRENT_TIMESTAMP so string comparison orders correctly.
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _client(task: dict[str, Any]) -> dict[str, Any]:
+    client = fetch_one("SELECT id, name, email FROM clients WHERE id=?", (task["client_id"],))
+    if not client:
+        raise PermanentTaskError(f"Client {task['client_id']} not found")
+    if not client["email"]:
+        raise PermanentTaskError(f"Client {client['name']} has no email address")
+    return client
+
+
+def _follow_up(task: dict[str, Any], options: dict[str, Any]) -> tuple[str, str, str]:
+    client = _client(task)
+    invoices = fetch_all(OPEN_INVOICES_SQL, (client["id"],))
+    if invoices:
+        email = generate_follow_up_email(client["name"], invoices[0]["invoice_number"], invoices[0]["balance_due"])
+        subject, _, body = email.partition("\n\n")
+        return client["email"], subject.removeprefix("Subject: "), body
+    return client["email"], "Following up", f"Hi {client['name']},\nJust following up on our last conversation. Anything I can help with?\n\nThank you!"
+
+
+def _payment_reminder(task: dict[str, Any], options: dict[str, Any]) -> tuple[str, str, str]:
+    client = _client(task)
+    invoices = fetch_all(OPEN_INVOICES_SQL, (client["id"],))
+    if not invoices:
+        raise PermanentTaskError(f"No open invoices for {client['name']}")
+    lines = "\n".join(f"- {i['invoice_number']}: ${i['balance_due']:,.2f} due {i['due_date']}" for i in invoices)
+    total = sum(i["balance_due"] for i in invoices)
+    body = f"Hi {client['name']},\nA reminder that ${total:,.2f} is outstanding:\n{lines}\n\nThank you!"
+    return client["email"], f"Payment reminder: ${total:,.2f} outstanding", body
+
+
+def _check_in(task: dict[str, Any], options: dict[str, Any]) -> tuple[str, str, str]:
+    client = _client(task)
+    cadence = options.get("cadence", "regular")
+    body = f"Hi {client['name']},\nChecking in as part of our {cadence} catch-up. How is everything going on your side?\n\nBest,"
+    return client["email"], "Quick check-in", body
+
+
+def _proposal_nudge(task: dict[str, Any], options: dict[str, Any]) -> tuple[str, str, str]:
+    client = _client(task)
+    proposal = options.get("proposal", "the proposal I sent over")
+    body = f"Hi {client['name']},\nI wanted to see if you had a chance to review {proposal}. Happy to adjust scope or timing.\n\nBest,"
+    return client["email"], "Following up on my proposal", body
+
+
+HANDLERS: dict[str, Callable[[dict[str, Any], dict[str, Any]], tuple[str, str, str]]] = {
+    "follow_up": _follow_up,
+    "check_in": _check_in,
+    "payment_reminder": _payment_reminder,
+    "proposal_nudge": _proposal_nudge,
+}
+
+
+def execute_task(task: dict[str, Any], channel: Channel) -> dict[str, Any]:
+    # Module-level so it can run in a process pool; only reads the database, the pool records the outcome.
+    handler = HANDLERS.get(task["task_type"])
+    if handler is None:
+        raise PermanentTaskError(f"Unknown task type: {task['task_type']}")
+    try:
+        options = json.loads(task["payload"] or "{}")
+    except json.JSONDecodeError as exc:
+        raise PermanentTaskError(f"Invalid payload: {exc}") from exc
+    to, subject, body = handler(task, options if isinstance(options, dict) else {})
+    message_id = channel.send(to, subject, body, {"task_id": task["id"], "task_type": task["task_type"], **options})
+    return {"message_id": message_id, "to": to, "subject": subject}
+
+
+def claim_tasks(owner: str, limit: int = AGENT_BATCH_SIZE, lease_seconds: int = AGENT_LEASE_SECONDS, now: datetime | None = None) -> list[dict[str, Any]]:
+    now = now or datetime.now(timezone.utc)
+    stamp = _timestamp(now)
+    with get_conn() as conn:
+        return conn.execute(CLAIM_SQL, (owner, _timestamp(now + timedelta(seconds=lease_seconds)), stamp, stamp, limit)).fetchall()
+
+
+def complete_task(task_id: int, owner: str, result: dict[str, Any]) -> bool:
+    # Guarded by lease_owner: a worker whose lease expired and was reclaimed must not overwrite the new owner's outcome.
+    with get_conn() as conn:
+        cur = conn.execute(
+            "UPDATE agent_tasks SET status='done', result=?, last_error=NULL, lease_owner=NULL, lease_expires_at=NULL, "
+            "finished_at=? WHERE id=? AND lease_owner=?",
+            (json.dumps(result), _timestamp(datetime.now(timezone.utc)), task_id, owner),
+        )
+        return cur.rowcount == 1
+
+
+def fail_task(task_id: int, owner: str, attempts: int, error: str, retry: bool, now: datetime | None = None) -> str:
+    now = now or datetime.now(timezone.utc)
+    if retry and attempts < AGENT_MAX_ATTEMPTS:
+        delay = min(AGENT_RETRY_BACKOFF_MAX_SECONDS, AGENT_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1))
+        status, available_at, finished_at = "queued", _timestamp(now + timedelta(seconds=delay)), None
+    else:
+        status, available_at, finished_at = "failed", "", _timestamp(now)
+    with get_conn() as conn:
+        conn.execute(
+            "UPDATE agent_tasks SET status=?, available_at=?, last_error=?, lease_owner=NULL, lease_expires_at=NULL, "
+            "finished_at=? WHERE id=? AND lease_owner=?",
+            (status, available_at, error, finished_at, task_id, owner),
+        )
+    return status
+
+
+def agent_queue_stats() -> dict[str, Any]:
+    now = _timestamp(datetime.now(timezone.utc))
+    counts = {row["status"]: row["n"] for row in fetch_all("SELECT status, COUNT(*) AS n FROM agent_tasks GROUP BY status")}
+    due = fetch_one("SELECT COUNT(*) AS n FROM agent_tasks WHERE status='queued' AND available_at <= ?", (now,))
+    expired = fetch_one("SELECT COUNT(*) AS n FROM agent_tasks WHERE status='running' AND lease_expires_at < ?", (now,))
+    return {"by_status": counts, "due": due["n"], "expired_leases": expired["n"]}
+
+
+class AgentWorkerPool:
+    def __init__(
+        self,
+        workers: int = AGENT_WORKERS,
+        executor: str = AGENT_EXECUTOR,
+        channel: Channel | None = None,
+        batch_size: int = AGENT_BATCH_SIZE,
+        lease_seconds: int = AGENT_LEASE_SECONDS,
+        poll_interval: float = AGENT_POLL_SECONDS,
+    ) -> None:
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown agent executor: {executor}")
+        self.workers = workers
+        self.executor_kind = executor
+        self.channel = channel or default_channel()
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._executor: Executor | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.counters = {"claimed": 0, "succeeded": 0, "retried": 0, "failed": 0, "lost_lease": 0, "batches": 0}
+        self.busy_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="bizhaven-agent")
+        return self._executor
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[key] += n
+
+    def _finish(self, task: dict[str, Any], future) -> None:
+        try:
+            result = future.result()
+        except PermanentTaskError as exc:
+            outcome = fail_task(task["id"], self.owner, task["attempts"], str(exc), retry=False)
+        except Exception as exc:
+            logger.warning("agent task %s (%s) attempt %s failed: %s", task["id"], task["task_type"], task["attempts"], exc)
+            outcome = fail_task(task["id"], self.owner, task["attempts"], f"{type(exc).__name__}: {exc}", retry=True)
+        else:
+            self._count("succeeded" if complete_task(task["id"], self.owner, result) else "lost_lease")
+            return
+        self._count("retried" if outcome == "queued" else "failed")
+
+    def run_once(self) -> int:
+        started = time.perf_counter()
+        tasks = claim_tasks(self.owner, self.batch_size, self.lease_seconds)
+        if not tasks:
+            return 0
+        executor = self._get_executor()
+        futures = []
+        for task in tasks:
+            if task["attempts"] > AGENT_MAX_ATTEMPTS:
+                # Reclaimed after crashing its worker too often; park it rather than crash another one.
+                fail_task(task["id"], self.owner, task["attempts"], "lease expired on every attempt", retry=False)
+                self._count("failed")
+                continue
+            futures.append((task, executor.submit(execute_task, task, self.channel)))
+        for task, future in futures:
+            self._finish(task, future)
+        with self._lock:
+            self.counters["claimed"] += len(tasks)
+            self.counters["batches"] += 1
+            self.busy_seconds += time.perf_counter() - started
+        return len(tasks)
+
+    def drain(self, max_batches: int = 100) -> int:
+        processed = 0
+        for _ in range(max_batches):
+            if not (claimed := self.run_once()):
+                break
+            processed += claimed
+        return processed
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception("agent worker batch failed")
+                claimed = 0
+            if not claimed:
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="bizhaven-agent-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            finished = self.counters["succeeded"] + self.counters["failed"] + self.counters["retried"]
+            return {
+                "owner": self.owner,
+                "workers": self.workers,
+                "executor": self.executor_kind,
+                "running": bool(self._thread and self._thread.is_alive()),
+                **self.counters,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "tasks_per_second": round(finished / self.busy_seconds, 2) if self.busy_seconds else None,
+                "queue": agent_queue_stats(),
+            }
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Process queued Agentora tasks.")
+    parser.add_argument("--once", action="store_true", help="drain the queue once and exit")
+    parser.add_argument("--workers", type=int, default=AGENT_WORKERS)
+    parser.add_argument("--executor", choices=["thread", "process"], default=AGENT_EXECUTOR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    init_db()
+    pool = AgentWorkerPool(args.workers, args.executor)
+    if args.once:
+        pool.drain()
+        pool.stop()
+        logger.info("%s", pool.stats())
+        return
+    pool.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    run()
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from app.services.repository import fetch_all
+from app.services.memoria import search_memories
 
 
-def _memory_context() -> str:
-    tips = fetch_all("SELECT memory FROM memories ORDER BY priority DESC, created_at DESC LIMIT 5")
+def _memory_context(prompt: str, client_id: int | None = None) -> str:
+    tips = search_memories(prompt, client_id)
     return " ".join(t["memory"] for t in tips) if tips else "No stored memory context yet."
 
 
@@ -39,7 +39,7 @@ def generate_follow_up_email(client_name: str, invoice_number: str, amount_due:
     )
 
 
-def ask_bizhaven(prompt: str) -> str:
+def ask_bizhaven(prompt: str, client_id: int | None = None) -> str:
     prompt_l = prompt.lower()
     if "quote" in prompt_l:
         return "Use value-based tiers: Essential, Growth, Premium. Include deliverables and payment milestones."
@@ -50,4 +50,4 @@ def ask_bizhaven(prompt: str) -> str:
     if "follow up" in prompt_l or "email" in prompt_l:
         return "Keep reminders polite and concise, include invoice number, amount due, and clear next step."
 
-    return f"Ask BizHaven (local mode): {prompt}\nContext: {_memory_context()}"
+    return f"Ask BizHaven (local mode): {prompt}\nContext: {_memory_context(prompt, client_id)}"
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from app.core.config import (
+    APP_VERSION,
+    BACKUP_DIR,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_RETENTION,
+    BACKUP_STEP_SLEEP,
+    DATA_DIR,
+    DOCS_DIR,
+    FILES_DIR,
+    RECEIPTS_DIR,
+)
+from app.core.database import close_pool, connect
+
+SNAPSHOT_DB = "bizhaven.db"
+MANIFEST = "manifest.json"
+# Python builds without tarfile extraction filters fall back to the default behaviour.
+EXTRACT_OPTIONS = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_database(dest: Path, pages: int = BACKUP_PAGES_PER_STEP, sleep: float = BACKUP_STEP_SLEEP) -> dict[str, int]:
+    # Online backup: copies `pages` pages per step and releases the read lock between steps so writers keep going.
+    progress = {"steps": 0, "pages": 0}
+
+    def _progress(status: int, remaining: int, total: int) -> None:
+        progress["steps"] += 1
+        progress["pages"] = total
+
+    source = connect()
+    target = sqlite3.connect(dest)
+    try:
+        source.backup(target, pages=pages, progress=_progress, sleep=sleep)
+        target.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        target.close()
+        source.close()
+    return progress
+
+
+def _attachments() -> list[tuple[Path, str]]:
+    files = []
+    for root in (DOCS_DIR, RECEIPTS_DIR, FILES_DIR):
+        if root.exists():
+            # Half-written uploads under files/incoming are skipped; only committed blobs are backed up.
+            files.extend(
+                (path, path.relative_to(root.parent).as_posix())
+                for path in sorted(root.rglob("*"))
+                if path.is_file() and path.name != ".gitkeep" and not path.name.endswith(".part")
+            )
+    return files
+
+
+def list_backups(backup_dir: Path = BACKUP_DIR) -> list[Path]:
+    return sorted(backup_dir.glob("bizhaven-*.tar.gz"), reverse=True)
+
+
+def rotate_backups(backup_dir: Path = BACKUP_DIR, keep: int = BACKUP_RETENTION) -> list[Path]:
+    removed = []
+    for old in list_backups(backup_dir)[keep:]:
+        old.unlink()
+        old.with_name(old.name + ".sha256").unlink(missing_ok=True)
+        removed.append(old)
+    return removed
+
+
+def create_backup(
+    backup_dir: Path = BACKUP_DIR,
+    keep: int = BACKUP_RETENTION,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    sleep: float = BACKUP_STEP_SLEEP,
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    created_at = datetime.now(timezone.utc)
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    archive = backup_dir / f"bizhaven-{created_at.strftime('%Y%m%dT%H%M%S%fZ')}.tar.gz"
+
+    with tempfile.TemporaryDirectory(dir=backup_dir) as tmp:
+        snapshot = Path(tmp) / SNAPSHOT_DB
+        copy_stats = _copy_database(snapshot, pages, sleep)
+        attachments = _attachments()
+        manifest = {
+            "app_version": APP_VERSION,
+            "created_at": created_at.isoformat(),
+            "files": {SNAPSHOT_DB: {"sha256": _sha256(snapshot), "size": snapshot.stat().st_size}},
+        }
+        for path, arcname in attachments:
+            manifest["files"][arcname] = {"sha256": _sha256(path), "size": path.stat().st_size}
+
+        partial = archive.with_name(archive.name + ".partial")
+        with tarfile.open(partial, "w:gz") as tar:
+            payload = json.dumps(manifest, indent=2).encode("utf-8")
+            info = tarfile.TarInfo(MANIFEST)
+            info.size = len(payload)
+            info.mtime = int(created_at.timestamp())
+            tar.addfile(info, io.BytesIO(payload))
+            tar.add(snapshot, arcname=SNAPSHOT_DB)
+            for path, arcname in attachments:
+                tar.add(path, arcname=arcname)
+        partial.replace(archive)
+
+    checksum = _sha256(archive)
+    archive.with_name(archive.name + ".sha256").write_text(f"{checksum}  {archive.name}\n", encoding="utf-8")
+    removed = rotate_backups(backup_dir, keep)
+    duration = time.perf_counter() - started
+    source_bytes = sum(entry["size"] for entry in manifest["files"].values())
+    return {
+        "path": str(archive),
+        "sha256": checksum,
+        "size_bytes": archive.stat().st_size,
+        "source_bytes": source_bytes,
+        "files": len(manifest["files"]),
+        "db_pages": copy_stats["pages"],
+        "backup_steps": copy_stats["steps"],
+        "duration_s": round(duration, 3),
+        "throughput_mb_s": round(source_bytes / duration / 1e6, 2) if duration else None,
+        "rotated": [str(p) for p in removed],
+    }
+
+
+def verify_backup(archive: Path) -> dict[str, Any]:
+    problems = []
+    sidecar = archive.with_name(archive.name + ".sha256")
+    if sidecar.exists() and sidecar.read_text(encoding="utf-8").split()[0] != _sha256(archive):
+        problems.append("archive checksum mismatch")
+    with tarfile.open(archive, "r:gz") as tar, tempfile.TemporaryDirectory() as tmp:
+        manifest = json.load(tar.extractfile(MANIFEST))
+        for name, meta in manifest["files"].items():
+            try:
+                tar.extract(name, tmp, **EXTRACT_OPTIONS)
+            except KeyError:
+                problems.append(f"missing {name}")
+                continue
+            if _sha256(Path(tmp) / name) != meta["sha256"]:
+                problems.append(f"checksum mismatch for {name}")
+        if SNAPSHOT_DB in manifest["files"] and (Path(tmp) / SNAPSHOT_DB).exists():
+            check = sqlite3.connect(Path(tmp) / SNAPSHOT_DB)
+            try:
+                result = check.execute("PRAGMA integrity_check").fetchone()[0]
+            except (sqlite3.DatabaseError, UnicodeDecodeError) as exc:
+                # A damaged snapshot can stop the check outright, or report bytes that are not text.
+                result = f"{type(exc).__name__}: {exc}"
+            finally:
+                check.close()
+            if result != "ok":
+                problems.append(f"integrity_check: {result}")
+    return {"path": str(archive), "ok": not problems, "problems": problems, "created_at": manifest.get("created_at")}
+
+
+def find_backup(at: datetime | None = None, backup_dir: Path = BACKUP_DIR) -> Path | None:
+    # Point-in-time: the newest snapshot taken at or before `at` (or the newest overall).
+    for archive in list_backups(backup_dir):
+        stamp = datetime.strptime(archive.name[len("bizhaven-") : -len(".tar.gz")], "%Y%m%dT%H%M%S%fZ").replace(tzinfo=timezone.utc)
+        if at is None or stamp <= at:
+            return archive
+    return None
+
+
+def _max_table_version(conn: sqlite3.Connection) -> int | None:
+    try:
+        row = conn.execute("SELECT MAX(version) AS version FROM table_versions").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row["version"] or 0
+
+
+def restore_backup(archive: Path, restore_files: bool = True) -> dict[str, Any]:
+    verification = verify_backup(archive)
+    if not verification["ok"]:
+        raise ValueError(f"Refusing to restore {archive.name}: {', '.join(verification['problems'])}")
+    started = time.perf_counter()
+    with tarfile.open(archive, "r:gz") as tar, tempfile.TemporaryDirectory() as tmp:
+        manifest = json.load(tar.extractfile(MANIFEST))
+        tar.extractall(tmp, **EXTRACT_OPTIONS)
+        snapshot = sqlite3.connect(Path(tmp) / SNAPSHOT_DB)
+        live = connect()
+        try:
+            newest = _max_table_version(live)
+            # Backing up *into* the live database swaps its pages in place under SQLite's locks, WAL included.
+            snapshot.backup(live)
+            if newest is not None and _max_table_version(live) is not None:
+                # Lift restored versions past every pre-restore value so caches and ETags never match stale data.
+                with live:
+                    live.execute("UPDATE table_versions SET version = version + ?", (newest + 1,))
+        finally:
+            live.close()
+            snapshot.close()
+        close_pool()
+        restored_files = 0
+        if restore_files:
+            for name in manifest["files"]:
+                if name == SNAPSHOT_DB:
+                    continue
+                target = DATA_DIR / name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(Path(tmp) / name, target)
+                restored_files += 1
+    return {
+        "path": str(archive),
+        "created_at": manifest["created_at"],
+        "restored_files": restored_files,
+        "duration_s": round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+import smtplib
+import threading
+from datetime import datetime, timezone
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Any, Protocol
+from uuid import uuid4
+
+from app.core.config import DELIVERY_CHANNEL, OUTBOX_DIR, SMTP_HOST, SMTP_PORT, SMTP_SENDER
+
+_write_lock = threading.Lock()
+
+
+class DeliveryError(RuntimeError):
+    pass
+
+
+class Channel(Protocol):
+    def send(self, to: str, subject: str, body: str, meta: dict[str, Any] | None = None) -> str: ...
+
+
+class LocalOutbox:
+    # Local-first delivery: messages land in data/outbox/outbox.jsonl (or in memory with path=None) for review or hand-off.
+    def __init__(self, path: Path | None = OUTBOX_DIR / "outbox.jsonl") -> None:
+        self.path = path
+        self.sent: list[dict[str, Any]] = []
+
+    def send(self, to: str, subject: str, body: str, meta: dict[str, Any] | None = None) -> str:
+        if not to:
+            raise DeliveryError("No recipient address")
+        message = {
+            "id": uuid4().hex,
+            "to": to,
+            "subject": subject,
+            "body": body,
+            "meta": meta or {},
+            "queued_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        if self.path is None:
+            self.sent.append(message)
+            return message["id"]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with _write_lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(message) + "\n")
+        return message["id"]
+
+
+class SmtpChannel:
+    # Plain SMTP relay (a local MTA or a test stand-in); one connection per send keeps it picklable and thread-safe.
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, sender: str = SMTP_SENDER, timeout: float = 10.0) -> None:
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+
+    def send(self, to: str, subject: str, body: str, meta: dict[str, Any] | None = None) -> str:
+        if not to:
+            raise DeliveryError("No recipient address")
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = to
+        message["Subject"] = subject
+        message["Message-ID"] = f"<{uuid4().hex}@bizhaven>"
+        message.set_content(body)
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+        return message["Message-ID"]
+
+
+def default_channel() -> Channel:
+    if DELIVERY_CHANNEL == "smtp":
+        return SmtpChannel()
+    if DELIVERY_CHANNEL == "outbox":
+        return LocalOutbox()
+    raise ValueError(f"Unknown delivery channel: {DELIVERY_CHANNEL}")
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+from datetime import date
+from pathlib import Path
+
+from app.core.config import EXPORT_CHUNK_SIZE
+from app.core.database import stream_query
+from app.services.repository import TAX_SUMMARY_SQL, date_bounds
+
+# dataset -> (full export query, date-range query); the range queries walk the date indexes.
+EXPORTS: dict[str, tuple[str, str]] = {
+    "invoices": (
+        "SELECT * FROM invoices ORDER BY id",
+        "SELECT * FROM invoices WHERE issue_date >= ? AND issue_date < ? ORDER BY issue_date, id",
+    ),
+    "payments": (
+        "SELECT * FROM payments ORDER BY id",
+        "SELECT * FROM payments WHERE paid_on >= ? AND paid_on < ? ORDER BY paid_on",
+    ),
+    "expenses": (
+        "SELECT * FROM expenses ORDER BY id",
+        "SELECT * FROM expenses WHERE expense_date >= ? AND expense_date < ? ORDER BY expense_date, id",
+    ),
+    "tax_summary": (TAX_SUMMARY_SQL, TAX_SUMMARY_SQL),
+}
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _csv_chunks(chunks: Iterable[tuple[list[str], list[tuple]]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header = True
+    for columns, rows in chunks:
+        if header:
+            writer.writerow(columns)
+            header = False
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _ndjson_chunks(chunks: Iterable[tuple[list[str], list[tuple]]]) -> Iterator[bytes]:
+    for columns, rows in chunks:
+        yield "".join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows).encode("utf-8")
+
+
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if out := compressor.compress(chunk):
+            yield out
+    yield compressor.flush()
+
+
+def stream_export(
+    dataset: str,
+    fmt: str = "csv",
+    start: str | date | None = None,
+    end: str | date | None = None,
+    compress: bool = False,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    if dataset not in EXPORTS:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    full_sql, range_sql = EXPORTS[dataset]
+    if start or end or dataset == "tax_summary":
+        chunks = stream_query(range_sql, date_bounds(start, end), chunk_size)
+    else:
+        chunks = stream_query(full_sql, (), chunk_size)
+    body = _csv_chunks(chunks) if fmt == "csv" else _ndjson_chunks(chunks)
+    return _gzip_chunks(body) if compress else body
+
+
+def export_filename(dataset: str, fmt: str, compress: bool = False) -> str:
+    return f"{dataset}_export.{fmt}" + (".gz" if compress else "")
+
+
+def write_export(path: Path, dataset: str, fmt: str = "csv", start: str | date | None = None, end: str | date | None = None, compress: bool = False) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        for chunk in stream_export(dataset, fmt, start, end, compress):
+            f.write(chunk)
+    return path
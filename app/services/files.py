@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from app.core.config import FILES_DIR, UPLOAD_CHUNK_SIZE, UPLOAD_MAX_BYTES
+from app.core.database import ensure_storage, transaction
+from app.services.repository import audit, fetch_all, fetch_one
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+INCOMING_DIR = FILES_DIR / "incoming"
+# entity -> (table it points at, column that gets the file's URL when still empty)
+ENTITIES: dict[str, tuple[str, str | None] | None] = {
+    "expense": ("expenses", "receipt_path"),
+    "contract": ("contracts", "file_path"),
+    "client": ("clients", None),
+    "document": None,
+}
+
+# Content types a browser may render from the API origin. Anything else (HTML, SVG, XML...) could run script
+# there, so it is only ever served as a download.
+INLINE_TYPES = frozenset({"image/png", "image/jpeg", "image/gif", "image/webp", "application/pdf", "text/plain"})
+
+FILE_LIST_SQL = """
+SELECT l.id, l.sha256, l.filename, l.entity, l.entity_id, l.created_at, f.size, f.content_type
+FROM file_links l JOIN files f ON f.sha256 = l.sha256
+"""
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def blob_path(sha256: str) -> Path:
+    # Two levels of fan-out keep any one directory small.
+    return FILES_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def file_url(sha256: str) -> str:
+    return f"/files/{sha256}"
+
+
+def content_disposition(content_type: str | None) -> str:
+    base = (content_type or "").split(";", 1)[0].strip().lower()
+    return "inline" if base in INLINE_TYPES else "attachment"
+
+
+def check_entity(entity: str, entity_id: int | None) -> None:
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown entity {entity!r}; expected one of {', '.join(ENTITIES)}")
+    if ENTITIES[entity] is not None and entity_id is None:
+        raise ValueError(f"entity_id is required for {entity} files")
+
+
+def stage_upload(fileobj: BinaryIO, max_bytes: int = UPLOAD_MAX_BYTES, chunk_size: int = UPLOAD_CHUNK_SIZE) -> tuple[Path, str, int]:
+    # Copies chunk by chunk while hashing, so memory stays at one chunk whatever the file size.
+    ensure_storage()
+    INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+    staged = INCOMING_DIR / f"{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with staged.open("wb") as out:
+            while chunk := fileobj.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        staged.unlink(missing_ok=True)
+        raise
+    return staged, digest.hexdigest(), size
+
+
+def commit_upload(staged: Path, sha256: str, size: int, filename: str, content_type: str | None, entity: str = "document", entity_id: int | None = None) -> dict[str, Any]:
+    check_entity(entity, entity_id)
+    target = ENTITIES[entity]
+    filename = Path(filename or "").name or sha256
+    try:
+        with transaction() as conn:
+            if target and not conn.execute(f"SELECT 1 FROM {target[0]} WHERE id=?", (entity_id,)).fetchone():
+                raise LookupError(f"{entity} {entity_id} not found")
+            blob = blob_path(sha256)
+            if blob.exists():
+                staged.unlink()
+            else:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(staged, blob)
+            deduplicated = not conn.execute(
+                "INSERT INTO files (sha256, size, content_type) VALUES (?,?,?) ON CONFLICT(sha256) DO NOTHING",
+                (sha256, size, content_type),
+            ).rowcount
+            link_id = conn.execute(
+                "INSERT INTO file_links (sha256, filename, entity, entity_id) VALUES (?,?,?,?)",
+                (sha256, filename, entity, entity_id),
+            ).lastrowid
+            if target and target[1]:
+                column = target[1]
+                conn.execute(f"UPDATE {target[0]} SET {column}=? WHERE id=? AND COALESCE({column}, '')=''", (file_url(sha256), entity_id))
+            audit("file.linked", entity, entity_id, sha256=sha256, filename=filename, deduplicated=deduplicated)
+    finally:
+        staged.unlink(missing_ok=True)
+    return {"sha256": sha256, "size": size, "deduplicated": deduplicated, "link_id": link_id, "filename": filename, "url": file_url(sha256)}
+
+
+def store_file(fileobj: BinaryIO, filename: str, content_type: str | None = None, entity: str = "document", entity_id: int | None = None) -> dict[str, Any]:
+    check_entity(entity, entity_id)
+    staged, sha256, size = stage_upload(fileobj)
+    return commit_upload(staged, sha256, size, filename, content_type, entity, entity_id)
+
+
+def file_info(sha256: str) -> dict[str, Any] | None:
+    if not SHA256_RE.match(sha256):
+        return None
+    info = fetch_one("SELECT sha256, size, content_type FROM files WHERE sha256=?", (sha256,))
+    if info is None or not blob_path(sha256).is_file():
+        return None
+    link = fetch_one("SELECT filename FROM file_links WHERE sha256=? ORDER BY id DESC LIMIT 1", (sha256,))
+    info["filename"] = link["filename"] if link else sha256
+    return info
+
+
+def list_files(entity: str | None = None, entity_id: int | None = None, limit: int = 100) -> list[dict[str, Any]]:
+    where, params = [], []
+    if entity is not None:
+        if entity not in ENTITIES:
+            raise ValueError(f"Unknown entity {entity!r}; expected one of {', '.join(ENTITIES)}")
+        where.append("l.entity=?")
+        params.append(entity)
+    if entity_id is not None:
+        where.append("l.entity_id=?")
+        params.append(entity_id)
+    query = FILE_LIST_SQL + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY l.id DESC LIMIT ?"
+    return fetch_all(query, (*params, limit))
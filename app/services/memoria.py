@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from app.core.cache import cached
+from app.core.config import MEMORY_CONTEXT_LIMIT, MEMORY_PRIORITY_WEIGHT, MEMORY_RECENCY_HALF_LIFE_DAYS
+from app.services.repository import fetch_all, fetch_one
+
+# BM25 relevance (bm25() is negative, lower is better) boosted by priority and decayed by age in days.
+MEMORY_SEARCH_SQL = """
+SELECT m.id, m.client_id, m.memory, m.priority, m.created_at,
+       -bm25(memories_fts) * (1 + ? * m.priority) / (1 + MAX(julianday('now') - julianday(m.created_at), 0) / ?) AS score
+FROM memories_fts JOIN memories m ON m.id=memories_fts.rowid
+WHERE memories_fts MATCH ?
+ORDER BY score DESC LIMIT ?
+"""
+CLIENT_MEMORY_SEARCH_SQL = """
+SELECT m.id, m.client_id, m.memory, m.priority, m.created_at,
+       -bm25(memories_fts) * (1 + ? * m.priority) / (1 + MAX(julianday('now') - julianday(m.created_at), 0) / ?) AS score
+FROM memories_fts JOIN memories m ON m.id=memories_fts.rowid
+WHERE memories_fts MATCH ? AND m.client_id=?
+ORDER BY score DESC LIMIT ?
+"""
+TOP_MEMORIES_SQL = "SELECT id, client_id, memory, priority, created_at FROM memories ORDER BY priority DESC, created_at DESC LIMIT ?"
+TOP_CLIENT_MEMORIES_SQL = "SELECT id, client_id, memory, priority, created_at FROM memories WHERE client_id=? ORDER BY priority DESC, created_at DESC LIMIT ?"
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from how i in is it me my of on or our should so that the this to what when where which who why will with you your".split()
+)
+MAX_TERMS = 16
+
+
+_fts_ready: bool | None = None
+
+
+def prompt_terms(prompt: str) -> list[str]:
+    terms = []
+    for word in re.findall(r"\w+", prompt.lower()):
+        if len(word) > 1 and word not in STOPWORDS and word not in terms:
+            terms.append(word)
+    return terms[:MAX_TERMS]
+
+
+def _match_expression(terms: list[str]) -> str:
+    # Each term is quoted so FTS5 operators or punctuation in a prompt can never break the query.
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _has_fts() -> bool:
+    global _fts_ready
+    if _fts_ready is None:
+        _fts_ready = fetch_one("SELECT 1 AS ok FROM sqlite_master WHERE type='table' AND name='memories_fts'") is not None
+    return _fts_ready
+
+
+def _like_search(terms: list[str], client_id: int | None, limit: int) -> list[dict[str, Any]]:
+    clauses = " OR ".join("memory LIKE ?" for _ in terms)
+    params: list[Any] = [f"%{term}%" for term in terms]
+    where = f"({clauses})"
+    if client_id is not None:
+        where += " AND client_id=?"
+        params.append(client_id)
+    return fetch_all(f"SELECT id, client_id, memory, priority, created_at FROM memories WHERE {where} ORDER BY priority DESC, created_at DESC LIMIT ?", (*params, limit))
+
+
+def search_memories(prompt: str, client_id: int | None = None, limit: int = MEMORY_CONTEXT_LIMIT) -> list[dict[str, Any]]:
+    return _search_memories(tuple(prompt_terms(prompt)), client_id, limit)
+
+
+@cached(("memories",))
+def _search_memories(terms: tuple[str, ...], client_id: int | None, limit: int) -> list[dict[str, Any]]:
+    terms = list(terms)
+    rows: list[dict[str, Any]] = []
+    if terms and _has_fts():
+        weights = (MEMORY_PRIORITY_WEIGHT, MEMORY_RECENCY_HALF_LIFE_DAYS, _match_expression(terms))
+        if client_id is None:
+            rows = fetch_all(MEMORY_SEARCH_SQL, (*weights, limit))
+        else:
+            rows = fetch_all(CLIENT_MEMORY_SEARCH_SQL, (*weights, client_id, limit))
+    elif terms:
+        rows = _like_search(terms, client_id, limit)
+    if not rows:
+        rows = fetch_all(TOP_MEMORIES_SQL, (limit,)) if client_id is None else fetch_all(TOP_CLIENT_MEMORIES_SQL, (client_id, limit))
+    return rows
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+from app.core.cache import cached
+from app.core.config import REMINDER_BATCH_SIZE, REMINDER_CLAIM_SECONDS, REMINDER_MAX_ATTEMPTS, REMINDER_SEND_WORKERS
+from app.core.database import get_conn, transaction
+from app.services.assistant import generate_follow_up_email
+from app.services.channels import Channel, default_channel
+from app.services.repository import fetch_all
+
+# reminders.sent lifecycle; the (sent, reminder_date) index serves every state lookup.
+PENDING, SENT, SKIPPED, SENDING, FAILED = 0, 1, 2, 3, 4
+
+CLAIM_REMINDERS_SQL = """
+UPDATE reminders SET sent=3, claimed_at=?, attempts=attempts+1
+WHERE id IN (SELECT id FROM reminders WHERE sent=0 AND reminder_date <= ? ORDER BY reminder_date LIMIT ?)
+RETURNING id, invoice_id, attempts
+"""
+REMINDER_DETAILS_SQL = """
+SELECT i.id, i.invoice_number, i.status, i.balance_due, c.name AS client_name, c.email
+FROM invoices i LEFT JOIN clients c ON c.id=i.client_id
+WHERE i.id IN (SELECT value FROM json_each(?))
+"""
+PENDING_REMINDERS_SQL = """
+SELECT r.reminder_date, i.invoice_number, c.name AS client_name, i.balance_due
+FROM reminders r JOIN invoices i ON i.id=r.invoice_id JOIN clients c ON c.id=i.client_id
+WHERE r.sent=0 ORDER BY r.reminder_date LIMIT ?
+"""
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def release_stale_claims(claim_seconds: int = REMINDER_CLAIM_SECONDS) -> int:
+    # Rows left in SENDING (a failed send, or a run that died mid-send) go back to PENDING once the claim window passes.
+    cutoff = _timestamp(datetime.now(timezone.utc) - timedelta(seconds=claim_seconds))
+    with get_conn() as conn:
+        return conn.execute("UPDATE reminders SET sent=0 WHERE sent=3 AND claimed_at < ?", (cutoff,)).rowcount
+
+
+def _claim(today: str, limit: int) -> list[dict[str, Any]]:
+    with get_conn() as conn:
+        return conn.execute(CLAIM_REMINDERS_SQL, (_timestamp(datetime.now(timezone.utc)), today, limit)).fetchall()
+
+
+def _render(invoice: dict[str, Any]) -> tuple[str, str]:
+    email = generate_follow_up_email(invoice["client_name"], invoice["invoice_number"], invoice["balance_due"])
+    subject, _, body = email.partition("\n\n")
+    return subject.removeprefix("Subject: "), body
+
+
+def dispatch_reminders(
+    today: date | str | None = None,
+    channel: Channel | None = None,
+    batch_size: int = REMINDER_BATCH_SIZE,
+    workers: int = REMINDER_SEND_WORKERS,
+) -> dict[str, Any]:
+    today = str(today or date.today())
+    channel = channel or default_channel()
+    started = time.perf_counter()
+    stats = {"released": release_stale_claims(), "claimed": 0, "sent": 0, "skipped": 0, "retrying": 0, "failed": 0, "batches": 0}
+    send_seconds = 0.0
+    with ThreadPoolExecutor(workers, thread_name_prefix="bizhaven-reminder") as pool:
+        while claimed := _claim(today, batch_size):
+            stats["claimed"] += len(claimed)
+            stats["batches"] += 1
+            invoices = {row["id"]: row for row in fetch_all(REMINDER_DETAILS_SQL, (json.dumps([r["invoice_id"] for r in claimed]),))}
+            skipped, outgoing, failed = [], [], []
+            for reminder in claimed:
+                invoice = invoices.get(reminder["invoice_id"])
+                if not invoice or invoice["status"] == "paid" or invoice["balance_due"] <= 0:
+                    skipped.append((reminder["id"],))
+                elif not (invoice["email"] or "").strip():
+                    # Permanent: retrying cannot help until someone adds an address, so it fails now instead of
+                    # sitting claimed through every attempt.
+                    failed.append((FAILED, f"Client {invoice['client_name']} has no email address", reminder["id"]))
+                else:
+                    subject, body = _render(invoice)
+                    outgoing.append((reminder, invoice["email"], subject, body))
+
+            sending = time.perf_counter()
+            futures = [(reminder, pool.submit(channel.send, to, subject, body, {"reminder_id": reminder["id"]})) for reminder, to, subject, body in outgoing]
+            sent = []
+            for reminder, future in futures:
+                try:
+                    future.result()
+                except Exception as exc:
+                    state = FAILED if reminder["attempts"] >= REMINDER_MAX_ATTEMPTS else SENDING
+                    failed.append((state, f"{type(exc).__name__}: {exc}", reminder["id"]))
+                else:
+                    sent.append((reminder["id"],))
+            send_seconds += time.perf_counter() - sending
+
+            sent_at = _timestamp(datetime.now(timezone.utc))
+            with transaction() as conn:
+                conn.executemany("UPDATE reminders SET sent=1, sent_at=?, last_error=NULL WHERE id=?", [(sent_at, rid) for (rid,) in sent])
+                conn.executemany("UPDATE reminders SET sent=2 WHERE id=?", skipped)
+                conn.executemany("UPDATE reminders SET sent=?, last_error=? WHERE id=?", failed)
+            stats["sent"] += len(sent)
+            stats["skipped"] += len(skipped)
+            stats["retrying"] += sum(1 for state, _, _ in failed if state == SENDING)
+            stats["failed"] += sum(1 for state, _, _ in failed if state == FAILED)
+            if len(claimed) < batch_size:
+                break
+    duration = time.perf_counter() - started
+    stats["duration_ms"] = round(duration * 1000, 2)
+    stats["send_ms"] = round(send_seconds * 1000, 2)
+    stats["per_second"] = round(stats["sent"] / duration, 2) if duration else None
+    return stats
+
+
+@cached(("reminders", "invoices", "clients"))
+def pending_reminders(limit: int = 20) -> list[dict[str, Any]]:
+    return fetch_all(PENDING_REMINDERS_SQL, (limit,))
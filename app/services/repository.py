@@ -1,13 +1,32 @@
 from __future__ import annotations
 
+import base64
+import calendar
 import csv
 import json
-from datetime import date, datetime, timedelta
+import logging
+import sqlite3
+from collections.abc import Callable
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 from uuid import uuid4
 
-from app.core.database import get_conn
+from app.core.cache import cached
+from app.core.config import PAGE_SIZE, PAGE_SIZE_MAX, RECURRING_BATCH_SIZE
+from app.core.database import fetch_rows, get_conn, stream_query, transaction
+from app.core.migrations import DASHBOARD_TOTALS_SQL, OPEN_DUE_COUNTS_SQL, refresh_dashboard_totals
+from app.core.write_behind import write_behind
+
+logger = logging.getLogger(__name__)
+
+RECURRING_MONTHS = {"monthly": 1, "quarterly": 3}
+RANGE_MIN = ""
+RANGE_MAX = "9999-12-31~"
+TAX_SUMMARY_SQL = (
+    "SELECT expense_date, category, vendor, amount, notes FROM expenses WHERE expense_date >= ? AND expense_date < ? ORDER BY expense_date"
+)
 
 
 def fetch_all(query: str, params: tuple = ()) -> list[dict[str, Any]]:
@@ -20,6 +39,11 @@ def fetch_one(query: str, params: tuple = ()) -> dict[str, Any] | None:
         return conn.execute(query, params).fetchone()
 
 
+@cached(lambda tables, query, params=(): tables)
+def fetch_all_cached(tables: tuple[str, ...], query: str, params: tuple = ()) -> list[dict[str, Any]]:
+    return fetch_all(query, params)
+
+
 def execute(query: str, params: tuple = ()) -> int:
     with get_conn() as conn:
         cur = conn.execute(query, params)
@@ -35,23 +59,32 @@ def ensure_client_portal_token(client_id: int) -> str:
     return token
 
 
-def add_invoice_with_items(payload: dict[str, Any]) -> int:
-    custom_fields = json.dumps(payload.get("custom_fields", {}))
+def _invoice_totals(payload: dict[str, Any]) -> tuple[list[tuple], float, float, float]:
     discount = float(payload.get("discount", 0.0))
+    items = []
     subtotal = 0.0
     taxable_total = 0.0
     for item in payload.get("items", []):
         amount = float(item["quantity"]) * float(item["rate"])
+        taxable = 1 if item.get("taxable", True) else 0
         subtotal += amount
-        if item.get("taxable", True):
+        if taxable:
             taxable_total += amount
+        items.append((item["description"], item["quantity"], item["rate"], amount, taxable))
     taxable_total = max(taxable_total - discount, 0)
     tax = taxable_total * float(payload.get("tax_rate", 0.0))
     total = max(subtotal - discount, 0) + tax
+    return items, subtotal, tax, total
+
 
-    iid = execute(
-        """INSERT INTO invoices (client_id,project_id,job_id,invoice_number,issue_date,due_date,status,discount,custom_fields,subtotal,tax,total,notes,reminder_days,recurring_rule,next_run_date)
-        VALUES (?,?,?,?,?,'sent',?,?,?,?,?,?,?,?,?,?)""",
+def _insert_invoice(conn, payload: dict[str, Any]) -> int:
+    items, subtotal, tax, total = _invoice_totals(payload)
+    recurring_rule = payload.get("recurring_rule", "none")
+    next_run_date = payload.get("next_run_date")
+    recurring_day = datetime.fromisoformat(next_run_date).day if next_run_date and recurring_rule in RECURRING_MONTHS else None
+    cur = conn.execute(
+        """INSERT INTO invoices (client_id,project_id,job_id,invoice_number,issue_date,due_date,status,discount,custom_fields,subtotal,tax,total,notes,reminder_days,recurring_rule,next_run_date,recurring_day)
+        VALUES (?,?,?,?,?,?,'sent',?,?,?,?,?,?,?,?,?,?)""",
         (
             payload["client_id"],
             payload.get("project_id"),
@@ -59,148 +92,461 @@ def add_invoice_with_items(payload: dict[str, Any]) -> int:
             payload["invoice_number"],
             payload["issue_date"],
             payload["due_date"],
-            discount,
-            custom_fields,
+            float(payload.get("discount", 0.0)),
+            json.dumps(payload.get("custom_fields", {})),
             subtotal,
             tax,
             total,
             payload.get("notes", ""),
             int(payload.get("reminder_days", 3)),
-            payload.get("recurring_rule", "none"),
-            payload.get("next_run_date"),
+            recurring_rule,
+            next_run_date,
+            recurring_day,
         ),
     )
+    iid = cur.lastrowid
 
-    for item in payload.get("items", []):
-        amount = float(item["quantity"]) * float(item["rate"])
-        execute(
-            "INSERT INTO invoice_items (invoice_id,description,quantity,rate,amount,taxable) VALUES (?,?,?,?,?,?)",
-            (iid, item["description"], item["quantity"], item["rate"], amount, 1 if item.get("taxable", True) else 0),
-        )
+    conn.executemany(
+        "INSERT INTO invoice_items (invoice_id,description,quantity,rate,amount,taxable) VALUES (?,?,?,?,?,?)",
+        [(iid, *item) for item in items],
+    )
 
     if payload.get("reminder_days"):
         reminder_date = datetime.fromisoformat(payload["due_date"]).date() - timedelta(days=int(payload["reminder_days"]))
-        execute("INSERT INTO reminders (invoice_id,reminder_date,channel,sent) VALUES (?,?,?,0)", (iid, str(reminder_date), "email"))
+        conn.execute("INSERT INTO reminders (invoice_id,reminder_date,channel,sent) VALUES (?,?,?,0)", (iid, str(reminder_date), "email"))
 
+    audit("invoice.created", "invoice", iid, invoice_number=payload["invoice_number"], total=total)
     return iid
 
 
+def add_invoice_with_items(payload: dict[str, Any]) -> int:
+    with transaction() as conn:
+        return _insert_invoice(conn, payload)
+
+
+def add_invoices_bulk(
+    payloads: list[dict[str, Any]],
+    chunk_size: int = 500,
+    progress: Callable[[int, int], None] | None = None,
+) -> dict[str, Any]:
+    total = len(payloads)
+    ids: list[int] = []
+    errors: list[dict[str, Any]] = []
+    for start in range(0, total, chunk_size):
+        with transaction() as conn:
+            for index, payload in enumerate(payloads[start : start + chunk_size], start=start):
+                conn.execute("SAVEPOINT bulk_invoice")
+                try:
+                    ids.append(_insert_invoice(conn, payload))
+                except (sqlite3.Error, KeyError, TypeError, ValueError) as exc:
+                    conn.execute("ROLLBACK TO bulk_invoice")
+                    errors.append({"index": index, "invoice_number": payload.get("invoice_number"), "error": str(exc)})
+                finally:
+                    conn.execute("RELEASE bulk_invoice")
+        done = min(start + chunk_size, total)
+        logger.info("bulk invoice import: %s/%s processed, %s failed", done, total, len(errors))
+        if progress:
+            progress(done, total)
+    return {"total": total, "created": len(ids), "failed": len(errors), "ids": ids, "errors": errors}
+
+
 def update_invoice_payment_status(invoice_id: int) -> None:
     execute(
         """
         UPDATE invoices
         SET status = CASE
-            WHEN (SELECT COALESCE(SUM(amount),0) FROM payments WHERE invoice_id=?) >= total THEN 'paid'
-            ELSE 'partial'
+            WHEN paid_total >= total THEN 'paid'
+            WHEN paid_total > 0 THEN 'partial'
+            ELSE 'sent'
         END
         WHERE id=?
         """,
-        (invoice_id, invoice_id),
+        (invoice_id,),
     )
 
 
-def run_recurring_invoices(today: date | None = None) -> int:
+def record_payment(invoice_id: int, amount: float, method: str, paid_on: str, notes: str = "") -> int:
+    # Negative amounts record refunds; the payments triggers adjust paid_total/balance_due in this same transaction.
+    with transaction():
+        pid = execute(
+            "INSERT INTO payments (invoice_id,amount,method,paid_on,notes) VALUES (?,?,?,?,?)",
+            (invoice_id, amount, method, paid_on, notes),
+        )
+        update_invoice_payment_status(invoice_id)
+        audit("payment.recorded", "payment", pid, invoice_id=invoice_id, amount=amount)
+    return pid
+
+
+def delete_payment(payment_id: int) -> bool:
+    with transaction():
+        payment = fetch_one("SELECT invoice_id FROM payments WHERE id=?", (payment_id,))
+        if not payment:
+            return False
+        execute("DELETE FROM payments WHERE id=?", (payment_id,))
+        update_invoice_payment_status(payment["invoice_id"])
+        audit("payment.deleted", "payment", payment_id, invoice_id=payment["invoice_id"])
+    return True
+
+
+def check_invoice_balances(fix: bool = False) -> list[dict[str, Any]]:
+    with transaction() as conn:
+        mismatches = conn.execute(
+            """
+            SELECT i.id, i.invoice_number, i.paid_total, i.balance_due,
+            COALESCE(p.paid,0) AS expected_paid_total, COALESCE(i.total,0) - COALESCE(p.paid,0) AS expected_balance_due
+            FROM invoices i LEFT JOIN (SELECT invoice_id, SUM(amount) AS paid FROM payments GROUP BY invoice_id) p ON p.invoice_id=i.id
+            WHERE abs(i.paid_total - COALESCE(p.paid,0)) > 0.005
+            OR abs(i.balance_due - (COALESCE(i.total,0) - COALESCE(p.paid,0))) > 0.005
+            """
+        ).fetchall()
+        if fix:
+            conn.executemany(
+                "UPDATE invoices SET paid_total=?, balance_due=? WHERE id=?",
+                [(m["expected_paid_total"], m["expected_balance_due"], m["id"]) for m in mismatches],
+            )
+    return mismatches
+
+
+def add_months(day: date, months: int, anchor_day: int | None = None) -> date:
+    # Clamped per month to its last day; `anchor_day` is the day to aim for when `day` was itself clamped.
+    month_index = day.month - 1 + months
+    year = day.year + month_index // 12
+    month = month_index % 12 + 1
+    return date(year, month, min(anchor_day or day.day, calendar.monthrange(year, month)[1]))
+
+
+def next_recurring_date(current: date, rule: str, anchor_day: int | None = None) -> date:
+    if rule == "weekly":
+        return current + timedelta(days=7)
+    return add_months(current, RECURRING_MONTHS[rule], anchor_day)
+
+
+def run_recurring_invoices(today: date | None = None, batch_size: int = RECURRING_BATCH_SIZE) -> int:
     today = today or date.today()
-    due = fetch_all(
-        "SELECT * FROM invoices WHERE recurring_rule IN ('weekly','monthly','quarterly') AND next_run_date IS NOT NULL AND next_run_date <= ?",
-        (str(today),),
-    )
     created = 0
-    for inv in due:
-        items = fetch_all("SELECT description, quantity, rate, taxable FROM invoice_items WHERE invoice_id=?", (inv["id"],))
-        next_number = f"{inv['invoice_number']}-R{today.strftime('%Y%m%d')}"
-        next_run = today + timedelta(days={"weekly": 7, "monthly": 30, "quarterly": 90}[inv["recurring_rule"]])
-        add_invoice_with_items(
-            {
-                "client_id": inv["client_id"],
-                "project_id": inv.get("project_id"),
-                "job_id": inv.get("job_id"),
-                "invoice_number": next_number,
-                "issue_date": str(today),
-                "due_date": str(today + timedelta(days=14)),
-                "items": items,
-                "tax_rate": (inv["tax"] / inv["subtotal"]) if inv["subtotal"] else 0.0,
-                "discount": inv.get("discount", 0),
-                "custom_fields": json.loads(inv.get("custom_fields") or "{}"),
-                "notes": inv.get("notes", ""),
-                "reminder_days": inv.get("reminder_days", 3),
-                "recurring_rule": inv["recurring_rule"],
-                "next_run_date": str(next_run),
-            }
+    failed: list[int] = []
+    while True:
+        # Templates that failed earlier in this run are left due (the next run retries them) but not picked again now.
+        due = fetch_all(
+            "SELECT * FROM invoices WHERE recurring_rule IN ('weekly','monthly','quarterly') AND next_run_date IS NOT NULL AND next_run_date <= ? AND id NOT IN (SELECT value FROM json_each(?)) ORDER BY next_run_date, id LIMIT ?",
+            (str(today), json.dumps(failed), batch_size),
         )
-        execute("UPDATE invoices SET next_run_date=? WHERE id=?", (str(next_run), inv["id"]))
-        created += 1
-    return created
+        if not due:
+            return created
+        items: dict[int, list[dict[str, Any]]] = {inv["id"]: [] for inv in due}
+        for item in fetch_all(
+            "SELECT invoice_id, description, quantity, rate, taxable FROM invoice_items WHERE invoice_id IN (SELECT value FROM json_each(?)) ORDER BY id",
+            (json.dumps(list(items)),),
+        ):
+            items[item.pop("invoice_id")].append(item)
+
+        with transaction() as conn:
+            for inv in due:
+                conn.execute("SAVEPOINT recurring_invoice")
+                try:
+                    created += _bill_recurring(conn, inv, items[inv["id"]])
+                except (sqlite3.Error, KeyError, TypeError, ValueError):
+                    conn.execute("ROLLBACK TO recurring_invoice")
+                    logger.exception("recurring invoice template %s (%s) failed; skipped", inv["id"], inv["invoice_number"])
+                    failed.append(inv["id"])
+                finally:
+                    conn.execute("RELEASE recurring_invoice")
+
+
+def _bill_recurring(conn, inv: dict[str, Any], items: list[dict[str, Any]]) -> int:
+    run_date = datetime.fromisoformat(inv["next_run_date"]).date()
+    next_run = next_recurring_date(run_date, inv["recurring_rule"], inv.get("recurring_day"))
+    # Compare-and-set on next_run_date so a retried or concurrent run never bills the same period twice.
+    claimed = conn.execute(
+        "UPDATE invoices SET next_run_date=? WHERE id=? AND next_run_date=?",
+        (str(next_run), inv["id"], inv["next_run_date"]),
+    ).rowcount
+    next_number = f"{inv['invoice_number']}-R{run_date.strftime('%Y%m%d')}"
+    if not claimed or conn.execute("SELECT 1 FROM invoices WHERE invoice_number=?", (next_number,)).fetchone():
+        return 0
+    _insert_invoice(
+        conn,
+        {
+            "client_id": inv["client_id"],
+            "project_id": inv.get("project_id"),
+            "job_id": inv.get("job_id"),
+            "invoice_number": next_number,
+            "issue_date": str(run_date),
+            "due_date": str(run_date + timedelta(days=14)),
+            "items": items,
+            "tax_rate": (inv["tax"] / inv["subtotal"]) if inv["subtotal"] else 0.0,
+            "discount": inv.get("discount", 0),
+            "custom_fields": json.loads(inv.get("custom_fields") or "{}"),
+            "notes": inv.get("notes", ""),
+            "reminder_days": inv.get("reminder_days", 3),
+        },
+    )
+    return 1
 
 
 def dashboard_summary() -> dict[str, Any]:
-    earnings = fetch_one("SELECT COALESCE(SUM(amount),0) AS total FROM payments")
-    upcoming = fetch_one("SELECT COUNT(*) AS count FROM invoices WHERE status IN ('sent','partial') AND due_date >= ?", (str(date.today()),))
-    expenses = fetch_one("SELECT COALESCE(SUM(amount),0) AS total FROM expenses")
-    unpaid = fetch_one("SELECT COALESCE(SUM(total),0) AS total FROM invoices WHERE status IN ('sent','partial')")
-    projects = fetch_one("SELECT COUNT(*) AS count FROM projects WHERE status='active'")
+    return _dashboard_summary(str(date.today()))
+
+
+@cached(("invoices", "payments", "expenses", "projects"))
+def _dashboard_summary(today: str) -> dict[str, Any]:
+    row = fetch_one(
+        """
+        SELECT t.earnings, t.expenses, t.outstanding, t.active_projects,
+        (SELECT COALESCE(SUM(count),0) FROM open_invoice_due_counts WHERE due_date >= ?) AS upcoming_invoices
+        FROM dashboard_totals t WHERE t.id=1
+        """,
+        (today,),
+    )
     return {
-        "earnings": earnings["total"],
-        "upcoming_invoices": upcoming["count"],
-        "expenses": expenses["total"],
-        "outstanding": unpaid["total"],
-        "active_projects": projects["count"],
+        "earnings": row["earnings"],
+        "upcoming_invoices": row["upcoming_invoices"],
+        "expenses": row["expenses"],
+        "outstanding": row["outstanding"],
+        "active_projects": row["active_projects"],
     }
 
 
-def estimate_tax(month: str, tax_rate: float = 0.22) -> dict[str, float]:
-    income = fetch_one("SELECT COALESCE(SUM(amount),0) AS total FROM payments WHERE strftime('%Y-%m', paid_on)=?", (month,))["total"]
-    costs = fetch_one("SELECT COALESCE(SUM(amount),0) AS total FROM expenses WHERE strftime('%Y-%m', expense_date)=?", (month,))["total"]
+def rebuild_dashboard_totals(apply: bool = True) -> dict[str, Any]:
+    with transaction() as conn:
+        stored = conn.execute("SELECT earnings, expenses, outstanding, active_projects FROM dashboard_totals WHERE id=1").fetchone() or {}
+        expected = conn.execute(DASHBOARD_TOTALS_SQL).fetchone()
+        stored_counts = {r["due_date"]: r["count"] for r in conn.execute("SELECT due_date, count FROM open_invoice_due_counts WHERE count > 0")}
+        expected_counts = {r["due_date"]: r["count"] for r in conn.execute(OPEN_DUE_COUNTS_SQL)}
+        drift = {
+            key: round(expected[key] - stored.get(key, 0), 2)
+            for key in expected
+            if round(expected[key] - stored.get(key, 0), 2)
+        }
+        bucket_drift = sorted(d for d in stored_counts.keys() | expected_counts.keys() if stored_counts.get(d) != expected_counts.get(d))
+        if bucket_drift:
+            drift["due_date_buckets"] = bucket_drift
+        if apply:
+            refresh_dashboard_totals(conn)
+    return {"drift": drift, "totals": expected, "applied": apply}
+
+
+def month_range(month: str) -> tuple[str, str]:
+    first = datetime.strptime(month, "%Y-%m").date()
+    return str(first), str(add_months(first, 1))
+
+
+def year_range(year: str) -> tuple[str, str]:
+    first = datetime.strptime(year, "%Y").date()
+    return str(first), str(first.replace(year=first.year + 1))
+
+
+def date_bounds(start: str | date | None = None, end: str | date | None = None) -> tuple[str, str]:
+    # Half-open [start, end) on ISO date strings, so the range predicate can walk an index.
+    return (str(start) if start else RANGE_MIN, str(end) if end else RANGE_MAX)
+
+
+@cached(("payments", "expenses"))
+def estimate_tax(
+    month: str | None = None,
+    tax_rate: float = 0.22,
+    start: str | date | None = None,
+    end: str | date | None = None,
+) -> dict[str, float]:
+    lo, hi = month_range(month) if month else (RANGE_MIN, RANGE_MAX)
+    lo, hi = date_bounds(start or lo, end or hi)
+    income = fetch_one("SELECT COALESCE(SUM(amount),0) AS total FROM payments WHERE paid_on >= ? AND paid_on < ?", (lo, hi))["total"]
+    costs = fetch_one("SELECT COALESCE(SUM(amount),0) AS total FROM expenses WHERE expense_date >= ? AND expense_date < ?", (lo, hi))["total"]
     taxable = max(income - costs, 0)
     return {"income": income, "costs": costs, "taxable": taxable, "estimate": taxable * tax_rate}
 
 
-def profit_loss(period: str = "monthly") -> list[dict[str, Any]]:
-    income_rows = fetch_all("SELECT strftime('%Y-%m', paid_on) AS period, COALESCE(SUM(amount),0) AS income FROM payments GROUP BY 1")
-    expense_rows = fetch_all("SELECT strftime('%Y-%m', expense_date) AS period, COALESCE(SUM(amount),0) AS expenses FROM expenses GROUP BY 1")
+@cached(("payments", "expenses"))
+def profit_loss(period: str = "monthly", start: str | date | None = None, end: str | date | None = None) -> list[dict[str, Any]]:
+    lo, hi = date_bounds(start, end)
+    income_rows = fetch_all(
+        "SELECT substr(paid_on,1,7) AS period, COALESCE(SUM(amount),0) AS income FROM payments WHERE paid_on >= ? AND paid_on < ? GROUP BY 1",
+        (lo, hi),
+    )
+    expense_rows = fetch_all(
+        "SELECT substr(expense_date,1,7) AS period, COALESCE(SUM(amount),0) AS expenses FROM expenses WHERE expense_date >= ? AND expense_date < ? GROUP BY 1",
+        (lo, hi),
+    )
     merged: dict[str, dict[str, Any]] = {}
-    for row in income_rows:
-        merged[row["period"]] = {"period": row["period"], "income": row["income"], "expenses": 0.0}
-    for row in expense_rows:
-        merged.setdefault(row["period"], {"period": row["period"], "income": 0.0, "expenses": 0.0})
-        merged[row["period"]]["expenses"] = row["expenses"]
+    for row in income_rows + expense_rows:
+        label = row["period"]
+        if period == "quarterly":
+            y, m = label.split("-")
+            label = f"{y}-Q{((int(m) - 1) // 3) + 1}"
+        val = merged.setdefault(label, {"period": label, "income": 0.0, "expenses": 0.0})
+        val["income"] += row.get("income", 0.0)
+        val["expenses"] += row.get("expenses", 0.0)
 
     output = []
     for k in sorted(merged.keys()):
         val = merged[k]
-        if period == "quarterly":
-            y, m = val["period"].split("-")
-            q = ((int(m) - 1) // 3) + 1
-            val["period"] = f"{y}-Q{q}"
         val["profit"] = val["income"] - val["expenses"]
         output.append(val)
     return output
 
 
-def expense_category_breakdown() -> list[dict[str, Any]]:
-    return fetch_all("SELECT category, COALESCE(SUM(amount),0) AS total FROM expenses GROUP BY category ORDER BY total DESC")
+@cached(("expenses",))
+def expense_category_breakdown(start: str | date | None = None, end: str | date | None = None) -> list[dict[str, Any]]:
+    return fetch_all(
+        "SELECT category, COALESCE(SUM(amount),0) AS total FROM expenses WHERE expense_date >= ? AND expense_date < ? GROUP BY category ORDER BY total DESC",
+        date_bounds(start, end),
+    )
 
 
-def export_tax_summary(path: Path, year: str) -> Path:
-    rows = fetch_all(
-        "SELECT expense_date, category, vendor, amount, notes FROM expenses WHERE strftime('%Y', expense_date)=? ORDER BY expense_date",
-        (year,),
-    )
+def export_tax_summary(path: Path, year: str, start: str | date | None = None, end: str | date | None = None) -> Path:
+    lo, hi = year_range(year)
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["expense_date", "category", "vendor", "amount", "notes"])
-        writer.writeheader()
-        writer.writerows(rows)
+        writer = csv.writer(f)
+        for columns, rows in stream_query(TAX_SUMMARY_SQL, date_bounds(start or lo, end or hi)):
+            if f.tell() == 0:
+                writer.writerow(columns)
+            writer.writerows(rows)
     return path
 
 
-def backup_database(path: Path) -> Path:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    rows = fetch_all("SELECT name FROM sqlite_master WHERE type='table'")
-    snapshot = {"tables": [r["name"] for r in rows], "created_at": datetime.utcnow().isoformat()}
-    path.write_text(json.dumps(snapshot, indent=2), encoding="utf-8")
-    return path
+LIST_TABLES = {
+    "clients": ("clients",),
+    "projects": ("projects", "clients"),
+    "expenses": ("expenses",),
+    "invoices": ("invoices", "clients"),
+    "agent_tasks": ("agent_tasks", "clients"),
+}
+LIST_QUERIES: dict[str, tuple[str, tuple[tuple[str, str], ...]]] = {
+    "clients": ("SELECT c.* FROM clients c", (("c.id", "id"),)),
+    "projects": (
+        "SELECT p.*, c.name AS client_name FROM projects p LEFT JOIN clients c ON c.id=p.client_id",
+        (("p.id", "id"),),
+    ),
+    "expenses": ("SELECT e.* FROM expenses e", (("e.expense_date", "expense_date"), ("e.id", "id"))),
+    "invoices": (
+        "SELECT i.*, i.paid_total AS paid, c.name AS client_name FROM invoices i LEFT JOIN clients c ON c.id=i.client_id",
+        (("i.id", "id"),),
+    ),
+    "agent_tasks": (
+        "SELECT a.*, c.name AS client_name FROM agent_tasks a LEFT JOIN clients c ON c.id=a.client_id",
+        (("a.id", "id"),),
+    ),
+}
+
+LIST_FILTERS: dict[str, dict[str, str]] = {
+    "clients": {},
+    "projects": {"client_id": "p.client_id = ?", "status": "p.status = ?"},
+    "expenses": {
+        "category": "e.category = ?",
+        "project_id": "e.project_id = ?",
+        "start": "e.expense_date >= ?",
+        "end": "e.expense_date < ?",
+    },
+    "invoices": {
+        "status": "i.status = ?",
+        "client_id": "i.client_id = ?",
+        "project_id": "i.project_id = ?",
+        "start": "i.issue_date >= ?",
+        "end": "i.issue_date < ?",
+    },
+    "agent_tasks": {"status": "a.status = ?", "client_id": "a.client_id = ?"},
+}
+
+
+def encode_cursor(values: list[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid pagination cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid pagination cursor")
+    # Only values sqlite can bind; anything else is a crafted cursor, not a server error.
+    if any(value is not None and type(value) not in (str, int, float) for value in values):
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+
+def _before(columns: list[str]) -> str:
+    return f"({', '.join(columns)}) < ({', '.join('?' for _ in columns)})"
+
+
+def _filtered(select: str, where: list[str]) -> str:
+    return select + (" WHERE " + " AND ".join(where) if where else "")
+
+
+def keyset_query(name: str, filters: dict[str, Any], limit: int, cursor: str | None = None) -> tuple[str, list[Any]]:
+    select, keys = LIST_QUERIES[name]
+    allowed = LIST_FILTERS[name]
+    ranged = name == "expenses" and bool(filters.get("start") or filters.get("end"))
+    if ranged:
+        # Both ends bounded, matching the report date ranges, so the range walks the index.
+        lo, hi = date_bounds(filters.get("start"), filters.get("end"))
+        filters = {**filters, "start": lo, "end": hi}
+    where, params = [], []
+    for key, value in filters.items():
+        if key not in allowed:
+            raise ValueError(f"Unknown filter for {name}: {key}")
+        if value is not None and value != "":
+            where.append(allowed[key])
+            params.append(str(value) if isinstance(value, date) else value)
+    columns = [col for col, _ in keys]
+    values = decode_cursor(cursor, len(keys)) if cursor else None
+    order = " ORDER BY " + ", ".join(f"{col} DESC" for col in columns) + " LIMIT ?"
+    if name != "expenses" or ranged:
+        if values:
+            where.append(_before(columns))
+            params.extend(values)
+        return _filtered(select, where) + order, [*params, limit + 1]
+    # Undated expenses never compare in the (expense_date, id) keyset, and an OR for them would turn the index
+    # search into a scan. They are paged separately by id and follow the dated ones, where DESC puts NULLs anyway.
+    lead, rest = columns[0], columns[1:]
+    parts, part_params = [], []
+    if values is None or values[0] is not None:
+        dated = [*where, f"{lead} IS NOT NULL", *([_before(columns)] if values else [])]
+        parts.append(f"SELECT * FROM ({_filtered(select, dated)}{order})")
+        part_params += [*params, *(values or []), limit + 1]
+    after_null = values is not None and values[0] is None
+    undated = [*where, f"{lead} IS NULL", *([_before(rest)] if after_null else [])]
+    parts.append(f"SELECT * FROM ({_filtered(select, undated)} ORDER BY {', '.join(f'{col} DESC' for col in rest)} LIMIT ?)")
+    part_params += [*params, *(values[1:] if after_null else []), limit + 1]
+    # The compound is ordered explicitly (DESC puts NULL dates last); it only re-sorts the arms' limit + 1 rows each.
+    outer = " ORDER BY " + ", ".join(f"{field} DESC" for _, field in keys) + " LIMIT ?"
+    return " UNION ALL ".join(parts) + outer, [*part_params, limit + 1]
+
+
+@cached(lambda name, *args, **kwargs: LIST_TABLES.get(name, ()))
+def list_page(name: str, limit: int = PAGE_SIZE, cursor: str | None = None, **filters: Any) -> dict[str, Any]:
+    limit = max(1, min(int(limit), PAGE_SIZE_MAX))
+    sql, params = keyset_query(name, filters, limit, cursor)
+    columns, rows = fetch_rows(sql, tuple(params))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][columns.index(field)] for _, field in LIST_QUERIES[name][1]])
+    return {"items": [dict(zip(columns, row)) for row in rows], "next_cursor": next_cursor}
+
+
+def memoria_autosave(client_id: int, memory: str, priority: int = 2) -> Future[int]:
+    # Write-behind: returns at once with a future for the row id; the insert commits with the next batch.
+    return write_behind.submit("INSERT INTO memories (client_id,memory,source,priority) VALUES (?,?,?,?)", (client_id, memory, "bizhaven", priority))
+
+
+def audit(action: str, entity: str | None = None, entity_id: int | None = None, **detail: Any) -> Future[int]:
+    # Stamped at call time rather than at commit, since the write-behind batch may land a few ms later.
+    at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return write_behind.submit(
+        "INSERT INTO audit_events (at,action,entity,entity_id,detail) VALUES (?,?,?,?,?)",
+        (at, action, entity, entity_id, json.dumps(detail, default=str) if detail else None),
+    )
 
 
-def memoria_autosave(client_id: int, memory: str, priority: int = 2) -> int:
-    return execute("INSERT INTO memories (client_id,memory,source,priority) VALUES (?,?,?,?)", (client_id, memory, "bizhaven", priority))
+def audit_events(entity: str | None = None, entity_id: int | None = None, limit: int = 100) -> list[dict[str, Any]]:
+    where, params = [], []
+    if entity is not None:
+        where.append("entity=?")
+        params.append(entity)
+    if entity_id is not None:
+        where.append("entity_id=?")
+        params.append(entity_id)
+    query = "SELECT * FROM audit_events" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY id DESC LIMIT ?"
+    return fetch_all(query, (*params, limit))
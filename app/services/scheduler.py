@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+from app.core.config import SCHEDULER_INTERVAL_SECONDS
+from app.core.database import init_db
+from app.services.reminders import dispatch_reminders
+from app.services.repository import run_recurring_invoices
+
+logger = logging.getLogger(__name__)
+
+
+class JobBusy(RuntimeError):
+    pass
+
+
+class Scheduler:
+    def __init__(self, interval: float = SCHEDULER_INTERVAL_SECONDS) -> None:
+        self.interval = interval
+        self.jobs: dict[str, Callable[[], Any]] = {}
+        self.last_results: dict[str, dict[str, Any]] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._run_lock = threading.Lock()
+
+    def add_job(self, name: str, fn: Callable[[], Any]) -> None:
+        self.jobs[name] = fn
+
+    def run_job(self, name: str, wait: bool = True) -> dict[str, Any]:
+        # Serialized so a manual trigger never overlaps the background loop. Callers on a shared executor lane pass
+        # wait=False: a run already in progress (say, reminders stuck on SMTP) raises JobBusy instead of parking the worker.
+        if not self._run_lock.acquire(blocking=wait):
+            raise JobBusy("A background job is already running; try again shortly")
+        try:
+            started = time.perf_counter()
+            try:
+                result = {"ok": True, "result": self.jobs[name]()}
+            except Exception as exc:
+                logger.exception("scheduled job %s failed", name)
+                result = {"ok": False, "error": str(exc)}
+            result["ran_at"] = datetime.now().isoformat(timespec="seconds")
+            result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            self.last_results[name] = result
+            return result
+        finally:
+            self._run_lock.release()
+
+    def run_pending(self) -> dict[str, dict[str, Any]]:
+        return {name: self.run_job(name) for name in list(self.jobs)}
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="bizhaven-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def build_scheduler(interval: float = SCHEDULER_INTERVAL_SECONDS) -> Scheduler:
+    scheduler = Scheduler(interval)
+    scheduler.add_job("recurring_invoices", run_recurring_invoices)
+    scheduler.add_job("reminders", dispatch_reminders)
+    return scheduler
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="Run BizHaven background jobs headless.")
+    parser.add_argument("--once", action="store_true", help="run every job once and exit")
+    parser.add_argument("--interval", type=float, default=SCHEDULER_INTERVAL_SECONDS, help="seconds between runs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    init_db()
+    scheduler = build_scheduler(args.interval)
+    if args.once:
+        for name, result in scheduler.run_pending().items():
+            logger.info("%s: %s", name, result)
+        return
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    run()
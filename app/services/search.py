@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+from app.core.config import SEARCH_LIMIT
+from app.services.repository import fetch_all, fetch_one
+
+KINDS = {"client": 1, "project": 2, "invoice": 3}
+
+# Title matches outweigh body matches; the kind column is unindexed and carries no weight.
+SEARCH_SQL = "SELECT rowid, kind, title FROM search_index WHERE search_index MATCH ? ORDER BY bm25(search_index, 0.0, 10.0, 1.0) LIMIT ?"
+KIND_SEARCH_SQL = "SELECT rowid, kind, title FROM search_index WHERE search_index MATCH ? AND kind=? ORDER BY bm25(search_index, 0.0, 10.0, 1.0) LIMIT ?"
+
+DETAIL_QUERIES = {
+    "client": "SELECT id, COALESCE(email, '') AS detail FROM clients WHERE id IN (SELECT value FROM json_each(?))",
+    "project": """
+        SELECT p.id, COALESCE(c.name, '') || ' · ' || COALESCE(p.status, '') AS detail
+        FROM projects p LEFT JOIN clients c ON c.id=p.client_id
+        WHERE p.id IN (SELECT value FROM json_each(?))
+    """,
+    "invoice": """
+        SELECT i.id, COALESCE(c.name, '') || ' · ' || COALESCE(i.status, '') || ' · $' || printf('%.2f', i.balance_due) AS detail
+        FROM invoices i LEFT JOIN clients c ON c.id=i.client_id
+        WHERE i.id IN (SELECT value FROM json_each(?))
+    """,
+}
+RECENT_QUERIES = {
+    "client": "SELECT id, name AS title FROM clients ORDER BY id DESC LIMIT ?",
+    "project": "SELECT id, name AS title FROM projects ORDER BY id DESC LIMIT ?",
+    "invoice": "SELECT id, invoice_number AS title FROM invoices ORDER BY id DESC LIMIT ?",
+}
+PREFIX_QUERIES = {
+    "client": "SELECT id, name AS title FROM clients WHERE name LIKE ? ESCAPE '\\' ORDER BY name LIMIT ?",
+    "project": "SELECT id, name AS title FROM projects WHERE name LIKE ? ESCAPE '\\' ORDER BY name LIMIT ?",
+    "invoice": "SELECT id, invoice_number AS title FROM invoices WHERE invoice_number LIKE ? ESCAPE '\\' ORDER BY invoice_number LIMIT ?",
+}
+
+_fts_ready: bool | None = None
+
+
+def _has_fts() -> bool:
+    global _fts_ready
+    if _fts_ready is None:
+        _fts_ready = fetch_one("SELECT 1 AS ok FROM sqlite_master WHERE type='table' AND name='search_index'") is not None
+    return _fts_ready
+
+
+def _match_expression(q: str) -> str | None:
+    # Every typed token must prefix-match; quoting keeps FTS5 syntax in user input inert.
+    tokens = re.findall(r"\w+", q.lower())
+    return " ".join('"' + token + '"*' for token in tokens) or None
+
+
+def _like_prefix(q: str) -> str:
+    # Typed % and _ are literal characters, not wildcards.
+    escaped = q.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def _with_details(hits: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    for kind, sql in DETAIL_QUERIES.items():
+        ids = [hit["id"] for hit in hits if hit["kind"] == kind]
+        if ids:
+            details = {row["id"]: row["detail"] for row in fetch_all(sql, (json.dumps(ids),))}
+            for hit in hits:
+                if hit["kind"] == kind:
+                    hit["detail"] = details.get(hit["id"], "")
+    return hits
+
+
+def recent(kind: str, limit: int = SEARCH_LIMIT) -> list[dict[str, Any]]:
+    rows = fetch_all(RECENT_QUERIES[kind], (limit,))
+    return _with_details([{"kind": kind, "id": row["id"], "title": row["title"], "detail": ""} for row in rows])
+
+
+def search(q: str, kind: str | None = None, limit: int = SEARCH_LIMIT) -> list[dict[str, Any]]:
+    if kind is not None and kind not in KINDS:
+        raise ValueError(f"Unknown search kind: {kind}")
+    expression = _match_expression(q)
+    if expression is None:
+        return recent(kind, limit) if kind else []
+    if _has_fts():
+        rows = fetch_all(SEARCH_SQL, (expression, limit)) if kind is None else fetch_all(KIND_SEARCH_SQL, (expression, kind, limit))
+        hits = [{"kind": row["kind"], "id": row["rowid"] // 4, "title": row["title"], "detail": ""} for row in rows]
+    else:
+        hits = []
+        for name in [kind] if kind else list(KINDS):
+            rows = fetch_all(PREFIX_QUERIES[name], (_like_prefix(q), limit))
+            hits.extend({"kind": name, "id": row["id"], "title": row["title"], "detail": ""} for row in rows)
+        hits = hits[:limit]
+    return _with_details(hits)
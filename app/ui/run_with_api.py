@@ -1,5 +1,6 @@
+from app.core.config import API_HOST, API_PORT
 from app.main import start_embedded_api
 
 if __name__ == "__main__":
     start_embedded_api()
-    print("Embedded API started on http://127.0.0.1:8090")
+    print(f"Embedded API started on http://{API_HOST}:{API_PORT}")
@@ -1,33 +1,68 @@
 from __future__ import annotations
 
-import csv
 import json
 from datetime import date
 from pathlib import Path
 
 import streamlit as st
 
+from app.core.config import PAGE_SIZE
 from app.core.database import init_db
+from app.services.agents import AgentWorkerPool, agent_queue_stats, enqueue_agent_task
 from app.services.assistant import ask_bizhaven, generate_contract, generate_follow_up_email, generate_quote
+from app.services.backup import create_backup, list_backups
+from app.services.exports import EXPORTS, FORMATS, export_filename, write_export
+from app.services.files import list_files, store_file
+from app.services.reminders import dispatch_reminders, pending_reminders
 from app.services.repository import (
     add_invoice_with_items,
-    backup_database,
+    audit,
     dashboard_summary,
     ensure_client_portal_token,
     estimate_tax,
     execute,
     expense_category_breakdown,
     export_tax_summary,
-    fetch_all,
+    fetch_all_cached,
+    list_page,
     memoria_autosave,
     profit_loss,
-    run_recurring_invoices,
-    update_invoice_payment_status,
+    record_payment,
 )
+from app.services.search import search
 
 init_db()
 st.set_page_config(page_title="BizHaven", page_icon="🏡", layout="wide")
 
+
+def paged_table(name: str, **filters) -> list[dict]:
+    state_key = f"cursors_{name}_{sorted(filters.items())}"
+    cursors = st.session_state.setdefault(state_key, [None])
+    page = list_page(name, PAGE_SIZE, cursors[-1], **filters)
+    st.dataframe(page["items"], use_container_width=True)
+    prev_col, info_col, next_col = st.columns([1, 4, 1])
+    info_col.caption(f"Page {len(cursors)}")
+    if prev_col.button("◀ Prev", key=f"{state_key}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if next_col.button("Next ▶", key=f"{state_key}_next", disabled=not page["next_cursor"]):
+        cursors.append(page["next_cursor"])
+        st.rerun()
+    return page["items"]
+
+
+def search_picker(label: str, kind: str, key: str, optional: bool = False) -> int | None:
+    # Typeahead over the search index; with an empty box it offers the most recent records.
+    query = st.text_input(f"Find {label.lower()}", key=f"{key}_q", placeholder="Type a few letters…")
+    hits = search(query, kind)
+    options = {"None": None} if optional else {}
+    options |= {f"{h['title']} — {h['detail']} (#{h['id']})" if h["detail"] else f"{h['title']} (#{h['id']})": h["id"] for h in hits}
+    if not options:
+        st.caption(f"No matching {label.lower()}s.")
+        return None
+    return options[st.selectbox(label, list(options), key=key)]
+
+
 if "theme" not in st.session_state:
     st.session_state.theme = "Dark"
 
@@ -65,9 +100,6 @@ menu = st.sidebar.radio(
 )
 
 if menu == "Dashboard":
-    created = run_recurring_invoices()
-    if created:
-        st.success(f"Auto-generated {created} recurring invoice(s).")
     s = dashboard_summary()
     c1, c2, c3, c4, c5 = st.columns(5)
     c1.metric("Earnings", f"${s['earnings']:,.2f}")
@@ -77,21 +109,19 @@ if menu == "Dashboard":
     c5.metric("Active Projects", s["active_projects"])
 
     st.subheader("Pending Reminders")
-    reminders = fetch_all(
-        "SELECT r.reminder_date, i.invoice_number, c.name AS client_name FROM reminders r JOIN invoices i ON i.id=r.invoice_id JOIN clients c ON c.id=i.client_id WHERE r.sent=0 ORDER BY r.reminder_date"
-    )
-    st.dataframe(reminders, use_container_width=True)
+    st.dataframe(pending_reminders(), use_container_width=True)
+    if st.button("Send due reminders now"):
+        result = dispatch_reminders()
+        st.success(f"Sent {result['sent']}, skipped {result['skipped']} paid, {result['retrying'] + result['failed']} failed in {result['duration_ms']} ms.")
 
 elif menu == "Recurring & Advanced Invoicing":
-    clients = fetch_all("SELECT id, name FROM clients ORDER BY name")
-    projects = fetch_all("SELECT id, name FROM projects ORDER BY name")
-    client_map = {f"{c['name']} (#{c['id']})": c["id"] for c in clients}
-    project_map = {"None": None} | {f"{p['name']} (#{p['id']})": p["id"] for p in projects}
-
     st.subheader("Create Advanced Invoice")
+    p1, p2 = st.columns(2)
+    with p1:
+        client_id = search_picker("Client", "client", "invoice_client")
+    with p2:
+        project_id = search_picker("Project", "project", "invoice_project", optional=True)
     with st.form("advanced_invoice"):
-        choice = st.selectbox("Client", ["-- No Clients --"] + list(client_map.keys()))
-        project_choice = st.selectbox("Project", list(project_map.keys()))
         invoice_number = st.text_input("Invoice Number", value=f"INV-{date.today().strftime('%Y%m%d')}")
         issue_date = st.date_input("Issue Date", value=date.today())
         due_date = st.date_input("Due Date", value=date.today())
@@ -115,7 +145,7 @@ elif menu == "Recurring & Advanced Invoicing":
         notes = st.text_area("Notes", value="Thank you for your business.")
         submitted = st.form_submit_button("Save Invoice")
 
-    if submitted and choice != "-- No Clients --":
+    if submitted and client_id is not None:
         items = [
             {"description": d1, "quantity": q1, "rate": r1, "taxable": t1},
             {"description": d2, "quantity": q2, "rate": r2, "taxable": t2},
@@ -123,8 +153,8 @@ elif menu == "Recurring & Advanced Invoicing":
         items = [i for i in items if i["description"] and i["quantity"] > 0]
         iid = add_invoice_with_items(
             {
-                "client_id": client_map[choice],
-                "project_id": project_map[project_choice],
+                "client_id": client_id,
+                "project_id": project_id,
                 "invoice_number": invoice_number,
                 "issue_date": str(issue_date),
                 "due_date": str(due_date),
@@ -140,37 +170,37 @@ elif menu == "Recurring & Advanced Invoicing":
         )
         st.success(f"Invoice #{iid} created.")
 
-    invoices = fetch_all(
-        "SELECT i.*, c.name AS client_name, COALESCE((SELECT SUM(amount) FROM payments p WHERE p.invoice_id=i.id),0) AS paid FROM invoices i LEFT JOIN clients c ON c.id=i.client_id ORDER BY i.created_at DESC"
-    )
-    st.dataframe(invoices, use_container_width=True)
+    status_filter = st.selectbox("Status filter", ["all", "sent", "partial", "paid", "draft"])
+    paged_table("invoices", status=None if status_filter == "all" else status_filter)
 
-    if invoices:
-        st.subheader("Record Partial/Full Payment")
-        id_map = {f"{inv['invoice_number']} ({inv['client_name']})": inv["id"] for inv in invoices}
+    st.subheader("Record Partial/Full Payment")
+    pay_invoice_id = search_picker("Invoice", "invoice", "payment_invoice")
+    if pay_invoice_id is not None:
         with st.form("payment_form"):
-            inv_choice = st.selectbox("Invoice", list(id_map.keys()))
             amount = st.number_input("Amount", min_value=0.0, key="pay_amt")
             method = st.selectbox("Method", ["cash", "bank", "card", "check", "zelle", "ach"])
             paid_on = st.date_input("Paid On", value=date.today(), key="paid_on")
             submit_payment = st.form_submit_button("Record Payment")
         if submit_payment:
-            iid = id_map[inv_choice]
-            execute("INSERT INTO payments (invoice_id,amount,method,paid_on) VALUES (?,?,?,?)", (iid, amount, method, str(paid_on)))
-            update_invoice_payment_status(iid)
+            record_payment(pay_invoice_id, amount, method, str(paid_on))
             st.success("Payment recorded.")
 
 elif menu == "Reporting & Insights":
+    start = end = None
+    if st.checkbox("Limit reports to a date range"):
+        r1, r2 = st.columns(2)
+        start = r1.date_input("From", value=date(date.today().year, 1, 1))
+        end = r2.date_input("Until (exclusive)", value=date.today())
     st.subheader("Profit & Loss")
     period = st.segmented_control("Period", ["monthly", "quarterly"], default="monthly")
-    rows = profit_loss(period)
+    rows = profit_loss(period, start, end)
     st.dataframe(rows, use_container_width=True)
     if rows:
         chart_data = {"period": [r["period"] for r in rows], "profit": [r["profit"] for r in rows]}
         st.bar_chart(chart_data, x="period", y="profit")
 
     st.subheader("Expense Categories")
-    cats = expense_category_breakdown()
+    cats = expense_category_breakdown(start, end)
     st.dataframe(cats, use_container_width=True)
     if cats:
         pie_df = {"category": [c["category"] for c in cats], "total": [c["total"] for c in cats]}
@@ -197,39 +227,37 @@ elif menu == "Client & Project Management":
             cid = execute("INSERT INTO clients (name,email,phone,notes) VALUES (?,?,?,?)", (name, email, phone, notes))
             token = ensure_client_portal_token(cid)
             memoria_autosave(cid, f"Client note: {notes or 'No notes'}", priority=2)
+            audit("client.created", "client", cid)
             st.success(f"Client saved. Portal token: {token}")
 
     with right:
         st.subheader("Add Project")
-        clients = fetch_all("SELECT id, name FROM clients ORDER BY name")
-        c_map = {f"{c['name']} (#{c['id']})": c["id"] for c in clients}
+        project_client_id = search_picker("Client", "client", "project_client")
         with st.form("project_form"):
-            client_choice = st.selectbox("Client", list(c_map.keys()) if c_map else ["No clients"])
             pname = st.text_input("Project Name")
             pdesc = st.text_area("Description")
             pbudget = st.number_input("Budget", min_value=0.0)
             pstatus = st.selectbox("Status", ["active", "on_hold", "completed"])
             psubmit = st.form_submit_button("Save Project")
-        if psubmit and c_map and pname:
-            execute(
+        if psubmit and project_client_id is not None and pname:
+            pid = execute(
                 "INSERT INTO projects (client_id,name,description,status,start_date,budget) VALUES (?,?,?,?,?,?)",
-                (c_map[client_choice], pname, pdesc, pstatus, str(date.today()), pbudget),
+                (project_client_id, pname, pdesc, pstatus, str(date.today()), pbudget),
             )
-            memoria_autosave(c_map[client_choice], f"Project updated: {pname}", priority=3)
+            memoria_autosave(project_client_id, f"Project updated: {pname}", priority=3)
+            audit("project.created", "project", pid, client_id=project_client_id)
             st.success("Project created.")
 
     st.subheader("Clients + Projects")
-    clients = fetch_all("SELECT * FROM clients ORDER BY created_at DESC")
-    projects = fetch_all("SELECT p.*, c.name AS client_name FROM projects p LEFT JOIN clients c ON c.id=p.client_id ORDER BY p.created_at DESC")
-    st.dataframe(clients, use_container_width=True)
-    st.dataframe(projects, use_container_width=True)
+    clients = paged_table("clients")
+    paged_table("projects")
 
     st.subheader("Client Portal Preview")
     if clients:
         cmap = {c["name"]: c for c in clients}
         cselect = st.selectbox("Select Client", list(cmap.keys()))
         token = ensure_client_portal_token(cmap[cselect]["id"])
-        invoices = fetch_all("SELECT invoice_number,due_date,status,total FROM invoices WHERE client_id=? ORDER BY due_date DESC", (cmap[cselect]["id"],))
+        invoices = fetch_all_cached(("invoices",), "SELECT invoice_number,due_date,status,total FROM invoices WHERE client_id=? ORDER BY due_date DESC", (cmap[cselect]["id"],))
         st.code(f"/portal/{token}")
         st.dataframe(invoices, use_container_width=True)
 
@@ -248,10 +276,16 @@ elif menu == "Contracts & Documents":
         st.text_area("Draft", value=generate_contract(c_name, p_name, fee), height=240)
 
     uploaded = st.file_uploader("Store document locally")
+    # Streamlit reruns the page on every widget change; store each selected upload once.
+    if uploaded and st.session_state.get("stored_upload", {}).get("file_id") != uploaded.file_id:
+        st.session_state.stored_upload = {"file_id": uploaded.file_id, **store_file(uploaded, uploaded.name, uploaded.type)}
     if uploaded:
-        out = Path("data/documents") / uploaded.name
-        out.write_bytes(uploaded.read())
-        st.success(f"Stored at {out}")
+        stored = st.session_state.stored_upload
+        note = "was already stored, linked again" if stored["deduplicated"] else "stored"
+        st.success(f"{stored['filename']} {note} as {stored['sha256'][:12]}…")
+    docs = list_files("document", limit=20)
+    if docs:
+        st.dataframe([{k: d[k] for k in ("filename", "size", "created_at", "sha256")} for d in docs], use_container_width=True)
 
 elif menu == "Ask BizHaven (AI)":
     st.subheader("Ask BizHaven")
@@ -277,39 +311,63 @@ elif menu == "Ask BizHaven (AI)":
 elif menu == "Backup & Export":
     st.subheader("Data Backups")
     if st.button("Create backup snapshot"):
-        path = backup_database(Path("data/exports/backup_snapshot.json"))
-        st.success(f"Backup created: {path}")
-    st.subheader("Export Invoices CSV")
-    invoices = fetch_all("SELECT * FROM invoices ORDER BY created_at DESC")
-    if invoices:
-        csv_path = Path("data/exports/invoices_export.csv")
-        csv_path.parent.mkdir(parents=True, exist_ok=True)
-        with csv_path.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=invoices[0].keys())
-            writer.writeheader()
-            writer.writerows(invoices)
-        st.download_button("Download invoices export", csv_path.read_text(encoding="utf-8"), file_name=csv_path.name)
+        result = create_backup()
+        st.success(
+            f"Backup created: {result['path']} — {result['size_bytes'] / 1e6:,.2f} MB compressed, "
+            f"{result['duration_s']:.2f}s, {result['throughput_mb_s']} MB/s"
+        )
+    snapshots = list_backups()
+    if snapshots:
+        st.dataframe([{"snapshot": p.name, "size_mb": round(p.stat().st_size / 1e6, 2)} for p in snapshots], use_container_width=True)
+    st.subheader("Export Data")
+    e1, e2, e3 = st.columns(3)
+    dataset = e1.selectbox("Dataset", list(EXPORTS))
+    fmt = e2.selectbox("Format", list(FORMATS))
+    compress = e3.checkbox("gzip", value=False)
+    start = end = None
+    if st.checkbox("Limit export to a date range"):
+        r1, r2 = st.columns(2)
+        start = r1.date_input("From", value=date(date.today().year, 1, 1), key="export_from")
+        end = r2.date_input("Until (exclusive)", value=date.today(), key="export_until")
+    if st.button("Prepare export"):
+        out = write_export(Path("data/exports") / export_filename(dataset, fmt, compress), dataset, fmt, start, end, compress)
+        st.session_state.export_path = str(out)
+    if st.session_state.get("export_path") and Path(st.session_state.export_path).exists():
+        out = Path(st.session_state.export_path)
+        with out.open("rb") as f:
+            st.download_button(f"Download {out.name}", f, file_name=out.name)
 
 elif menu == "Triad369 Integration":
     st.subheader("Agentora + Memoria")
     st.write("Local bridge queue for agent-powered client communication and memory autosave.")
 
-    tasks = fetch_all("SELECT a.*, c.name AS client_name FROM agent_tasks a LEFT JOIN clients c ON c.id=a.client_id ORDER BY a.created_at DESC")
-    st.dataframe(tasks, use_container_width=True)
-
-    clients = fetch_all("SELECT id, name FROM clients ORDER BY name")
-    cmap = {f"{c['name']} (#{c['id']})": c["id"] for c in clients}
+    queue = agent_queue_stats()
+    q1, q2, q3, q4 = st.columns(4)
+    q1.metric("Queued", queue["by_status"].get("queued", 0))
+    q2.metric("Running", queue["by_status"].get("running", 0))
+    q3.metric("Done", queue["by_status"].get("done", 0))
+    q4.metric("Failed", queue["by_status"].get("failed", 0))
+    if st.button("Process queued tasks now"):
+        pool = AgentWorkerPool(executor="thread")
+        processed = pool.drain()
+        pool.stop()
+        st.success(f"Processed {processed} task(s); messages are in data/outbox/outbox.jsonl.")
+
+    task_status = st.selectbox("Task status", ["all", "queued", "running", "done", "failed"])
+    paged_table("agent_tasks", status=None if task_status == "all" else task_status)
+
+    task_client_id = search_picker("Client", "client", "agent_client")
     with st.form("agent_task_form"):
-        client_sel = st.selectbox("Client", list(cmap.keys()) if cmap else ["No clients"])
         ttype = st.selectbox("Agent task", ["follow_up", "check_in", "payment_reminder", "proposal_nudge"])
         payload = st.text_area("Payload", value=json.dumps({"channel": "email", "tone": "friendly"}, indent=2))
         q = st.form_submit_button("Queue task")
-    if q and cmap:
-        execute("INSERT INTO agent_tasks (client_id,task_type,payload,status) VALUES (?,?,?,?)", (cmap[client_sel], ttype, payload, "queued"))
-        memoria_autosave(cmap[client_sel], f"Queued Agentora task: {ttype}", priority=2)
+    if q and task_client_id is not None:
+        enqueue_agent_task(task_client_id, ttype, payload)
+        memoria_autosave(task_client_id, f"Queued Agentora task: {ttype}", priority=2)
         st.success("Task queued.")
 
-    memories = fetch_all("SELECT m.*, c.name as client_name FROM memories m LEFT JOIN clients c ON c.id=m.client_id ORDER BY m.priority DESC, m.created_at DESC")
+    memories = fetch_all_cached(("memories", "clients"), "SELECT m.*, c.name as client_name FROM memories m LEFT JOIN clients c ON c.id=m.client_id ORDER BY m.priority DESC, m.created_at DESC LIMIT 200")
+    st.caption("Top 200 memories by priority; Ask BizHaven searches all of them.")
     st.dataframe(memories, use_container_width=True)
 
     st.code(
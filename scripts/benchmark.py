@@ -0,0 +1,172 @@
+from pathlib import Path
+import argparse
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.core.config import APP_VERSION, DATA_DIR
+from generate_dataset import ANCHOR, TIERS
+
+BENCH_DIR = DATA_DIR / "bench"
+RESULTS_DIR = DATA_DIR / "benchmarks"
+
+
+def _cases() -> dict:
+    from app.services.repository import add_invoice_with_items, dashboard_summary, estimate_tax, export_tax_summary, profit_loss, run_recurring_invoices
+
+    export_path = Path(tempfile.mkdtemp()) / "tax_summary.csv"
+    numbers = iter(range(1, 10**9))
+    # (function, needs a rolled-back transaction)
+    return {
+        "dashboard_summary": (dashboard_summary, False),
+        "profit_loss": (lambda: profit_loss("monthly"), False),
+        "profit_loss_quarterly_last_year": (lambda: profit_loss("quarterly", f"{ANCHOR.year - 1}-01-01", f"{ANCHOR.year}-01-01"), False),
+        "estimate_tax_month": (lambda: estimate_tax(f"{ANCHOR:%Y-%m}"), False),
+        "estimate_tax_all": (estimate_tax, False),
+        "export_tax_summary": (lambda: export_tax_summary(export_path, str(ANCHOR.year - 1)), False),
+        "run_recurring_invoices": (lambda: run_recurring_invoices(ANCHOR), True),
+        "add_invoice_with_items": (
+            lambda: add_invoice_with_items(
+                {
+                    "client_id": 1,
+                    "project_id": 1,
+                    "invoice_number": f"BENCH-{next(numbers)}",
+                    "issue_date": str(ANCHOR),
+                    "due_date": str(ANCHOR),
+                    "items": [{"description": "Design", "quantity": 4, "rate": 150}, {"description": "Hosting", "quantity": 1, "rate": 30, "taxable": False}],
+                    "tax_rate": 0.08,
+                }
+            ),
+            True,
+        ),
+    }
+
+
+def _time(fn, rollback: bool) -> float:
+    from app.core.database import get_conn
+
+    if not rollback:
+        started = time.perf_counter()
+        fn()
+        return time.perf_counter() - started
+    # Writes run inside an outer transaction that is rolled back, so every run sees the same seeded data.
+    with get_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            started = time.perf_counter()
+            fn()
+            return time.perf_counter() - started
+        finally:
+            conn.rollback()
+
+
+def measure(repeat: int, only: list[str] | None = None) -> dict:
+    from app.core.database import get_conn, init_db
+
+    init_db()
+    with get_conn() as conn:
+        counts = {table: conn.execute(f"SELECT COUNT(*) AS n FROM {table}").fetchone()["n"] for table in ("clients", "invoices", "invoice_items", "payments", "expenses", "reminders", "memories")}
+    results = {}
+    for name, (fn, rollback) in _cases().items():
+        if only and name not in only:
+            continue
+        _time(fn, rollback)  # warm the page cache and statement cache
+        runs = sorted(_time(fn, rollback) * 1000 for _ in range(repeat))
+        results[name] = {
+            "runs": repeat,
+            "min_ms": round(runs[0], 3),
+            "median_ms": round(statistics.median(runs), 3),
+            "p95_ms": round(runs[min(len(runs) - 1, int(len(runs) * 0.95))], 3),
+            "mean_ms": round(statistics.fmean(runs), 3),
+        }
+    return {"rows": counts, "results": results}
+
+
+def _tier_env(tier: str) -> dict[str, str]:
+    # Benchmarks measure the database, so the query cache and background jobs stay off.
+    return {**os.environ, "BIZHAVEN_DATA_DIR": str(BENCH_DIR / tier), "BIZHAVEN_QUERY_CACHE": "0", "BIZHAVEN_SCHEDULER": "0"}
+
+
+def run_tier(tier: str, seed: int, repeat: int, only: list[str] | None, regenerate: bool) -> dict:
+    db = BENCH_DIR / tier / "bizhaven.db"
+    generate_s = None
+    if regenerate or not db.exists():
+        for path in db.parent.glob("bizhaven.db*"):
+            path.unlink()
+        started = time.perf_counter()
+        subprocess.run([sys.executable, str(ROOT / "scripts" / "generate_dataset.py"), "--tier", tier, "--seed", str(seed)], env=_tier_env(tier), check=True, stdout=subprocess.DEVNULL)
+        generate_s = round(time.perf_counter() - started, 2)
+    # Each tier runs in a fresh interpreter so connection pools and caches never leak between tiers.
+    command = [sys.executable, __file__, "--measure", "--repeat", str(repeat), *(["--only", *only] if only else [])]
+    output = subprocess.run(command, env=_tier_env(tier), check=True, capture_output=True, text=True).stdout
+    return {"seed": seed, "generate_s": generate_s, "db_bytes": db.stat().st_size, **json.loads(output)}
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for tier, result in current["tiers"].items():
+        base = baseline.get("tiers", {}).get(tier, {}).get("results", {})
+        for name, stats in result["results"].items():
+            if name not in base or not base[name]["median_ms"]:
+                continue
+            ratio = stats["median_ms"] / base[name]["median_ms"]
+            flag = "REGRESSION" if ratio > threshold else ""
+            print(f"{tier:8} {name:34} {base[name]['median_ms']:10.3f} -> {stats['median_ms']:10.3f} ms  x{ratio:5.2f} {flag}")
+            if flag:
+                regressions.append(f"{tier}/{name}")
+    return regressions
+
+
+def run() -> int:
+    parser = argparse.ArgumentParser(description="Time repository functions against seeded datasets at each scale tier.")
+    parser.add_argument("--tiers", nargs="+", choices=TIERS, default=["small", "medium"])
+    parser.add_argument("--only", nargs="+", help="benchmark only these functions")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=369)
+    parser.add_argument("--regenerate", action="store_true", help="rebuild tier datasets even if they exist")
+    parser.add_argument("--output", help="results file (default data/benchmarks/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare medians against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="median ratio that counts as a regression")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.repeat, args.only)))
+        return 0
+
+    now = datetime.now(timezone.utc)
+    report = {
+        "created_at": now.isoformat(timespec="seconds"),
+        "app_version": APP_VERSION,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "tiers": {},
+    }
+    for tier in args.tiers:
+        report["tiers"][tier] = run_tier(tier, args.seed, args.repeat, args.only, args.regenerate)
+        for name, stats in report["tiers"][tier]["results"].items():
+            print(f"{tier:8} {name:34} median {stats['median_ms']:10.3f} ms  p95 {stats['p95_ms']:10.3f} ms")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"bench-{now:%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"results written to {output}")
+    if args.compare:
+        return 1 if compare(report, json.loads(Path(args.compare).read_text()), args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run())
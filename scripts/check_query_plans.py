@@ -0,0 +1,131 @@
+from pathlib import Path
+import argparse
+import ast
+import os
+import re
+import sys
+import tempfile
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.core.database import get_conn, init_db
+from app.services.repository import LIST_FILTERS, LIST_QUERIES, encode_cursor, keyset_query
+
+SOURCES = [
+    ROOT / "app" / "services" / "repository.py",
+    ROOT / "app" / "services" / "assistant.py",
+    ROOT / "app" / "services" / "exports.py",
+    ROOT / "app" / "services" / "agents.py",
+    ROOT / "app" / "services" / "reminders.py",
+    ROOT / "app" / "services" / "memoria.py",
+    ROOT / "app" / "services" / "search.py",
+    ROOT / "app" / "api" / "server.py",
+    ROOT / "app" / "ui" / "streamlit_app.py",
+]
+
+# Fragment of a hot query -> table names/aliases that must be reached through an index.
+HOT_QUERIES = {
+    "FROM clients WHERE portal_token=?": {"clients"},
+    "WHERE r.sent=0": {"r"},
+    "FROM reminders WHERE sent=0 AND reminder_date <= ?": {"reminders"},
+    "UPDATE reminders SET sent=0 WHERE sent=3 AND claimed_at < ?": {"reminders"},
+    "FROM payments WHERE paid_on >= ? AND paid_on < ?": {"payments"},
+    "FROM expenses WHERE expense_date >= ? AND expense_date < ?": {"expenses"},
+    "FROM invoices WHERE issue_date >= ? AND issue_date < ? ORDER BY issue_date, id": {"invoices"},
+    "FROM open_invoice_due_counts WHERE due_date >= ?": {"open_invoice_due_counts"},
+    "FROM dashboard_totals t WHERE t.id=1": {"t"},
+    "FROM invoices WHERE client_id=?": {"invoices"},
+    "FROM invoice_items WHERE invoice_id IN (SELECT value FROM json_each(?))": {"invoice_items"},
+    "FROM agent_tasks WHERE status='queued' AND available_at <= ?": {"agent_tasks"},
+    "FROM agent_tasks WHERE status='running' AND lease_expires_at < ?": {"agent_tasks"},
+    "FROM memories WHERE client_id=? ORDER BY priority DESC": {"memories"},
+    "WHERE i.id IN (SELECT value FROM json_each(?))": {"i"},
+    "FROM invoices WHERE recurring_rule IN ('weekly','monthly','quarterly') AND next_run_date IS NOT NULL": {"invoices"},
+}
+
+SQL_START = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\s")
+SCAN = re.compile(r"^SCAN (\w+)")
+
+
+def _normalize(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def collect_queries(paths: list[Path]) -> list[tuple[str, int, str]]:
+    found = []
+    for path in paths:
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        # Literal pieces of f-strings are fragments of dynamically built SQL, not runnable statements.
+        fragments = {id(part) for node in ast.walk(tree) if isinstance(node, ast.JoinedStr) for part in node.values}
+        for node in ast.walk(tree):
+            if id(node) not in fragments and isinstance(node, ast.Constant) and isinstance(node.value, str) and SQL_START.match(node.value):
+                found.append((path.relative_to(ROOT).as_posix(), node.lineno, _normalize(node.value)))
+    return sorted(found)
+
+
+def explain(sql: str) -> list[str]:
+    with get_conn() as conn:
+        params = (None,) * sql.count("?")
+        return [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def check_list_pages(verbose: bool = False) -> list[str]:
+    # Keyset pages must come straight off an index; a temp B-tree sort means the page cost grows with the table.
+    failures = []
+    for name, filters in LIST_FILTERS.items():
+        cursor = encode_cursor([None] * len(LIST_QUERIES[name][1]))
+        for variant in [{}] + [{key: None} for key in filters]:
+            for page_cursor in (None, cursor):
+                sql, params = keyset_query(name, {key: "x" for key in variant}, 50, page_cursor)
+                with get_conn() as conn:
+                    plan = [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+                if verbose:
+                    print(f"list_page({name!r}, {sorted(variant)}, cursor={page_cursor is not None}): {sql}")
+                    for detail in plan:
+                        print(f"    {detail}")
+                # Re-sorting a subquery's rows is fine: keyset_query only builds subqueries that walk an index under a LIMIT.
+                sorts = [detail for before, detail in zip(["", *plan], plan) if "TEMP B-TREE" in detail and "ORDER BY" in detail and not before.startswith("SCAN (subquery-")]
+                if sorts:
+                    failures.append(f"list_page({name!r}) with filters {sorted(variant)} sorts instead of walking an index: {sql}")
+    return failures
+
+
+def check(verbose: bool = False) -> list[str]:
+    failures = []
+    seen = set()
+    for source, line, sql in collect_queries(SOURCES):
+        plan = explain(sql)
+        if verbose:
+            print(f"{source}:{line}: {sql}")
+            for detail in plan:
+                print(f"    {detail}")
+        for fragment, guarded in HOT_QUERIES.items():
+            if _normalize(fragment) not in sql:
+                continue
+            seen.add(fragment)
+            scanned = {m.group(1) for m in (SCAN.match(detail) for detail in plan) if m}
+            for name in sorted(scanned & guarded):
+                failures.append(f"{source}:{line}: full SCAN of {name} in hot query: {sql}")
+    for fragment in HOT_QUERIES:
+        if fragment not in seen:
+            failures.append(f"hot query fragment no longer found in sources: {fragment}")
+    return failures
+
+
+def run() -> int:
+    parser = argparse.ArgumentParser(description="Fail if a hot BizHaven query falls back to a full table SCAN.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every query with its plan")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bizhaven-plans-"))
+    init_db()
+    failures = check(args.verbose) + check_list_pages(args.verbose)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(failures)} query plan regression(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run())
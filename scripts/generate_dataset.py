@@ -0,0 +1,226 @@
+from pathlib import Path
+import argparse
+from datetime import date, timedelta
+import json
+import random
+import sys
+import time
+from uuid import UUID
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import DB_PATH
+from app.core.database import get_conn, init_db, transaction
+from app.services.repository import _invoice_totals
+
+# Every other table is sized relative to clients and invoices.
+TIERS = {
+    "small": {"clients": 100, "invoices": 10_000},
+    "medium": {"clients": 1_000, "invoices": 100_000},
+    "large": {"clients": 10_000, "invoices": 1_000_000},
+}
+# All generated dates fall in the two years before ANCHOR, so a given seed always yields the same rows.
+ANCHOR = date(2026, 6, 30)
+SPAN_DAYS = 730
+CHUNK = 5000
+
+SYLLABLES = "ka lo mi ne ra so tu va ze bi co du fa ge hi jo lu me pa ri".split()
+TRADES = ["Bakery", "Repairs", "Studio", "Labs", "Co", "Consulting", "Landscaping", "Dental", "Florist", "Garage"]
+CATEGORIES = ["Software", "Hosting", "Travel", "Supplies", "Contractors", "Marketing", "Insurance", "Equipment"]
+VENDORS = ["Hosting Co", "Office Mart", "Cloud Suite", "Print Hub", "Air Lines", "Ad Network", "Freelance Pool"]
+SERVICES = ["Design", "Development", "Consulting", "Maintenance", "Support", "Copywriting", "SEO audit", "Hosting"]
+WORDS = (
+    "prefers morning calls pastel branding quick iterations monthly invoices budget tight deadline logo website "
+    "retainer quote revision milestone hosting seo copy pays late net30 weekend rush approval owner"
+).split()
+
+
+def _name(rng: random.Random) -> str:
+    return "".join(rng.choices(SYLLABLES, k=3)).title() + " " + rng.choice(TRADES)
+
+
+def _day(rng: random.Random) -> date:
+    return ANCHOR - timedelta(days=rng.randrange(SPAN_DAYS))
+
+
+def _next_id(conn, table: str) -> int:
+    return conn.execute(f"SELECT COALESCE(MAX(id),0) + 1 AS id FROM {table}").fetchone()["id"]
+
+
+def _insert(conn, table: str, columns: tuple[str, ...], rows: list[tuple]) -> None:
+    conn.executemany(f"INSERT INTO {table} ({','.join(columns)}) VALUES ({','.join('?' * len(columns))})", rows)
+
+
+def _clients(rng: random.Random, count: int) -> tuple[int, int]:
+    with transaction() as conn:
+        first = _next_id(conn, "clients")
+        rows = []
+        for cid in range(first, first + count):
+            name = _name(rng)
+            rows.append(
+                (
+                    cid,
+                    name,
+                    f"{name.split()[0].lower()}{cid}@example.test",
+                    f"555-{rng.randrange(10000):04d}",
+                    " ".join(rng.choices(WORDS, k=6)),
+                    str(UUID(int=rng.getrandbits(128), version=4)),
+                )
+            )
+        _insert(conn, "clients", ("id", "name", "email", "phone", "notes", "portal_token"), rows)
+    return first, first + count
+
+
+def _projects(rng: random.Random, clients: range) -> range:
+    with transaction() as conn:
+        first = _next_id(conn, "projects")
+        rows = []
+        for offset in range(len(clients) * 2):
+            start = _day(rng)
+            rows.append(
+                (
+                    first + offset,
+                    rng.choice(clients),
+                    f"{rng.choice(SERVICES)} for {_name(rng)}",
+                    " ".join(rng.choices(WORDS, k=5)),
+                    rng.choices(["active", "completed", "on_hold"], weights=[5, 4, 1])[0],
+                    str(start),
+                    rng.choice([500, 1500, 3000, 8000, 20000]),
+                )
+            )
+        _insert(conn, "projects", ("id", "client_id", "name", "description", "status", "start_date", "budget"), rows)
+    return range(first, first + len(rows))
+
+
+def _invoice_chunk(rng: random.Random, first: int, count: int, clients: range, projects: range) -> dict[str, list[tuple]]:
+    out: dict[str, list[tuple]] = {"invoices": [], "invoice_items": [], "payments": [], "reminders": []}
+    for iid in range(first, first + count):
+        issue = _day(rng)
+        due = issue + timedelta(days=rng.choice([14, 30]))
+        payload = {
+            "items": [
+                {"description": rng.choice(SERVICES), "quantity": rng.randint(1, 10), "rate": rng.choice([50, 75, 100, 150, 200]), "taxable": rng.random() < 0.8}
+                for _ in range(rng.randint(1, 5))
+            ],
+            "tax_rate": rng.choice([0.0, 0.05, 0.08]),
+            "discount": rng.choice([0, 0, 0, 25, 50]),
+        }
+        items, subtotal, tax, total = _invoice_totals(payload)
+        age = (ANCHOR - issue).days
+        status = rng.choices(["paid", "partial", "sent"], weights=[85, 10, 5] if age > 60 else [30, 20, 50])[0]
+        recurring = rng.random() < 0.005
+        # Templates come due within a month either side of ANCHOR, so a recurring run bills each at most once.
+        next_run = str(ANCHOR + timedelta(days=rng.randrange(-30, 30))) if recurring else None
+        out["invoices"].append(
+            (iid, rng.choice(clients), rng.choice(projects), f"INV-{iid:07d}", str(issue), str(due), status, payload["discount"], "{}", subtotal, tax, total, total, "", 3, "monthly" if recurring else "none", next_run)
+        )
+        out["invoice_items"].extend((iid, *item) for item in items)
+        if status == "paid" and total > 0:
+            if rng.random() < 0.3:
+                deposit = round(total * 0.5, 2)
+                out["payments"].append((iid, deposit, "bank", str(issue + timedelta(days=rng.randrange(1, 8))), "Deposit"))
+                out["payments"].append((iid, total - deposit, "bank", str(min(due + timedelta(days=rng.randrange(-10, 20)), ANCHOR)), ""))
+            else:
+                out["payments"].append((iid, total, rng.choice(["bank", "card", "cash"]), str(min(due + timedelta(days=rng.randrange(-10, 20)), ANCHOR)), ""))
+        elif status == "partial" and total > 0:
+            out["payments"].append((iid, round(total * rng.uniform(0.2, 0.8), 2), "card", str(min(issue + timedelta(days=rng.randrange(1, 20)), ANCHOR)), "Partial"))
+        out["reminders"].append((iid, str(due - timedelta(days=3)), "email", 1 if status == "paid" else 0))
+    return out
+
+
+def _invoices(rng: random.Random, count: int, clients: range, projects: range, progress: bool) -> dict[str, int]:
+    totals = {"invoices": 0, "invoice_items": 0, "payments": 0, "reminders": 0}
+    with get_conn() as conn:
+        first = _next_id(conn, "invoices")
+    for start in range(0, count, CHUNK):
+        rows = _invoice_chunk(rng, first + start, min(CHUNK, count - start), clients, projects)
+        # Payments go in after their invoices so the balance and dashboard triggers see each one land.
+        with transaction() as conn:
+            _insert(
+                conn,
+                "invoices",
+                ("id", "client_id", "project_id", "invoice_number", "issue_date", "due_date", "status", "discount", "custom_fields", "subtotal", "tax", "total", "balance_due", "notes", "reminder_days", "recurring_rule", "next_run_date"),
+                rows["invoices"],
+            )
+            _insert(conn, "invoice_items", ("invoice_id", "description", "quantity", "rate", "amount", "taxable"), rows["invoice_items"])
+            _insert(conn, "payments", ("invoice_id", "amount", "method", "paid_on", "notes"), rows["payments"])
+            _insert(conn, "reminders", ("invoice_id", "reminder_date", "channel", "sent"), rows["reminders"])
+        for table, table_rows in rows.items():
+            totals[table] += len(table_rows)
+        if progress and (totals["invoices"] % 100_000 == 0 or totals["invoices"] == count):
+            print(f"invoices: {totals['invoices']}/{count}", file=sys.stderr)
+    return totals
+
+
+def _expenses(rng: random.Random, count: int, projects: range) -> int:
+    for start in range(0, count, CHUNK):
+        rows = [
+            (rng.choice(projects), rng.choice(CATEGORIES), rng.choice(VENDORS), round(rng.uniform(5, 900), 2), str(_day(rng)), "")
+            for _ in range(min(CHUNK, count - start))
+        ]
+        with transaction() as conn:
+            _insert(conn, "expenses", ("project_id", "category", "vendor", "amount", "expense_date", "notes"), rows)
+    return count
+
+
+def _memories(rng: random.Random, clients: range) -> int:
+    rows = [
+        (cid, " ".join(rng.choices(WORDS, k=rng.randint(4, 10))), "memoria", rng.randint(1, 3), f"{_day(rng)} 09:00:00")
+        for cid in clients
+        for _ in range(5)
+    ]
+    with transaction() as conn:
+        _insert(conn, "memories", ("client_id", "memory", "source", "priority", "created_at"), rows)
+    return len(rows)
+
+
+def _agent_tasks(rng: random.Random, clients: range) -> int:
+    rows = [
+        (rng.choice(clients), rng.choice(["follow_up", "check_in", "payment_reminder", "proposal_nudge"]), '{"channel":"email"}', rng.choice(["queued", "done"]))
+        for _ in range(max(len(clients) // 2, 1))
+    ]
+    with transaction() as conn:
+        _insert(conn, "agent_tasks", ("client_id", "task_type", "payload", "status"), rows)
+    return len(rows)
+
+
+def generate(clients: int, invoices: int, seed: int = 369, progress: bool = False) -> dict[str, int]:
+    init_db()
+    rng = random.Random(seed)
+    client_ids = range(*_clients(rng, clients))
+    project_ids = _projects(rng, client_ids)
+    counts = {"clients": len(client_ids), "projects": len(project_ids)}
+    counts.update(_invoices(rng, invoices, client_ids, project_ids, progress))
+    counts["expenses"] = _expenses(rng, invoices // 4, project_ids)
+    counts["memories"] = _memories(rng, client_ids)
+    counts["agent_tasks"] = _agent_tasks(rng, client_ids)
+    with get_conn() as conn:
+        conn.execute("ANALYZE")
+    return counts
+
+
+def run() -> int:
+    parser = argparse.ArgumentParser(description="Fill the BizHaven database (BIZHAVEN_DATA_DIR) with seeded synthetic data.")
+    parser.add_argument("--tier", choices=TIERS, default="small")
+    parser.add_argument("--clients", type=int, help="override the tier's client count")
+    parser.add_argument("--invoices", type=int, help="override the tier's invoice count")
+    parser.add_argument("--seed", type=int, default=369)
+    parser.add_argument("--append", action="store_true", help="add to a database that already has clients")
+    args = parser.parse_args()
+
+    init_db()
+    with get_conn() as conn:
+        existing = conn.execute("SELECT COUNT(*) AS n FROM clients").fetchone()["n"]
+    if existing and not args.append:
+        print(f"{DB_PATH} already has {existing} clients; pass --append or point BIZHAVEN_DATA_DIR at an empty directory")
+        return 1
+
+    scale = {**TIERS[args.tier], **{k: v for k, v in (("clients", args.clients), ("invoices", args.invoices)) if v is not None}}
+    started = time.perf_counter()
+    counts = generate(scale["clients"], scale["invoices"], args.seed, progress=True)
+    print(json.dumps({"db": str(DB_PATH), "tier": args.tier, "seed": args.seed, "rows": counts, "duration_s": round(time.perf_counter() - started, 2)}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run())
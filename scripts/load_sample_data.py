@@ -5,7 +5,7 @@ from uuid import uuid4
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from app.core.database import init_db
-from app.services.repository import add_invoice_with_items, execute
+from app.services.repository import add_invoice_with_items, execute, record_payment
 
 
 def run() -> None:
@@ -45,7 +45,7 @@ def run() -> None:
         }
     )
 
-    execute("INSERT INTO payments (invoice_id,amount,method,paid_on,notes) VALUES (?,?,?,?,?)", (iid, 600, "bank", "2026-01-15", "Partial deposit"))
+    record_payment(iid, 600, "bank", "2026-01-15", "Partial deposit")
     execute("INSERT INTO expenses (project_id,category,vendor,amount,expense_date,notes) VALUES (?,?,?,?,?,?)", (p1, "Software", "Hosting Co", 49, "2026-01-10", "Monthly infra"))
     execute("INSERT INTO memories (client_id,memory,source,priority) VALUES (?,?,?,?)", (acme_id, "Client wants minimal pastel branding and quick iterations.", "memoria", 3))
 
@@ -0,0 +1,145 @@
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.core.config import DATA_DIR
+
+# (weight, method, path); a mix of list pages, reports, search and small writes.
+MIX = [
+    (30, "GET", "/invoices?limit=50"),
+    (15, "GET", "/clients?limit=50"),
+    (15, "GET", "/expenses?limit=50"),
+    (15, "GET", "/dashboard"),
+    (10, "GET", "/search?q=ka"),
+    (5, "GET", "/reports/expense-categories"),
+    (10, "POST", "/agentora/tasks"),
+]
+WRITE_BODY = json.dumps({"client_id": 1, "task_type": "check_in", "payload": "{}"}).encode()
+EMBEDDED = "import threading; from app.main import start_embedded_api; start_embedded_api(); threading.Event().wait()"
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, method: str, path: str) -> int:
+    body = WRITE_BODY if method == "POST" else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    writer.write(head.encode() + body)
+    await writer.drain()
+    status_line, *header_lines = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    headers = dict(line.lower().split(": ", 1) for line in header_lines if ": " in line)
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        # Chunked bodies: read until the zero-length chunk.
+        while size := int((await reader.readline()).strip() or b"0", 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    return int(status_line.split()[1])
+
+
+async def _client(host: str, port: int, deadline: float, rng: random.Random, latencies: list[float], statuses: dict[int, int]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    weights = [w for w, _, _ in MIX]
+    try:
+        while time.perf_counter() < deadline:
+            _, method, path = rng.choices(MIX, weights)[0]
+            started = time.perf_counter()
+            status = await _request(reader, writer, host, method, path)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def drive(host: str, port: int, concurrency: int, duration: float, seed: int = 369) -> dict:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, deadline, random.Random(seed + i), latencies, statuses) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2) if latencies else None,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(port: int, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not come up")
+
+
+def run_mode(mode: str, data_dir: Path, concurrency: int, duration: float) -> dict:
+    port = _free_port()
+    env = {**os.environ, "BIZHAVEN_DATA_DIR": str(data_dir), "BIZHAVEN_API_PORT": str(port), "BIZHAVEN_SCHEDULER": "0", "PYTHONPATH": str(ROOT)}
+    if mode == "embedded":
+        command = [sys.executable, "-c", EMBEDDED]
+    else:
+        command = [sys.executable, "-m", "app.main", "--workers", mode.split(":")[1]]
+    server = subprocess.Popen(command, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_ready(port)
+        asyncio.run(drive("127.0.0.1", port, concurrency, 2.0))  # warm caches and connection pools
+        return asyncio.run(drive("127.0.0.1", port, concurrency, duration))
+    finally:
+        server.terminate()
+        server.wait(30)
+
+
+def run() -> int:
+    parser = argparse.ArgumentParser(description="Drive a mixed read/write HTTP load against the API in each serving mode.")
+    parser.add_argument("--modes", nargs="+", default=["embedded", "workers:1", "workers:2", "workers:4"], help="embedded and/or workers:N")
+    parser.add_argument("--url", help="load an already running server (host:port) instead of starting one per mode")
+    parser.add_argument("--source", default=str(DATA_DIR), help="data directory copied for each mode")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+
+    if args.url:
+        host, port = args.url.rsplit(":", 1)
+        print(json.dumps(asyncio.run(drive(host, int(port), args.concurrency, args.duration)), indent=2))
+        return 0
+
+    results = {}
+    for mode in args.modes:
+        # Every mode starts from the same copy, so earlier runs' writes don't skew later ones.
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp) / "data"
+            shutil.copytree(args.source, data_dir, ignore=shutil.ignore_patterns("backups", "bench", "benchmarks", "exports"))
+            results[mode] = run_mode(mode, data_dir, args.concurrency, args.duration)
+        r = results[mode]
+        print(f"{mode:10} {r['rps']:8.1f} req/s  p50 {r['p50_ms']:7.2f} ms  p95 {r['p95_ms']:7.2f} ms  statuses {r['statuses']}")
+    print(json.dumps({"cpus": os.cpu_count(), "concurrency": args.concurrency, "duration_s": args.duration, "modes": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run())
@@ -0,0 +1,91 @@
+from pathlib import Path
+import argparse
+from datetime import datetime, timezone
+import json
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import BACKUP_RETENTION
+from app.core.database import init_db
+from app.services.backup import create_backup, find_backup, list_backups, restore_backup, verify_backup
+from app.services.repository import check_invoice_balances, rebuild_dashboard_totals
+
+
+def _print(result: dict) -> None:
+    print(json.dumps(result, indent=2, default=str))
+
+
+def rebuild_dashboard(args: argparse.Namespace) -> int:
+    result = rebuild_dashboard_totals(apply=not args.check)
+    _print(result)
+    return 1 if args.check and result["drift"] else 0
+
+
+def check_balances(args: argparse.Namespace) -> int:
+    mismatches = check_invoice_balances(fix=args.fix)
+    _print({"mismatches": mismatches, "fixed": args.fix})
+    return 1 if mismatches and not args.fix else 0
+
+
+def backup(args: argparse.Namespace) -> int:
+    _print(create_backup(keep=args.keep))
+    return 0
+
+
+def _pick_backup(args: argparse.Namespace) -> Path | None:
+    if args.path:
+        return Path(args.path)
+    at = datetime.fromisoformat(args.at).astimezone(timezone.utc) if args.at else None
+    return find_backup(at)
+
+
+def verify(args: argparse.Namespace) -> int:
+    targets = [Path(args.path)] if args.path else list_backups()
+    results = [verify_backup(path) for path in targets]
+    _print(results)
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+def restore(args: argparse.Namespace) -> int:
+    archive = _pick_backup(args)
+    if archive is None:
+        print("No matching backup found")
+        return 1
+    _print(restore_backup(archive, restore_files=not args.db_only))
+    return 0
+
+
+def run() -> int:
+    parser = argparse.ArgumentParser(description="BizHaven database maintenance commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-dashboard", help="recompute dashboard totals from scratch and report drift")
+    rebuild.add_argument("--check", action="store_true", help="only report drift, exit 1 if any")
+    rebuild.set_defaults(handler=rebuild_dashboard)
+
+    balances = commands.add_parser("check-balances", help="verify invoice paid_total/balance_due against payments")
+    balances.add_argument("--fix", action="store_true", help="rewrite mismatched invoices")
+    balances.set_defaults(handler=check_balances)
+
+    snapshot = commands.add_parser("backup", help="take an online, checksummed snapshot of the database and files")
+    snapshot.add_argument("--keep", type=int, default=BACKUP_RETENTION, help="snapshots to retain")
+    snapshot.set_defaults(handler=backup)
+
+    check = commands.add_parser("verify-backup", help="verify checksums and integrity of one or all snapshots")
+    check.add_argument("path", nargs="?")
+    check.set_defaults(handler=verify)
+
+    recover = commands.add_parser("restore", help="restore a snapshot (the newest, or the newest at/before --at)")
+    recover.add_argument("path", nargs="?")
+    recover.add_argument("--at", help="ISO timestamp for point-in-time restore")
+    recover.add_argument("--db-only", action="store_true", help="leave documents and receipts untouched")
+    recover.set_defaults(handler=restore)
+
+    args = parser.parse_args()
+    init_db()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(run())
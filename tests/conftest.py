@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+# Settings are read at import time, so the data directory must be in place before anything imports app.
+os.environ["BIZHAVEN_DATA_DIR"] = tempfile.mkdtemp(prefix="bizhaven-tests-")
+os.environ["BIZHAVEN_SCHEDULER"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import init_db
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database() -> None:
+    init_db()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.api.server import app
+
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,71 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.services.agents import AgentWorkerPool, claim_tasks, complete_task, enqueue_agent_task, fail_task
+from app.services.channels import LocalOutbox
+from app.services.repository import execute, fetch_one
+
+
+def _task(email: str | None = "agent@example.test", task_type: str = "check_in") -> int:
+    client_id = execute("INSERT INTO clients (name, email) VALUES ('Agent Co', ?)", (email,))
+    return enqueue_agent_task(client_id, task_type, "{}", urgent=True).result(5)
+
+
+def _row(task_id: int) -> dict:
+    return fetch_one("SELECT status, attempts, lease_owner, available_at, last_error, result FROM agent_tasks WHERE id=?", (task_id,))
+
+
+def _claim(owner: str, task_id: int, **kwargs) -> list[dict]:
+    return [task for task in claim_tasks(owner, limit=500, **kwargs) if task["id"] == task_id]
+
+
+def test_a_claimed_task_is_not_handed_out_twice():
+    task_id = _task()
+    assert len(_claim("worker-a", task_id)) == 1
+    assert _row(task_id)["status"] == "running"
+    assert _row(task_id)["lease_owner"] == "worker-a"
+    assert _claim("worker-b", task_id) == []
+
+
+def test_expired_lease_is_reclaimed_and_the_old_owner_is_fenced_off():
+    task_id = _task()
+    assert _claim("worker-a", task_id, lease_seconds=-1)
+    reclaimed = _claim("worker-b", task_id)
+    assert reclaimed and reclaimed[0]["attempts"] == 2
+    # The first worker comes back late: its completion and failure must not touch the new owner's run.
+    assert not complete_task(task_id, "worker-a", {"message_id": "late"})
+    fail_task(task_id, "worker-a", 1, "late failure", retry=True)
+    assert _row(task_id)["lease_owner"] == "worker-b"
+    assert complete_task(task_id, "worker-b", {"message_id": "ok"})
+    row = _row(task_id)
+    assert row["status"] == "done" and json.loads(row["result"]) == {"message_id": "ok"}
+
+
+def test_failures_back_off_then_fail_for_good(monkeypatch):
+    from app.services import agents
+
+    monkeypatch.setattr(agents, "AGENT_MAX_ATTEMPTS", 2)
+    task_id = _task()
+    now = datetime.now(timezone.utc)
+    assert _claim("worker-a", task_id, now=now)
+    assert fail_task(task_id, "worker-a", 1, "timeout", retry=True, now=now) == "queued"
+    assert _claim("worker-a", task_id, now=now) == []
+    later = now + timedelta(hours=1)
+    assert _claim("worker-a", task_id, now=later)
+    assert fail_task(task_id, "worker-a", 2, "timeout", retry=True, now=later) == "failed"
+    assert _row(task_id)["status"] == "failed"
+
+
+def test_pool_sends_and_fails_permanent_errors_without_retrying():
+    sent_id, no_email_id = _task(), _task(email=None)
+    outbox = LocalOutbox(path=None)
+    pool = AgentWorkerPool(workers=2, executor="thread", channel=outbox)
+    try:
+        pool.drain()
+    finally:
+        pool.stop()
+    assert _row(sent_id)["status"] == "done"
+    assert any(message["meta"]["task_id"] == sent_id for message in outbox.sent)
+    row = _row(no_email_id)
+    assert (row["status"], row["attempts"]) == ("failed", 1)
+    assert "no email address" in row["last_error"]
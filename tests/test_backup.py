@@ -0,0 +1,52 @@
+import tarfile
+from io import BytesIO
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.cache import table_versions
+from app.services.backup import create_backup, find_backup, list_backups, restore_backup, verify_backup
+from app.services.repository import execute, fetch_one
+
+
+def test_backup_verifies_and_rotates(tmp_path):
+    results = [create_backup(backup_dir=tmp_path, keep=2, pages=4, sleep=0) for _ in range(3)]
+    assert [str(p) for p in list_backups(tmp_path)] == [results[2]["path"], results[1]["path"]]
+    assert results[2]["rotated"] == [results[0]["path"]]
+    assert results[2]["backup_steps"] >= 1
+    report = verify_backup(list_backups(tmp_path)[0])
+    assert report["ok"], report["problems"]
+
+
+def test_corrupted_archive_is_refused(tmp_path):
+    archive = tmp_path / "bizhaven-20260101T000000000000Z.tar.gz"
+    original = create_backup(backup_dir=tmp_path, pages=4, sleep=0)["path"]
+    with tarfile.open(original, "r:gz") as src, tarfile.open(archive, "w:gz") as dst:
+        for member in src.getmembers():
+            data = src.extractfile(member)
+            if member.name == "bizhaven.db":
+                # Same size, different bytes: the manifest checksum no longer matches.
+                payload = bytearray(data.read())
+                payload[-1] ^= 0xFF
+                dst.addfile(member, BytesIO(bytes(payload)))
+            else:
+                dst.addfile(member, data)
+    report = verify_backup(archive)
+    assert not report["ok"]
+    assert "checksum mismatch for bizhaven.db" in report["problems"]
+    with pytest.raises(ValueError):
+        restore_backup(archive)
+
+
+def test_restore_rolls_back_later_writes_and_lifts_table_versions(tmp_path):
+    kept = execute("INSERT INTO clients (name) VALUES ('Before Backup')")
+    archive = create_backup(backup_dir=tmp_path, pages=4, sleep=0)["path"]
+    dropped = execute("INSERT INTO clients (name) VALUES ('After Backup')")
+    before = table_versions()["clients"]
+
+    restore_backup(find_backup(backup_dir=tmp_path), restore_files=False)
+    assert fetch_one("SELECT 1 FROM clients WHERE id=?", (kept,))
+    assert fetch_one("SELECT 1 FROM clients WHERE id=?", (dropped,)) is None
+    assert table_versions()["clients"] > before
+    assert find_backup(datetime.now(timezone.utc) - timedelta(days=1), backup_dir=tmp_path) is None
+    assert str(find_backup(datetime.now(timezone.utc), backup_dir=tmp_path)) == archive
@@ -0,0 +1,57 @@
+from app.services.repository import add_invoice_with_items, check_invoice_balances, delete_payment, execute, fetch_one, record_payment
+
+
+def _invoice(number: str, total: float = 200) -> int:
+    client_id = execute("INSERT INTO clients (name) VALUES (?)", (f"Balance {number}",))
+    return add_invoice_with_items(
+        {"client_id": client_id, "invoice_number": number, "issue_date": "2026-01-01", "due_date": "2026-01-31", "items": [{"description": "Work", "quantity": 1, "rate": total}], "reminder_days": 0}
+    )
+
+
+def _balance(invoice_id: int) -> dict:
+    return fetch_one("SELECT status, paid_total, balance_due FROM invoices WHERE id=?", (invoice_id,))
+
+
+def test_payments_keep_paid_total_and_balance_in_sync():
+    invoice = _invoice("BAL-1")
+    assert _balance(invoice) == {"status": "sent", "paid_total": 0, "balance_due": 200}
+    first = record_payment(invoice, 50, "bank", "2026-01-10")
+    assert _balance(invoice) == {"status": "partial", "paid_total": 50, "balance_due": 150}
+    record_payment(invoice, 150, "card", "2026-01-20")
+    assert _balance(invoice) == {"status": "paid", "paid_total": 200, "balance_due": 0}
+    # A refund is a negative payment.
+    record_payment(invoice, -25, "bank", "2026-01-25")
+    assert _balance(invoice) == {"status": "partial", "paid_total": 175, "balance_due": 25}
+
+    assert delete_payment(first)
+    assert _balance(invoice) == {"status": "partial", "paid_total": 125, "balance_due": 75}
+    assert not delete_payment(first)
+
+
+def test_payment_moved_between_invoices_updates_both():
+    source, target = _invoice("BAL-MOVE-A"), _invoice("BAL-MOVE-B")
+    payment = record_payment(source, 80, "bank", "2026-01-10")
+    execute("UPDATE payments SET invoice_id=? WHERE id=?", (target, payment))
+    assert _balance(source)["balance_due"] == 200
+    assert _balance(target)["paid_total"] == 80
+
+
+def test_check_invoice_balances_reports_and_repairs_drift():
+    invoice = _invoice("BAL-DRIFT")
+    record_payment(invoice, 60, "bank", "2026-01-10")
+    execute("UPDATE invoices SET paid_total=0, balance_due=999 WHERE id=?", (invoice,))
+    drifted = {row["id"]: row for row in check_invoice_balances()}
+    assert drifted[invoice]["expected_paid_total"] == 60
+    assert drifted[invoice]["expected_balance_due"] == 140
+    check_invoice_balances(fix=True)
+    assert invoice not in {row["id"] for row in check_invoice_balances()}
+    assert _balance(invoice)["balance_due"] == 140
+
+
+def test_delete_payment_endpoint(client):
+    invoice = _invoice("BAL-API")
+    payment = client.post("/payments", json={"invoice_id": invoice, "amount": 200, "method": "bank", "paid_on": "2026-01-10"}).json()["id"]
+    assert _balance(invoice)["status"] == "paid"
+    assert client.delete(f"/payments/{payment}").status_code == 200
+    assert _balance(invoice) == {"status": "sent", "paid_total": 0, "balance_due": 200}
+    assert client.delete(f"/payments/{payment}").status_code == 404
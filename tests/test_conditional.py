@@ -0,0 +1,35 @@
+from app.services.repository import ensure_client_portal_token, execute
+
+
+def test_matching_etag_gets_304_without_a_body(client):
+    first = client.get("/reports/expense-categories")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    assert first.headers["cache-control"] == "private, no-cache"
+    for header in (etag, etag.removeprefix("W/"), f'"other", {etag}', "*"):
+        revalidated = client.get("/reports/expense-categories", headers={"If-None-Match": header})
+        assert revalidated.status_code == 304, header
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+    assert client.get("/reports/expense-categories", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_tag_depends_on_query_and_data(client):
+    monthly = client.get("/reports/profit-loss").headers["etag"]
+    quarterly = client.get("/reports/profit-loss?period=quarterly").headers["etag"]
+    assert monthly != quarterly
+    execute("INSERT INTO expenses (category, amount, expense_date) VALUES ('Conditional', 12, '2026-02-02')")
+    changed = client.get("/reports/profit-loss", headers={"If-None-Match": monthly})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != monthly
+
+
+def test_portal_revalidates_until_the_clients_invoices_change(client):
+    client_id = execute("INSERT INTO clients (name) VALUES ('Portal Co')")
+    token = ensure_client_portal_token(client_id)
+    etag = client.get(f"/portal/{token}").headers["etag"]
+    assert client.get(f"/portal/{token}", headers={"If-None-Match": etag}).status_code == 304
+    client.post("/invoices", json={"client_id": client_id, "invoice_number": "PORTAL-1", "issue_date": "2026-03-01", "due_date": "2026-03-15", "items": [{"description": "Work", "quantity": 1, "rate": 10}]})
+    fresh = client.get(f"/portal/{token}", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert [row["invoice_number"] for row in fresh.json()["invoices"]] == ["PORTAL-1"]
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+
+
+def _upload(client, content: bytes, filename: str, content_type: str) -> dict:
+    response = client.post("/files", files={"file": (filename, content, content_type)})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_active_content_is_served_as_a_download(client):
+    for content, filename, content_type in [(b"<script>alert(1)</script>", "x.html", "text/html"), (b"<svg onload='alert(1)'/>", "x.svg", "image/svg+xml")]:
+        stored = _upload(client, content, filename, content_type)
+        response = client.get(f"/files/{stored['sha256']}")
+        assert response.headers["content-disposition"].startswith("attachment")
+        assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_safe_types_stay_inline(client):
+    content = b"%PDF-1.4 receipt"
+    stored = _upload(client, content, "receipt.pdf", "application/pdf")
+    assert stored["sha256"] == hashlib.sha256(content).hexdigest()
+    response = client.get(f"/files/{stored['sha256']}")
+    assert response.headers["content-disposition"].startswith("inline")
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_oversized_upload_is_rejected_before_it_is_spooled(client, monkeypatch):
+    from app.api import server
+
+    monkeypatch.setattr(server, "UPLOAD_MAX_BYTES", 1024)
+    monkeypatch.setattr(server, "UPLOAD_FORM_OVERHEAD", 1024)
+    headers = [(b"content-type", b"multipart/form-data; boundary=bz")]
+    chunks = [b"--bz\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.bin\"\r\n\r\n"] + [b"x" * 1024] * 64
+    sent = []
+
+    async def receive():
+        sent.append(1)
+        return {"type": "http.request", "body": chunks[len(sent) - 1], "more_body": len(sent) < len(chunks)}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    # Driven at the ASGI level: the test client would buffer the whole body before the app saw any of it.
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http", "path": "/files", "raw_path": b"/files", "root_path": "", "query_string": b"", "headers": headers, "client": ("test", 1), "server": ("test", 80)}
+    asyncio.run(server.app(scope, receive, send))
+    assert messages[0]["status"] == 413
+    assert len(sent) < len(chunks)
+
+    declared = client.post("/files", content=b"x" * 4096, headers={"Content-Type": "multipart/form-data; boundary=bz"})
+    assert declared.status_code == 413
+
+
+def test_upload_requires_a_file_part(client):
+    assert client.post("/files", data={"entity": "document"}, files={"other": ("a.txt", b"a", "text/plain")}).status_code == 400
+    assert client.post("/files", content=b"plain", headers={"Content-Type": "text/plain"}).status_code == 400
+
+
+def test_identical_content_is_stored_once(client):
+    from app.services.files import INCOMING_DIR, blob_path
+
+    content = b"dedup me " * 1000
+    first = _upload(client, content, "a.txt", "text/plain")
+    second = _upload(client, content, "b.txt", "text/plain")
+    assert first["sha256"] == second["sha256"] == hashlib.sha256(content).hexdigest()
+    assert (first["deduplicated"], second["deduplicated"]) == (False, True)
+    assert first["link_id"] != second["link_id"]
+    assert blob_path(first["sha256"]).read_bytes() == content
+    assert not list(INCOMING_DIR.glob("*.part"))
+
+
+def test_linking_fills_the_expense_receipt_path(client):
+    from app.services.repository import execute, fetch_one
+
+    expense_id = execute("INSERT INTO expenses (category, amount, expense_date) VALUES ('Receipts', 5, '2026-01-05')")
+    response = client.post("/files", files={"file": ("r.png", b"\x89PNG receipt", "image/png")}, data={"entity": "expense", "entity_id": str(expense_id)})
+    stored = response.json()
+    assert fetch_one("SELECT receipt_path FROM expenses WHERE id=?", (expense_id,))["receipt_path"] == stored["url"]
+    links = client.get("/files", params={"entity": "expense", "entity_id": expense_id}).json()
+    assert [link["sha256"] for link in links] == [stored["sha256"]]
+
+    missing = client.post("/files", files={"file": ("r.png", b"x", "image/png")}, data={"entity": "expense", "entity_id": "999999"})
+    assert missing.status_code == 404
+    unknown = client.post("/files", files={"file": ("r.png", b"x", "image/png")}, data={"entity": "invoice"})
+    assert unknown.status_code == 400
+
+
+def test_downloads_support_ranges_and_revalidation(client):
+    content = bytes(range(256)) * 8
+    stored = _upload(client, content, "blob.pdf", "application/pdf")
+    url = f"/files/{stored['sha256']}"
+
+    partial = client.get(url, headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.content == content[100:200]
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(content)}"
+
+    full = client.get(url)
+    assert full.content == content
+    assert full.headers["etag"] == f'"{stored["sha256"]}"'
+    assert "immutable" in full.headers["cache-control"]
+    assert client.get(url, headers={"If-None-Match": full.headers["etag"]}).status_code == 304
+    assert client.get("/files/" + "0" * 64).status_code == 404
+    assert client.get("/files/not-a-hash").status_code == 404
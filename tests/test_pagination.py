@@ -0,0 +1,44 @@
+import base64
+import json
+
+from app.services.repository import execute
+
+
+def _cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_crafted_cursor_is_a_bad_request(client):
+    for path, values in [("/expenses", [{"a": 1}, 1]), ("/invoices", [[1]]), ("/clients", [True])]:
+        response = client.get(path, params={"cursor": _cursor(values)})
+        assert response.status_code == 400, path
+
+
+def test_undated_expenses_are_listed_and_paged(client):
+    category = "Pagination"
+    dated = [execute("INSERT INTO expenses (category, amount, expense_date) VALUES (?,?,?)", (category, 1, f"2026-0{i}-15")) for i in range(1, 4)]
+    undated = [execute("INSERT INTO expenses (category, amount, expense_date) VALUES (?,?,NULL)", (category, 1)) for _ in range(3)]
+
+    seen, cursor = [], None
+    while True:
+        page = client.get("/expenses", params={"category": category, "limit": 2, **({"cursor": cursor} if cursor else {})}).json()
+        seen += [row["id"] for row in page["items"]]
+        if not (cursor := page["next_cursor"]):
+            break
+    assert seen == dated[::-1] + undated[::-1]
+
+    ranged = client.get("/expenses", params={"category": category, "start": "2026-01-01"}).json()["items"]
+    assert [row["id"] for row in ranged] == dated[::-1]
+
+
+def test_agent_task_queue_is_paged():
+    from app.services.repository import list_page
+
+    client_id = execute("INSERT INTO clients (name) VALUES ('Queue Paging Co')")
+    ids = [execute("INSERT INTO agent_tasks (client_id, task_type, payload, status) VALUES (?, 'check_in', '{}', 'done')", (client_id,)) for _ in range(5)]
+    first = list_page("agent_tasks", 3, client_id=client_id)
+    second = list_page("agent_tasks", 3, first["next_cursor"], client_id=client_id)
+    assert [row["id"] for row in first["items"] + second["items"]] == ids[::-1]
+    assert first["items"][0]["client_name"] == "Queue Paging Co"
+    assert second["next_cursor"] is None
+    assert all(row["status"] == "done" for row in list_page("agent_tasks", 50, status="done")["items"])
@@ -0,0 +1,45 @@
+from datetime import date
+
+from app.services.repository import add_invoice_with_items, execute, fetch_all, fetch_one, run_recurring_invoices
+
+
+def _client(name: str) -> int:
+    return execute("INSERT INTO clients (name) VALUES (?)", (name,))
+
+
+def _template(client_id: int, number: str, next_run_date: str, rule: str = "monthly") -> int:
+    return add_invoice_with_items(
+        {
+            "client_id": client_id,
+            "invoice_number": number,
+            "issue_date": next_run_date,
+            "due_date": next_run_date,
+            "items": [{"description": "Retainer", "quantity": 1, "rate": 500}],
+            "reminder_days": 0,
+            "recurring_rule": rule,
+            "next_run_date": next_run_date,
+        }
+    )
+
+
+def test_monthly_schedule_keeps_its_anchor_day():
+    template = _template(_client("Anchor Co"), "T-ANCHOR", "2026-01-31")
+    run_recurring_invoices(today=date(2026, 4, 30))
+    numbers = [row["invoice_number"] for row in fetch_all("SELECT invoice_number FROM invoices WHERE invoice_number LIKE 'T-ANCHOR-R%' ORDER BY id")]
+    assert numbers == ["T-ANCHOR-R20260131", "T-ANCHOR-R20260228", "T-ANCHOR-R20260331", "T-ANCHOR-R20260430"]
+    assert fetch_one("SELECT next_run_date FROM invoices WHERE id=?", (template,))["next_run_date"] == "2026-05-31"
+
+
+def test_failing_template_does_not_block_the_others():
+    client_id = _client("Isolation Co")
+    broken = _template(client_id, "T-BROKEN", "2026-06-01")
+    execute("UPDATE invoice_items SET rate='not a number' WHERE invoice_id=?", (broken,))
+    healthy = _template(client_id, "T-HEALTHY", "2026-06-01")
+
+    assert run_recurring_invoices(today=date(2026, 6, 1)) >= 1
+    assert fetch_one("SELECT 1 FROM invoices WHERE invoice_number='T-HEALTHY-R20260601'")
+    assert fetch_one("SELECT next_run_date FROM invoices WHERE id=?", (healthy,))["next_run_date"] == "2026-07-01"
+    # The broken template stays due and bills nothing, however often the job runs.
+    run_recurring_invoices(today=date(2026, 6, 1))
+    assert fetch_one("SELECT next_run_date FROM invoices WHERE id=?", (broken,))["next_run_date"] == "2026-06-01"
+    assert not fetch_one("SELECT 1 FROM invoices WHERE invoice_number='T-BROKEN-R20260601'")
@@ -0,0 +1,80 @@
+from app.services import reminders
+from app.services.channels import DeliveryError, LocalOutbox
+from app.services.reminders import FAILED, SENDING, SENT, SKIPPED, dispatch_reminders, release_stale_claims
+from app.services.repository import add_invoice_with_items, execute, fetch_one, record_payment
+
+
+class BrokenChannel:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def send(self, to, subject, body, meta=None):
+        self.calls += 1
+        raise DeliveryError("relay down")
+
+
+def _invoice(number: str, due_date: str, email: str | None = "billing@example.test") -> int:
+    client_id = execute("INSERT INTO clients (name, email) VALUES (?, ?)", (f"Client {number}", email))
+    return add_invoice_with_items(
+        {"client_id": client_id, "invoice_number": number, "issue_date": due_date, "due_date": due_date, "items": [{"description": "Work", "quantity": 1, "rate": 100}], "reminder_days": 3}
+    )
+
+
+def _state(invoice_id: int) -> dict:
+    return fetch_one("SELECT sent, attempts, last_error, sent_at FROM reminders WHERE invoice_id=?", (invoice_id,))
+
+
+def test_due_reminders_are_claimed_and_sent_once():
+    due = _invoice("REM-SEND-1", "2001-03-10")
+    later = _invoice("REM-SEND-2", "2099-12-30")
+    outbox = LocalOutbox(path=None)
+
+    stats = dispatch_reminders(today="2001-06-01", channel=outbox)
+    assert (stats["claimed"], stats["sent"]) == (1, 1)
+    assert outbox.sent[0]["to"] == "billing@example.test"
+    assert _state(due)["sent"] == SENT and _state(due)["sent_at"]
+    assert _state(later)["sent"] == 0
+    assert dispatch_reminders(today="2001-06-01", channel=outbox)["claimed"] == 0
+    assert len(outbox.sent) == 1
+
+
+def test_paid_invoices_are_skipped():
+    paid = _invoice("REM-PAID", "2002-03-10")
+    record_payment(paid, 100, "bank", "2002-03-01")
+    outbox = LocalOutbox(path=None)
+
+    stats = dispatch_reminders(today="2002-06-01", channel=outbox)
+    assert (stats["skipped"], stats["sent"]) == (1, 0)
+    assert _state(paid)["sent"] == SKIPPED
+    assert outbox.sent == []
+
+
+def test_failed_sends_retry_until_max_attempts(monkeypatch):
+    monkeypatch.setattr(reminders, "REMINDER_MAX_ATTEMPTS", 2)
+    invoice = _invoice("REM-RETRY", "2003-03-10")
+    channel = BrokenChannel()
+
+    assert dispatch_reminders(today="2003-06-01", channel=channel)["retrying"] == 1
+    assert _state(invoice)["sent"] == SENDING
+    # Still claimed until the claim window passes, so an immediate rerun leaves it alone.
+    assert dispatch_reminders(today="2003-06-01", channel=channel)["claimed"] == 0
+    release_stale_claims(claim_seconds=-1)
+    assert dispatch_reminders(today="2003-06-01", channel=channel)["failed"] == 1
+    state = _state(invoice)
+    assert (state["sent"], state["attempts"]) == (FAILED, 2)
+    assert "relay down" in state["last_error"]
+    assert channel.calls == 2
+
+
+def test_missing_email_fails_without_sending():
+    channel = BrokenChannel()
+    no_email = _invoice("REM-NOMAIL", "2004-03-10", email=None)
+    blank_email = _invoice("REM-BLANK", "2004-03-11", email="  ")
+
+    stats = dispatch_reminders(today="2004-06-01", channel=channel)
+    assert (stats["failed"], stats["retrying"]) == (2, 0)
+    assert channel.calls == 0
+    for invoice in (no_email, blank_email):
+        state = _state(invoice)
+        assert (state["sent"], state["attempts"]) == (FAILED, 1)
+        assert "no email address" in state["last_error"]
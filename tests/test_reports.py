@@ -0,0 +1,20 @@
+from app.core.executor import report_flight
+
+
+def test_dashboard_reflects_write_inside_coalesce_window(client):
+    assert report_flight.ttl > 0
+    client_id = client.post("/clients", json={"name": "Coalesce Co"}).json()["id"]
+    invoice = client.post(
+        "/invoices",
+        json={"client_id": client_id, "invoice_number": "T-FLIGHT-1", "issue_date": "2026-03-01", "due_date": "2026-03-15", "items": [{"description": "Work", "quantity": 1, "rate": 110}]},
+    ).json()
+    before = client.get("/dashboard")
+    client.post("/payments", json={"invoice_id": invoice["id"], "amount": 110, "method": "bank", "paid_on": "2026-03-02"})
+    after = client.get("/dashboard")
+    assert after.headers["etag"] != before.headers["etag"]
+    assert after.json()["earnings"] == before.json()["earnings"] + 110
+    assert after.json()["outstanding"] == before.json()["outstanding"] - 110
+    # Revalidating with the old tag gets the new one back.
+    revalidated = client.get("/dashboard", headers={"If-None-Match": before.headers["etag"]})
+    assert revalidated.status_code == 200
+    assert revalidated.headers["etag"] == after.headers["etag"]
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from app.services.scheduler import JobBusy, Scheduler
+
+
+def _blocked_scheduler() -> tuple[Scheduler, threading.Event, threading.Event, threading.Thread]:
+    scheduler = Scheduler()
+    started, release = threading.Event(), threading.Event()
+
+    def slow() -> str:
+        started.set()
+        release.wait(5)
+        return "done"
+
+    scheduler.add_job("slow", slow)
+    scheduler.add_job("quick", lambda: "quick")
+    runner = threading.Thread(target=scheduler.run_job, args=("slow",))
+    runner.start()
+    assert started.wait(5)
+    return scheduler, started, release, runner
+
+
+def test_run_job_without_waiting_raises_while_another_job_runs():
+    scheduler, _, release, runner = _blocked_scheduler()
+    try:
+        with pytest.raises(JobBusy):
+            scheduler.run_job("quick", wait=False)
+    finally:
+        release.set()
+        runner.join(5)
+    assert scheduler.run_job("quick", wait=False)["result"] == "quick"
+
+
+def test_manual_trigger_answers_409_while_the_scheduler_is_busy(client, monkeypatch):
+    from app.api import server
+
+    scheduler, _, release, runner = _blocked_scheduler()
+    scheduler.add_job("recurring_invoices", lambda: 0)
+    monkeypatch.setattr(server, "scheduler", scheduler)
+    try:
+        assert client.post("/automation/run-recurring").status_code == 409
+        # The write lane stays free for everything else.
+        assert client.post("/clients", json={"name": "Not Blocked"}).status_code == 200
+    finally:
+        release.set()
+        runner.join(5)
+    assert client.post("/automation/run-recurring").json() == {"created": 0}
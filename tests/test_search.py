@@ -0,0 +1,15 @@
+from app.services import search as search_module
+from app.services.repository import execute
+from app.services.search import search
+
+
+def test_like_fallback_treats_wildcards_literally(monkeypatch):
+    monkeypatch.setattr(search_module, "_has_fts", lambda: False)
+    execute("INSERT INTO clients (name) VALUES ('Wild_card Works')")
+    execute("INSERT INTO clients (name) VALUES ('Wildxcard Works')")
+    execute("INSERT INTO clients (name) VALUES ('100% Wild')")
+
+    assert [hit["title"] for hit in search("Wild_", "client")] == ["Wild_card Works"]
+    assert [hit["title"] for hit in search("100%", "client")] == ["100% Wild"]
+    assert search("_", "client") == []
+    assert [hit["title"] for hit in search("wildx", "client")] == ["Wildxcard Works"]
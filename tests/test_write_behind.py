@@ -0,0 +1,69 @@
+import pytest
+
+from app.core.database import transaction
+from app.core.write_behind import WriteBehindQueue
+from app.services.repository import audit, fetch_all, fetch_one
+
+INSERT = "INSERT INTO audit_events (action, entity) VALUES (?, 'write-behind-test')"
+
+
+def _actions(prefix: str) -> list[str]:
+    rows = fetch_all("SELECT action FROM audit_events WHERE entity='write-behind-test' AND action LIKE ? ORDER BY id", (prefix + "%",))
+    return [row["action"] for row in rows]
+
+
+@pytest.fixture
+def writer():
+    queue = WriteBehindQueue(enabled=True, delay_ms=50, batch_size=8)
+    yield queue
+    queue.close()
+
+
+def test_queued_writes_commit_in_batches(writer):
+    futures = [writer.submit(INSERT, (f"batch-{i}",)) for i in range(20)]
+    writer.flush(5)
+    assert all(future.done() for future in futures)
+    assert fetch_one("SELECT action FROM audit_events WHERE id=?", (futures[0].result(),))["action"] == "batch-0"
+    assert _actions("batch-") == [f"batch-{i}" for i in range(20)]
+    stats = writer.stats()
+    assert stats["written"] == 20 and stats["failed"] == 0
+    assert stats["batches"] < 20
+
+
+def test_a_bad_statement_fails_only_its_own_future(writer):
+    good = writer.submit(INSERT, ("replay-1",))
+    bad = writer.submit("INSERT INTO audit_events (action) VALUES (NULL)")
+    after = writer.submit(INSERT, ("replay-2",))
+    writer.flush(5)
+    assert good.result() and after.result()
+    with pytest.raises(Exception, match="NOT NULL"):
+        bad.result()
+    assert _actions("replay-") == ["replay-1", "replay-2"]
+    assert writer.stats()["failed"] == 1
+
+
+def test_close_drains_the_queue(writer):
+    futures = [writer.submit(INSERT, (f"drain-{i}",)) for i in range(5)]
+    writer.close()
+    assert all(future.done() for future in futures)
+    assert len(_actions("drain-")) == 5
+
+
+def test_writes_inside_a_transaction_roll_back_with_it(writer):
+    with pytest.raises(RuntimeError):
+        with transaction():
+            writer.submit(INSERT, ("rolled-back",))
+            raise RuntimeError("abort")
+    with transaction():
+        writer.submit(INSERT, ("joined",))
+    assert _actions("rolled-back") == []
+    assert _actions("joined") == ["joined"]
+    assert writer.stats()["submitted"] == 0
+
+
+def test_audit_events_are_served_after_an_urgent_write(client):
+    event_id = audit("checked", "write-behind-test", 42, note="hello").result(5)
+    events = client.get("/audit", params={"entity": "write-behind-test", "entity_id": 42}).json()
+    assert events[0]["id"] == event_id
+    assert events[0]["action"] == "checked"
+    assert events[0]["detail"] == '{"note": "hello"}'